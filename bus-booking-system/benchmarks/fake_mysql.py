@@ -0,0 +1,254 @@
+"""In-process MySQL stand-in on SQLite, for benchmarks and CI runs without a server
+
+The schema is translated from database/philippine_bus_routes.sql, and the
+handful of MySQL constructs the application uses (%s placeholders, FOR
+UPDATE [SKIP LOCKED], INSERT IGNORE, ON DUPLICATE KEY UPDATE, CURDATE(),
+HOUR(), DATEDIFF(), DATE_FORMAT(), INTERVAL n DAY) are rewritten on the
+fly. One transaction runs at a time, so lock contention shows up as time
+spent waiting for the database rather than as row-level conflicts.
+Numbers from the stand-in are for comparing runs with each other, not
+with a real server.
+"""
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from mysql.connector import Error
+
+# Columns the application reads and writes that the SQL file doesn't define
+COMPAT_COLUMNS = {
+    'users': ['full_name VARCHAR(150)'],
+    'bus_routes': ['origin_city VARCHAR(100)', 'destination_city VARCHAR(100)'],
+    'bookings': ['passenger_name VARCHAR(150)']
+}
+
+_CREATE_TABLE = re.compile(r'CREATE TABLE (\w+) \((.*?)\n\) ENGINE=[^;]*;', re.S)
+_DUPLICATE_KEY = re.compile(r'ON DUPLICATE KEY UPDATE', re.I)
+_VALUES_REF = re.compile(r'VALUES\((\w+)\)')
+_INTERVAL_DAYS = re.compile(r'CURDATE\(\)\s*\+\s*INTERVAL\s+(\?|\d+)\s+DAY', re.I)
+_MYSQL_FORMAT = {'%Y': '%Y', '%m': '%m', '%d': '%d', '%H': '%H', '%i': '%M', '%s': '%S'}
+
+
+def _time_to_timedelta(raw):
+    hours, minutes, seconds = (raw.decode() if isinstance(raw, bytes) else raw).split(':')
+    return timedelta(hours=int(hours), minutes=int(minutes), seconds=float(seconds))
+
+
+def _timedelta_to_time(value):
+    seconds = int(value.total_seconds())
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+# Return the same Python types mysql-connector does
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(timedelta, _timedelta_to_time)
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter('DATE', lambda raw: date.fromisoformat(raw.decode()[:10]))
+sqlite3.register_converter('DATETIME', lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter('TIME', _time_to_timedelta)
+sqlite3.register_converter('DECIMAL', lambda raw: Decimal(raw.decode()))
+
+
+def translate_schema(sql):
+    """CREATE TABLE statements from the MySQL script, rewritten for SQLite
+
+    Secondary indexes and foreign keys are dropped and NOT NULL is relaxed
+    (the application inserts fewer columns than the script requires).
+    ON UPDATE CURRENT_TIMESTAMP becomes a trigger, so updated_at moves as
+    it does in MySQL.
+    """
+    statements = []
+    triggers = []
+    for table, body in _CREATE_TABLE.findall(sql):
+        columns = []
+        for line in body.split('\n'):
+            line = line.strip().rstrip(',')
+            if not line or line.startswith('--') or re.match(r'(UNIQUE\s+)?(INDEX|KEY|FOREIGN KEY)\b', line):
+                continue
+            line = re.sub(r'\bINT PRIMARY KEY AUTO_INCREMENT\b', 'INTEGER PRIMARY KEY AUTOINCREMENT', line)
+            line = re.sub(r"ENUM\([^)]*\)", 'TEXT', line)
+            line = re.sub(r'DECIMAL\(\d+,\s*\d+\)', 'DECIMAL', line)
+            if re.search(r'\bON UPDATE CURRENT_TIMESTAMP\b', line):
+                column = line.split()[0]
+                triggers.append(
+                    f"CREATE TRIGGER {table}_touch_{column} AFTER UPDATE ON {table} "
+                    f"FOR EACH ROW WHEN NEW.{column} IS OLD.{column} BEGIN "
+                    f"UPDATE {table} SET {column} = datetime('now', 'localtime') WHERE rowid = NEW.rowid; END"
+                )
+                line = re.sub(r'\s+ON UPDATE CURRENT_TIMESTAMP', '', line)
+            line = re.sub(r'\s+NOT NULL', '', line)
+            line = line.replace('DEFAULT TRUE', 'DEFAULT 1').replace('DEFAULT FALSE', 'DEFAULT 0')
+            columns.append(line)
+        columns.extend(COMPAT_COLUMNS.get(table, []))
+        statements.append(f"CREATE TABLE {table} (\n    " + ',\n    '.join(columns) + "\n)")
+    return statements + triggers
+
+
+def translate_query(query):
+    """Rewrite one MySQL statement for SQLite"""
+    query = re.sub(r'%(%|s)', lambda m: '%' if m.group(1) == '%' else '?', query)
+    query = re.sub(r'\s+FOR UPDATE(\s+SKIP LOCKED)?', '', query)
+    query = re.sub(r'\bINSERT IGNORE\b', 'INSERT OR IGNORE', query)
+    query = _INTERVAL_DAYS.sub(lambda m: f"date(CURDATE(), '+' || {m.group(1)} || ' days')", query)
+    if _DUPLICATE_KEY.search(query):
+        head, tail = _DUPLICATE_KEY.split(query, 1)
+        query = head + 'ON CONFLICT DO UPDATE SET' + _VALUES_REF.sub(r'excluded.\1', tail)
+    return query
+
+
+def _date_format(value, fmt):
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(str(value))
+    return parsed.strftime(re.sub(r'%[a-zA-Z]', lambda m: _MYSQL_FORMAT.get(m.group(0), m.group(0)), fmt))
+
+
+def _hour(value):
+    text = str(value)
+    if len(text) > 8 and text[4] == '-':
+        return int(text[11:13])
+    return int(text.split(':')[0])
+
+
+def _datediff(a, b):
+    return (date.fromisoformat(str(a)[:10]) - date.fromisoformat(str(b)[:10])).days
+
+
+class FakeCursor:
+    def __init__(self, conn, dictionary=False):
+        self._conn = conn
+        self._cursor = conn._db.cursor()
+        self._dictionary = dictionary
+
+    def execute(self, query, params=()):
+        self._conn._begin()
+        try:
+            self._cursor.execute(translate_query(query), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise Error(msg=str(e))
+
+    def executemany(self, query, rows):
+        self._conn._begin()
+        try:
+            self._cursor.executemany(translate_query(query), [tuple(row) for row in rows])
+        except sqlite3.Error as e:
+            raise Error(msg=str(e))
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip([column[0] for column in self._cursor.description], row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class FakeConnection:
+    """One checked-out connection; holds the database lock from its first statement to commit/rollback"""
+
+    def __init__(self, server):
+        self._server = server
+        self._db = server._db
+        self._in_transaction = False
+
+    def _begin(self):
+        if not self._in_transaction:
+            started = time.perf_counter()
+            self._server._lock.acquire()
+            self._server._record_wait(time.perf_counter() - started)
+            self._in_transaction = True
+
+    def _end(self, commit):
+        if self._in_transaction:
+            try:
+                if commit:
+                    self._db.commit()
+                else:
+                    self._db.rollback()
+            finally:
+                self._in_transaction = False
+                self._server._lock.release()
+
+    def cursor(self, dictionary=False, **kwargs):
+        return FakeCursor(self, dictionary)
+
+    def commit(self):
+        self._end(True)
+
+    def rollback(self):
+        self._end(False)
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        # Like returning a MySQL connection to the pool: uncommitted work is dropped
+        self._end(False)
+        self._server._checked_in()
+
+
+class FakeMySQL:
+    """SQLite-backed stand-in exposing the ConnectionPool interface DatabaseHandler uses"""
+
+    def __init__(self, schema_sql, path=':memory:'):
+        self._db = sqlite3.connect(
+            path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False, isolation_level='DEFERRED'
+        )
+        self._db.create_function('CURDATE', 0, lambda: date.today().isoformat())
+        self._db.create_function('NOW', 0, lambda: datetime.now().isoformat(' '))
+        self._db.create_function('HOUR', 1, _hour)
+        self._db.create_function('DATEDIFF', 2, _datediff)
+        self._db.create_function('DATE_FORMAT', 2, _date_format)
+        for statement in translate_schema(schema_sql):
+            self._db.execute(statement)
+        self._db.commit()
+
+        self._lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        self._in_use = 0
+        self._checkouts = 0
+        self._lock_waits = 0.0
+
+    def _record_wait(self, seconds):
+        with self._stats_lock:
+            self._lock_waits += seconds
+
+    def _checked_in(self):
+        with self._stats_lock:
+            self._in_use -= 1
+
+    def get_connection(self):
+        with self._stats_lock:
+            self._in_use += 1
+            self._checkouts += 1
+        return FakeConnection(self)
+
+    def get_stats(self):
+        with self._stats_lock:
+            return {
+                'in_use': self._in_use,
+                'checkouts': self._checkouts,
+                'lock_wait_seconds': round(self._lock_waits, 3)
+            }
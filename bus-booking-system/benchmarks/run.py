@@ -0,0 +1,181 @@
+"""Run the load scenarios and write p50/p95/p99 and throughput to a JSON file
+
+    python -m benchmarks.run                          # in-process stand-in, default scale
+    python -m benchmarks.run --backend mysql --database bus_booking_bench
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+With ``--backend mysql`` the database must be freshly created from
+database/philippine_bus_routes.sql; the synthetic rows are added on top.
+Runs are seeded, so two runs of the same commit with the same options do
+the same work. ``--compare`` prints each metric next to the baseline's and
+exits with status 1 if a latency grew, or a throughput fell, by more than
+``--threshold``.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from config import Config
+from utils.database_handler import DatabaseHandler
+
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.seed import load_reference_data, seed_synthetic
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(ROOT, 'database', 'philippine_bus_routes.sql')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Metrics where a larger number is worse
+LATENCY_KEYS = ('p50_ms', 'p95_ms', 'p99_ms')
+THROUGHPUT_KEYS = ('ops_per_s', 'records_per_s')
+
+
+def build_handler(args):
+    """DatabaseHandler on the chosen backend, seeded and marked online"""
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        sql = f.read()
+
+    if args.backend == 'fake':
+        from benchmarks.fake_mysql import FakeMySQL
+
+        server = FakeMySQL(sql)
+        load_reference_data(server, sql)
+        handler = DatabaseHandler(start_monitor=False, pool=server)
+    else:
+        db_config = dict(Config.DB_CONFIG)
+        if args.database:
+            db_config['database'] = args.database
+        handler = DatabaseHandler(db_config, start_monitor=False)
+
+    # Background threads stay off so only the scenario's own work is measured,
+    # but the handler has to see the database as online
+    handler.monitor.start()
+    deadline = time.time() + 10
+    while not handler.check_connection():
+        if time.time() > deadline:
+            raise SystemExit(f"Database not reachable on the {args.backend} backend")
+        time.sleep(0.1)
+    return handler
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results, prefix=''):
+    """{'offline_replay': {'replay': {'p50_ms': 1}}} -> {'offline_replay.replay.p50_ms': 1}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current, baseline, threshold):
+    """Print metric changes against ``baseline``; return the names that regressed"""
+    now = flatten(current['scenarios'])
+    before = flatten(baseline['scenarios'])
+    regressions = []
+    for name in sorted(now):
+        metric = name.rsplit('.', 1)[-1]
+        if name not in before or metric not in LATENCY_KEYS + THROUGHPUT_KEYS or not before[name]:
+            continue
+        change = (now[name] - before[name]) / before[name]
+        worse = change > threshold if metric in LATENCY_KEYS else change < -threshold
+        print(f"  {name:45} {before[name]:>12} -> {now[name]:>12}  {change:+.1%}{'  REGRESSION' if worse else ''}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bus booking load benchmarks')
+    parser.add_argument('--backend', choices=['fake', 'mysql'], default='fake',
+                        help='in-process SQLite stand-in, or the MySQL server from Config.DB_CONFIG')
+    parser.add_argument('--database', help='MySQL database name (mysql backend)')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='run only these scenarios (repeatable)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--routes', type=int, default=40)
+    parser.add_argument('--days', type=int, default=14)
+    parser.add_argument('--bookings', type=int, default=3000, help='bookings seeded before the run')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--searches', type=int, default=2000)
+    parser.add_argument('--replay-records', type=int, default=1000)
+    parser.add_argument('--stats-seconds', type=float, default=5.0)
+    parser.add_argument('--output', help='results file (default benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative change (default 0.2)')
+    args = parser.parse_args()
+
+    handler = build_handler(args)
+    started = time.perf_counter()
+    seeded = seed_synthetic(
+        handler, users=args.users, routes=args.routes, days=args.days, bookings=args.bookings, seed=args.seed
+    )
+    print(f"Seeded {seeded['users']} users, {seeded['schedules']} schedules, {seeded['bookings']} bookings "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    options = {
+        'search_storm': {'threads': args.threads, 'requests': args.searches, 'seed': args.seed},
+        'booking_contention': {'threads': args.threads * 2, 'seed': args.seed},
+        'offline_replay': {'records': args.replay_records, 'seed': args.seed},
+        'admin_stats_load': {'readers': args.threads // 2 or 1, 'writers': args.threads // 2 or 1,
+                             'duration': args.stats_seconds, 'seed': args.seed}
+    }
+
+    results = {}
+    for name in args.scenario or list(SCENARIOS):
+        print(f"Running {name}...")
+        waited = handler.get_pool_stats().get('lock_wait_seconds')
+        results[name] = SCENARIOS[name](handler, seeded, **options[name])
+        if waited is not None:
+            # Time spent queueing for the stand-in's single transaction slot
+            results[name]['db_lock_wait_s'] = round(handler.get_pool_stats()['lock_wait_seconds'] - waited, 3)
+        print(json.dumps(results[name], indent=2))
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'backend': args.backend,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'seeded': {key: seeded[key] for key in ('users', 'routes', 'schedules', 'bookings')},
+        'scenarios': results
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    handler.close()
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.compare} (commit {baseline.get('commit')}):")
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
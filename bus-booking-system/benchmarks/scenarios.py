@@ -0,0 +1,247 @@
+"""Load scenarios; each returns a summary dict for the results file"""
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+
+from utils.offline_manager import OfflineManager
+from utils.sync_manager import SyncManager
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Thread-safe collector of per-operation latencies"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = []
+        self.errors = 0
+        self.started = None
+        self.finished = None
+
+    def time(self, func, *args):
+        started = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._latencies.append(elapsed)
+        return result
+
+    def error(self):
+        with self._lock:
+            self.errors += 1
+
+    def summary(self):
+        latencies = sorted(self._latencies)
+        duration = (self.finished or time.perf_counter()) - (self.started or 0)
+
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            'ops': len(latencies),
+            'errors': self.errors,
+            'duration_s': round(duration, 3),
+            'ops_per_s': round(len(latencies) / duration, 1) if duration > 0 else None,
+            'p50_ms': ms(percentile(latencies, 0.50)),
+            'p95_ms': ms(percentile(latencies, 0.95)),
+            'p99_ms': ms(percentile(latencies, 0.99)),
+            'max_ms': ms(latencies[-1] if latencies else None)
+        }
+
+
+def run_threads(threads, target):
+    """Run ``target(worker_number)`` on ``threads`` threads; wall time covers all of them"""
+    workers = [threading.Thread(target=target, args=(i,), daemon=True) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return started, time.perf_counter()
+
+
+# ----------------------------------------------------------------------
+# Scenarios
+# ----------------------------------------------------------------------
+def search_storm(handler, seeded, threads=8, requests=2000, seed=1):
+    """Many concurrent origin/destination/date searches over the seeded routes"""
+    pairs = seeded['route_pairs']
+    dates = [(date.today() + timedelta(days=day)).isoformat() for day in range(seeded['days'])]
+
+    # The first search loads the schedule index; keep that out of the numbers
+    handler.search_schedules(pairs[0][0], pairs[0][1], dates[0])
+
+    recorder = Recorder()
+    per_thread = requests // threads
+    found = [0] * threads
+
+    def worker(number):
+        rng = random.Random(seed + number)
+        for _ in range(per_thread):
+            origin, destination = rng.choice(pairs)
+            try:
+                results = recorder.time(handler.search_schedules, origin, destination, rng.choice(dates))
+            except Exception:
+                continue
+            found[number] += len(results)
+
+    recorder.started, recorder.finished = run_threads(threads, worker)
+    summary = recorder.summary()
+    summary['results_returned'] = sum(found)
+    return summary
+
+
+def booking_contention(handler, seeded, threads=16, seat_count=1, seed=2):
+    """Every thread books the same bus until it sells out
+
+    Reports the latency of each booking attempt and checks nothing was
+    oversold: seats booked plus seats left must equal the bus's capacity.
+    """
+    schedule_id = seeded['schedule_ids'][-1]
+    before = handler.get_schedule_details(schedule_id)
+    total_seats = before['total_seats']
+
+    recorder = Recorder()
+    counts = {'booked': 0, 'rejected': 0}
+    counts_lock = threading.Lock()
+    sold_out = threading.Event()
+
+    def worker(number):
+        rng = random.Random(seed + number)
+        while not sold_out.is_set():
+            try:
+                result = recorder.time(
+                    handler.create_booking, rng.choice(seeded['user_ids']), schedule_id,
+                    'Bench Passenger', 30, 'Other', seat_count, handler.generate_booking_ref()
+                )
+            except Exception:
+                continue
+            with counts_lock:
+                if result.get('success'):
+                    counts['booked'] += seat_count
+                else:
+                    counts['rejected'] += 1
+                    if 'Not enough seats' in result.get('message', ''):
+                        sold_out.set()
+                    else:
+                        recorder.error()
+
+    recorder.started, recorder.finished = run_threads(threads, worker)
+    after = handler.get_schedule_details(schedule_id)
+    booked_before = total_seats - before['available_seats']
+
+    summary = recorder.summary()
+    summary.update({
+        'schedule_id': schedule_id,
+        'seats_booked': counts['booked'],
+        'rejected': counts['rejected'],
+        'seats_left': after['available_seats'],
+        'oversold': booked_before + counts['booked'] + after['available_seats'] != total_seats
+    })
+    return summary
+
+
+def offline_replay(handler, seeded, records=1000, seed=3):
+    """Queue ``records`` bookings while offline, then time replaying them into the database
+
+    ``enqueue`` is the per-booking cost of saving offline; ``replay`` is one
+    sync_all_data() call, reported as bookings synced per second.
+    """
+    rng = random.Random(seed)
+    offline_dir = tempfile.mkdtemp(prefix='bench-offline-')
+    try:
+        offline_mgr = OfflineManager(offline_dir)
+        enqueue = Recorder()
+        enqueue.started = time.perf_counter()
+        for i in range(records):
+            seat_count = rng.randint(1, 2)
+            enqueue.time(offline_mgr.save_booking_offline, {
+                'offline_id': uuid.uuid4().hex,
+                'username': rng.choice(seeded['usernames']),
+                'schedule_id': rng.choice(seeded['schedule_ids']),
+                'passenger_name': f"Offline Passenger {i}",
+                'passenger_age': rng.randint(5, 80),
+                'passenger_gender': rng.choice(('Male', 'Female')),
+                'seat_count': seat_count,
+                'total_fare': 500.0 * seat_count,
+                'booking_reference': f"BKOFF{i:08d}{uuid.uuid4().hex[:4].upper()}"
+            })
+        enqueue.finished = time.perf_counter()
+
+        replay = Recorder()
+        replay.started = time.perf_counter()
+        results = replay.time(SyncManager(offline_dir).sync_all_data, handler, offline_mgr)
+        replay.finished = time.perf_counter()
+
+        replay_summary = replay.summary()
+        offline_mgr.journal.refresh(force=True)
+        replay_summary.update({
+            'bookings_synced': results['bookings_synced'],
+            'sync_errors': len(results['errors']),
+            'records_per_s': round(results['bookings_synced'] / replay_summary['duration_s'], 1)
+            if replay_summary['duration_s'] else None,
+            'left_pending': offline_mgr.get_pending_sync_count()
+        })
+        return {'enqueue': enqueue.summary(), 'replay': replay_summary}
+    finally:
+        shutil.rmtree(offline_dir, ignore_errors=True)
+
+
+def admin_stats_load(handler, seeded, readers=4, writers=4, duration=5.0, seed=4):
+    """Admin dashboard reads while bookings keep arriving
+
+    Readers call get_admin_stats() in a loop and writers book random seats
+    for ``duration`` seconds; both latencies are reported.
+    """
+    reads = Recorder()
+    writes = Recorder()
+    deadline = time.perf_counter() + duration
+
+    def worker(number):
+        rng = random.Random(seed + number)
+        while time.perf_counter() < deadline:
+            if number < readers:
+                try:
+                    reads.time(handler.get_admin_stats)
+                except Exception:
+                    pass
+            else:
+                try:
+                    result = writes.time(
+                        handler.create_booking, rng.choice(seeded['user_ids']),
+                        rng.choice(seeded['schedule_ids'][:-1]), 'Bench Passenger', 30, 'Other', 1,
+                        handler.generate_booking_ref()
+                    )
+                except Exception:
+                    continue
+                if not result.get('success'):
+                    writes.error()
+
+    started, finished = run_threads(readers + writers, worker)
+    reads.started = writes.started = started
+    reads.finished = writes.finished = finished
+    return {'reads': reads.summary(), 'writes': writes.summary()}
+
+
+SCENARIOS = {
+    'search_storm': search_storm,
+    'booking_contention': booking_contention,
+    'offline_replay': offline_replay,
+    'admin_stats_load': admin_stats_load
+}
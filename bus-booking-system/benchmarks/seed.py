@@ -0,0 +1,154 @@
+"""Seed a benchmark database: reference data from the SQL script plus synthetic volume"""
+import hashlib
+import random
+import re
+from datetime import date, datetime, timedelta
+
+from utils.seat_inventory import format_seats
+
+REFERENCE_TABLES = ('regions', 'provinces', 'cities_municipalities', 'barangays', 'users', 'bus_routes')
+OPERATORS = ('Victory Liner', 'Genesis', 'Five Star', 'Rural Transit', 'Bachelor Express', 'Ceres')
+BUS_TYPES = ('Regular', 'Aircon', 'Deluxe', 'Executive')
+FIRST_NAMES = ('Juan', 'Maria', 'Jose', 'Ana', 'Pedro', 'Rosa', 'Luis', 'Carmen', 'Miguel', 'Elena')
+LAST_NAMES = ('Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres', 'Flores', 'Ramos', 'Aquino')
+
+# Seeded accounts keep the legacy hash format so seeding thousands of users stays fast
+PASSWORD = 'password123'
+PASSWORD_HASH = hashlib.sha256(PASSWORD.encode()).hexdigest()
+
+
+def _insert_blocks(sql, table):
+    pattern = re.compile(r'INSERT INTO %s \(([^)]*)\) VALUES(.*?);\s*\n' % table, re.S)
+    for columns, values in pattern.findall(sql):
+        values = re.sub(r'--[^\n]*', '', values)
+        values = re.sub(r'\bTRUE\b', '1', values)
+        values = re.sub(r'\bFALSE\b', '0', values)
+        yield ' '.join(columns.split()), values
+
+
+def load_reference_data(server, sql):
+    """Regions, provinces, cities, barangays, users and routes from the SQL script (stand-in only)"""
+    db = server._db
+    for table in REFERENCE_TABLES:
+        for columns, values in _insert_blocks(sql, table):
+            db.execute(f"INSERT INTO {table} ({columns}) VALUES {values}")
+
+    # Fill the columns the application reads but the script doesn't define
+    db.execute("UPDATE users SET full_name = first_name || ' ' || last_name WHERE full_name IS NULL")
+    db.execute(
+        "UPDATE bus_routes SET "
+        "origin_city = (SELECT name FROM cities_municipalities WHERE city_muni_id = origin_city_muni_id), "
+        "destination_city = (SELECT name FROM cities_municipalities WHERE city_muni_id = destination_city_muni_id)"
+    )
+    db.commit()
+
+
+def seed_synthetic(handler, users=500, routes=40, days=14, departures=6, bookings=3000, seed=42):
+    """Add synthetic users, routes, schedules and bookings through ordinary MySQL-syntax statements
+
+    Returns a summary with the ids the scenarios pick from.
+    """
+    rng = random.Random(seed)
+    conn = handler.get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT city_muni_id, name FROM cities_municipalities WHERE is_major_transport_hub = 1")
+        hubs = cursor.fetchall()
+
+        cursor.executemany(
+            "INSERT INTO users (username, email, password_hash, full_name, city_muni_id, province_id, region_id) "
+            "VALUES (%s, %s, %s, %s, 1, 1, 1)",
+            [
+                (f"bench_user{i}", f"bench_user{i}@example.com", PASSWORD_HASH,
+                 f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}")
+                for i in range(users)
+            ]
+        )
+
+        route_rows = []
+        for i in range(routes):
+            origin, destination = rng.sample(hubs, 2)
+            route_rows.append((
+                f"BENCH{i:04d}", f"{origin['name']} to {destination['name']}",
+                origin['city_muni_id'], destination['city_muni_id'],
+                origin['name'], destination['name'], rng.randrange(300, 3000, 50)
+            ))
+        cursor.executemany(
+            "INSERT INTO bus_routes (route_code, route_name, origin_city_muni_id, destination_city_muni_id, "
+            "origin_city, destination_city, base_fare) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            route_rows
+        )
+
+        cursor.execute("SELECT route_id, base_fare FROM bus_routes")
+        all_routes = cursor.fetchall()
+        now = datetime.now().replace(microsecond=0)
+        schedule_rows = []
+        for route in all_routes:
+            for day in range(days):
+                travel_date = date.today() + timedelta(days=day)
+                for slot in range(departures):
+                    hour = 4 + slot * (18 // max(departures, 1))
+                    schedule_rows.append((
+                        route['route_id'], f"BUS-{route['route_id']}-{slot}",
+                        f"{hour:02d}:00:00", f"{(hour + 6) % 24:02d}:00:00", travel_date,
+                        45, 45, float(route['base_fare']), rng.choice(OPERATORS), rng.choice(BUS_TYPES),
+                        'Scheduled', now
+                    ))
+        cursor.executemany(
+            "INSERT INTO bus_schedules (route_id, bus_number, departure_time, arrival_time, travel_date, "
+            "total_seats, available_seats, fare, bus_operator, bus_type, status, updated_at) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            schedule_rows
+        )
+
+        cursor.execute("SELECT schedule_id, fare, total_seats FROM bus_schedules")
+        schedules = cursor.fetchall()
+        cursor.execute("SELECT user_id FROM users")
+        user_ids = [row['user_id'] for row in cursor.fetchall()]
+
+        # Bookings fill seats in order, leaving every schedule with some room
+        taken = {}
+        booking_rows = []
+        for i in range(bookings):
+            schedule = rng.choice(schedules)
+            start = taken.get(schedule['schedule_id'], 0)
+            seat_count = rng.randint(1, 3)
+            if start + seat_count > schedule['total_seats'] - 5:
+                continue
+            taken[schedule['schedule_id']] = start + seat_count
+            booking_rows.append((
+                rng.choice(user_ids), schedule['schedule_id'], f"BKSEED{i:08d}",
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", rng.randint(5, 80),
+                rng.choice(('Male', 'Female')), format_seats(range(start + 1, start + seat_count + 1)),
+                float(schedule['fare']) * seat_count,
+                now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+            ))
+        cursor.executemany(
+            "INSERT INTO bookings (user_id, schedule_id, booking_reference, passenger_name, passenger_age, "
+            "passenger_gender, seat_numbers, total_fare, booking_status, booking_date) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'Confirmed', %s)",
+            booking_rows
+        )
+        cursor.executemany(
+            "UPDATE bus_schedules SET available_seats = total_seats - %s WHERE schedule_id = %s",
+            [(count, schedule_id) for schedule_id, count in taken.items()]
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    # Counters and rollups start out matching the seeded rows
+    handler.admin_stats.reconcile(days=0)
+
+    return {
+        'users': len(user_ids),
+        'routes': len(all_routes),
+        'schedules': len(schedules),
+        'bookings': len(booking_rows),
+        'route_pairs': [(route[4], route[5]) for route in route_rows],
+        'usernames': [f"bench_user{i}" for i in range(users)],
+        'schedule_ids': [row['schedule_id'] for row in schedules],
+        'user_ids': user_ids,
+        'days': days
+    }
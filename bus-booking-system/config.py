@@ -1,17 +1,97 @@
-import os
-
-class Config:
-    SECRET_KEY = os.getenv('SECRET_KEY', 'bus-booking-school-project-2024')
-    SESSION_TYPE = 'filesystem'
-    
-    # Database configuration (XAMPP default)
-    DB_CONFIG = {
-        'host': 'localhost',
-        'user': 'root',
-        'password': '',
-        'database': 'bus_booking_system',
-        'port': 3306
-    }
-    
-    # Offline storage
-    OFFLINE_DATA_DIR = 'database/offline_data'
\ No newline at end of file
+import os
+
+class Config:
+    SECRET_KEY = os.getenv('SECRET_KEY', 'bus-booking-school-project-2024')
+    
+    # Server-side sessions (utils/session_store.py)
+    SESSION_BACKEND = 'sqlite'        # 'sqlite' (one file per host) or 'redis' (shared across hosts)
+    SESSION_SQLITE_PATH = 'database/sessions.db'
+    SESSION_REDIS_URL = os.getenv('SESSION_REDIS_URL', 'redis://localhost:6379/0')
+    SESSION_TTL = 86400               # seconds an untouched session lives
+    SESSION_CACHE_SIZE = 1024         # sessions kept in the in-process LRU tier
+    SESSION_LOCAL_TTL = 5             # seconds a cached session is trusted before re-reading the backend
+    SESSION_SWEEP_INTERVAL = 300      # seconds between expired-session sweeps
+    
+    # Password hashing (utils/credentials.py); tune with: python -m utils.credentials calibrate
+    PASSWORD_HASH_ALGORITHM = 'scrypt'  # 'scrypt' or 'pbkdf2_sha256'
+    PASSWORD_SCRYPT_N = 2 ** 14         # scrypt cost (16 MiB per hash with r=8)
+    PASSWORD_SCRYPT_R = 8
+    PASSWORD_SCRYPT_P = 1
+    PASSWORD_PBKDF2_ITERATIONS = 600000
+    PASSWORD_HASH_WORKERS = 4           # hashes computed at once
+    PASSWORD_HASH_MAX_WAITING = 32      # further hashes allowed to queue before logins are turned away
+    
+    # Database configuration (XAMPP default)
+    DB_CONFIG = {
+        'host': 'localhost',
+        'user': 'root',
+        'password': '',
+        'database': 'bus_booking_system',
+        'port': 3306,
+        'charset': 'utf8mb4',
+
+        # Connection pool settings
+        'pool_size': 10,            # max open connections per process
+        'pool_timeout': 5,          # seconds to wait for a free connection
+        'pool_recycle': 1800,       # reopen connections older than this (seconds)
+        'pool_validate_after': 30   # ping idle connections unused for this long (seconds)
+    }
+    
+    # Read replicas: each entry overrides DB_CONFIG, e.g. {'host': 'replica1', 'name': 'replica1'}
+    DB_REPLICAS = []
+    REPLICA_MAX_LAG = 5               # seconds behind the primary before a replica is ejected
+    REPLICA_LAG_CHECK_INTERVAL = 5    # seconds between lag checks
+    READ_YOUR_WRITES_WINDOW = 10      # seconds a user's reads stay on the primary after they write; > REPLICA_MAX_LAG
+    
+    # Background database health probe (seconds)
+    HEALTH_CHECK_INTERVAL = 10
+    HEALTH_CHECK_MAX_BACKOFF = 120
+    HEALTH_CHECK_TIMEOUT = 3
+    
+    # Status pushed to open pages over server-sent events
+    STATUS_SAMPLE_INTERVAL = 5        # seconds between reads of the pending offline count
+    STATUS_STREAM_MAX_SECONDS = 300   # streams end after this long and the browser reconnects
+    STATUS_MAX_SUBSCRIBERS = 500      # open streams per process; beyond this pages poll instead
+    
+    # In-process schedule search index
+    SCHEDULE_INDEX_TTL = 300          # full reload interval (seconds)
+    SCHEDULE_INDEX_POLL_INTERVAL = 2  # seconds between checks for schedules other worker processes changed;
+                                      # bounds how stale their seat counts can be (this process's own never are)
+    SCHEDULE_INDEX_POLL_OVERLAP = 10  # re-read changes this many seconds before the newest updated_at seen
+    SCHEDULE_INDEX_WINDOW_DAYS = 30   # travel dates served from the index
+    
+    # Async read path (utils/async_data_access.py)
+    ASYNC_DB_WORKERS = 10             # threads running blocking MySQL/file calls; match pool_size
+    ASYNC_MAX_IN_FLIGHT = 5000        # queued blocking calls before requests get 503
+    
+    # Search/schedule response cache with ETags (utils/response_cache.py)
+    RESPONSE_CACHE_SIZE = 2000        # cached searches and schedule details
+    RESPONSE_CACHE_TTL = 60           # seconds before an entry is rebuilt (bounds changes made by other processes)
+    RESPONSE_CACHE_MAX_AGE = 5        # Cache-Control max-age sent to browsers (seconds)
+    
+    # Seat inventory (seconds)
+    SEAT_HOLD_TTL = 300               # how long seats stay held while the booking form is open
+    SEAT_HOLD_SWEEP_INTERVAL = 30     # how often expired holds are released
+    SEAT_MAP_TTL = 30                 # in-memory seat maps are reloaded after this long
+    
+    # Admin panel statistics
+    STATS_COUNTER_SLOTS = 8           # rows each counter is spread over to avoid a hot row
+    STATS_CACHE_TTL = 5               # seconds the panel totals are served from memory
+    STATS_RECONCILE_INTERVAL = 3600   # seconds between recounts from the base tables
+    ANALYTICS_FLUSH_INTERVAL = 30     # seconds new bookings are buffered before the analytics buckets are updated
+    
+    # Offline storage
+    OFFLINE_DATA_DIR = 'database/offline_data'
+    OFFLINE_JOURNAL_SEGMENT_BYTES = 4 * 1024 * 1024  # rotate journal segments at this size
+    OFFLINE_JOURNAL_FSYNC = True                      # fsync every journal append
+    OFFLINE_CACHE_FORMAT = 'columnar'  # 'columnar' (cache.bin) or 'json' (cache.json)
+    CACHE_DELTA_OVERLAP = 60           # re-read changes this many seconds before the high-water mark
+    CACHE_DELTA_MAX_ROWS = 5000        # changed rows appended to the offline cache before it is rewritten
+    SYNC_BATCH_SIZE = 200              # offline records replayed per transaction
+    SYNC_WORKERS = 1                   # parallel booking sync workers per process
+    SYNC_LEASE_TTL = 300               # seconds before a crashed worker's queue lease can be taken over
+    
+    # Metrics (utils/metrics.py), served as Prometheus text on /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '0') == '1'   # off unless METRICS_ENABLED=1
+    SLOW_QUERY_MS = 200               # statements slower than this are logged with their parameters
+    SLOW_QUERY_LOG_SIZE = 100         # recent slow statements kept for get_slow_queries()
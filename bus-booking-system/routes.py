@@ -0,0 +1,154 @@
+from flask import Response, jsonify, redirect, render_template, request, session, stream_with_context, url_for
+
+from config import Config
+from utils.booking_history import BookingHistory
+from utils.metrics import CONTENT_TYPE, get_metrics
+from utils.place_index import PlaceIndex
+from utils.status_broadcaster import SSE_HEADERS, StatusBroadcaster
+from utils.sync_worker import SyncWorker
+
+
+def init_app(app, db_handler, offline_mgr, sync_manager):
+    """Register the status, sync, autocomplete, metrics and My Bookings routes on ``app``
+
+    Builds the background services behind them (status broadcaster, sync
+    worker, place index), hooks them to the database health monitor and
+    starts them; they are returned so the app can stop them on shutdown.
+    The routes are added to the app itself rather than a blueprint so
+    the endpoint names stay the ones templates pass to url_for().
+    """
+    monitor = db_handler.monitor
+    metrics = get_metrics()
+
+    broadcaster = StatusBroadcaster(
+        pending_count=offline_mgr.get_pending_sync_count,
+        sample_interval=Config.STATUS_SAMPLE_INTERVAL,
+        max_stream_seconds=Config.STATUS_STREAM_MAX_SECONDS,
+        max_subscribers=Config.STATUS_MAX_SUBSCRIBERS
+    )
+    broadcaster.watch(monitor)
+    broadcaster.start()
+
+    sync_worker = SyncWorker(sync_manager, db_handler, offline_mgr, broadcaster=broadcaster)
+    sync_worker.watch(monitor)
+
+    place_index = PlaceIndex()
+    place_index.load(db_handler, offline_mgr)
+    place_index.watch(monitor, db_handler, offline_mgr)
+
+    history = BookingHistory(db_handler, offline_mgr)
+
+    # ------------------------------------------------------------------
+    # Connection and sync status
+    # ------------------------------------------------------------------
+    def status_stream():
+        """Server-sent status events; 503 tells the page to poll instead"""
+        if not broadcaster.subscribe():
+            return Response('Too many status streams', status=503)
+        last_event_id = request.headers.get('Last-Event-ID')
+        return Response(
+            stream_with_context(broadcaster.stream(last_event_id, subscribed=True)),
+            mimetype='text/event-stream',
+            headers=SSE_HEADERS
+        )
+
+    def check_connection():
+        """Current status as JSON; with ``?since=<version>`` waits (long-poll) until it changes"""
+        since = request.args.get('since', type=int)
+        if since is None:
+            version, state = broadcaster.snapshot()
+        else:
+            version, state = broadcaster.wait_for_change(since)
+        return jsonify(dict(state, version=version))
+
+    # ------------------------------------------------------------------
+    # Background sync jobs
+    # ------------------------------------------------------------------
+    def sync_offline_data():
+        """Queue a sync job (or join the running one); the page polls /sync-status/<job_id>"""
+        if 'username' not in session:
+            return jsonify({'success': False, 'message': 'Please log in first'}), 401
+        return jsonify(sync_worker.submit('manual')), 202
+
+    def sync_data():
+        """Sync button on the home page (a link) and the admin panel (a POST)"""
+        if 'username' not in session:
+            if request.method == 'GET':
+                return redirect(url_for('login'))
+            return jsonify({'success': False, 'message': 'Please log in first'}), 401
+        job = sync_worker.submit('admin' if session.get('is_admin') else 'manual')
+        if request.method == 'GET':
+            # Followed as a link: the status stream shows the job's progress
+            return redirect(request.referrer or url_for('index'))
+        return jsonify(job), 202
+
+    def sync_status(job_id):
+        job = sync_worker.get_job(job_id)
+        if job is None:
+            return jsonify({'success': False, 'message': 'Unknown sync job'}), 404
+        return jsonify(job)
+
+    # ------------------------------------------------------------------
+    # Autocomplete and metrics
+    # ------------------------------------------------------------------
+    def autocomplete():
+        """Places starting with ``?q=`` for the origin/destination datalists"""
+        limit = min(request.args.get('limit', 10, type=int), 50)
+        return jsonify(place_index.search(request.args.get('q', ''), limit))
+
+    def metrics_page():
+        if not metrics.enabled:
+            return Response('Metrics are disabled', status=404)
+        return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+    # ------------------------------------------------------------------
+    # My Bookings
+    # ------------------------------------------------------------------
+    def _booking_filters():
+        return request.args.get('status') or None, request.args.get('upcoming') == '1'
+
+    def my_bookings():
+        """One page of the user's bookings; "Older bookings" links carry the next cursor"""
+        if 'username' not in session:
+            return redirect(url_for('login'))
+        status, upcoming_only = _booking_filters()
+        page = history.get_page(
+            session.get('user_id'), session['username'], request.args.get('cursor'),
+            status=status, upcoming_only=upcoming_only
+        )
+        return render_template(
+            'my_bookings.html',
+            bookings=page['bookings'],
+            next_cursor=page['next_cursor'],
+            status_filter=status,
+            upcoming_only=upcoming_only
+        )
+
+    def export_bookings():
+        """All of the user's matching bookings as a streamed JSON download"""
+        if 'username' not in session:
+            return redirect(url_for('login'))
+        status, upcoming_only = _booking_filters()
+        return Response(
+            stream_with_context(history.stream_json(session.get('user_id'), session['username'], status, upcoming_only)),
+            mimetype='application/json',
+            headers={'Content-Disposition': 'attachment; filename=my_bookings.json'}
+        )
+
+    app.add_url_rule('/status/stream', 'status_stream', status_stream)
+    app.add_url_rule('/check-connection', 'check_connection', check_connection)
+    app.add_url_rule('/check_connection', 'check_connection_legacy', check_connection)
+    app.add_url_rule('/sync_offline_data', 'sync_offline_data', sync_offline_data, methods=['GET', 'POST'])
+    app.add_url_rule('/sync-data', 'sync_data', sync_data, methods=['GET', 'POST'])
+    app.add_url_rule('/sync-status/<job_id>', 'sync_status', sync_status)
+    app.add_url_rule('/autocomplete', 'autocomplete', autocomplete)
+    app.add_url_rule('/metrics', 'metrics', metrics_page)
+    app.add_url_rule('/my-bookings', 'my_bookings', my_bookings)
+    app.add_url_rule('/my-bookings/export', 'export_bookings', export_bookings)
+
+    return {
+        'broadcaster': broadcaster,
+        'sync_worker': sync_worker,
+        'place_index': place_index,
+        'booking_history': history
+    }
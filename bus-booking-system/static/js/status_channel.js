@@ -0,0 +1,80 @@
+// Shared connection/sync status for every open page.
+// The server pushes changes over one server-sent event stream; pages only
+// poll if the stream can't be used (no EventSource, refused, or failing).
+window.StatusChannel = (function() {
+    const STREAM_URL = '/status/stream';
+    const POLL_URL = '/check-connection';
+    const POLL_INTERVAL = 30000;
+    const MAX_STREAM_ERRORS = 3;
+
+    const listeners = [];
+    let lastStatus = null;
+    let source = null;
+    let pollTimer = null;
+    let streamErrors = 0;
+
+    function notify(status) {
+        lastStatus = status;
+        listeners.forEach(listener => listener(status));
+    }
+
+    function refresh() {
+        return fetch(POLL_URL)
+            .then(response => response.json())
+            .then(status => {
+                notify(status);
+                return status;
+            })
+            .catch(() => {
+                // If fetch fails, we're offline
+                const status = Object.assign({}, lastStatus, { online: false });
+                notify(status);
+                return status;
+            });
+    }
+
+    function startPolling() {
+        if (pollTimer) {
+            return;
+        }
+        refresh();
+        pollTimer = setInterval(refresh, POLL_INTERVAL);
+    }
+
+    function startStream() {
+        if (!window.EventSource) {
+            startPolling();
+            return;
+        }
+
+        source = new EventSource(STREAM_URL);
+        source.onopen = function() {
+            streamErrors = 0;
+        };
+        source.addEventListener('status', function(e) {
+            notify(JSON.parse(e.data));
+        });
+        source.onerror = function() {
+            // EventSource reconnects by itself (the server ends streams every few
+            // minutes); give up only when refused outright or failing repeatedly
+            streamErrors += 1;
+            if (source.readyState === EventSource.CLOSED || streamErrors >= MAX_STREAM_ERRORS) {
+                source.close();
+                source = null;
+                startPolling();
+            }
+        };
+    }
+
+    function subscribe(listener) {
+        listeners.push(listener);
+        if (lastStatus) {
+            listener(lastStatus);
+        }
+        if (!source && !pollTimer) {
+            startStream();
+        }
+    }
+
+    return { subscribe: subscribe, refresh: refresh };
+})();
@@ -0,0 +1,50 @@
+"""Shared fixtures: a DatabaseHandler on the in-memory fake MySQL backend
+
+mysql.connector has to be importable (DatabaseHandler catches its Error
+class), but no MySQL server is needed.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.run import build_handler  # noqa: E402
+from benchmarks.seed import seed_synthetic  # noqa: E402
+
+
+class FakeBackend:
+    backend = 'fake'
+    database = None
+
+
+@pytest.fixture
+def db_handler():
+    handler = build_handler(FakeBackend)
+    yield handler
+    handler.close()
+
+
+@pytest.fixture
+def seeded(db_handler):
+    return seed_synthetic(db_handler, users=5, routes=3, days=2, bookings=10, seed=1)
+
+
+@pytest.fixture
+def offline_dir(tmp_path):
+    return str(tmp_path / 'offline_data')
+
+
+def query(db_handler, sql, params=()):
+    """Rows of ``sql`` as dicts, straight from the database"""
+    conn = db_handler.get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
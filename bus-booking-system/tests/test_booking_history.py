@@ -0,0 +1,107 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.seed import seed_synthetic
+from conftest import query
+from utils.booking_history import BookingHistory, booking_key
+from utils.offline_manager import OfflineManager
+
+
+@pytest.fixture
+def seeded(db_handler):
+    # Few users with many bookings, so a user's history spans several pages
+    return seed_synthetic(db_handler, users=2, routes=3, days=2, bookings=40, seed=1)
+
+
+@pytest.fixture
+def offline_mgr(offline_dir):
+    manager = OfflineManager(offline_dir)
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def history(db_handler, offline_mgr):
+    return BookingHistory(db_handler, offline_mgr)
+
+
+@pytest.fixture
+def user(db_handler, seeded):
+    """The seeded user with the most bookings"""
+    rows = query(
+        db_handler,
+        "SELECT u.user_id, u.username, COUNT(*) AS bookings FROM bookings b "
+        "JOIN users u ON b.user_id = u.user_id GROUP BY u.user_id, u.username ORDER BY bookings DESC"
+    )
+    return rows[0]
+
+
+def all_pages(history, user, limit, **filters):
+    bookings, cursor = [], None
+    while True:
+        page = history.get_page(user['user_id'], user['username'], cursor, limit, **filters)
+        assert len(page['bookings']) <= limit
+        bookings.extend(page['bookings'])
+        cursor = page['next_cursor']
+        if not cursor:
+            return bookings
+
+
+def save_offline(offline_mgr, user, offline_id, booking_date):
+    offline_mgr.save_booking_offline({
+        'offline_id': offline_id,
+        'username': user['username'],
+        'booking_reference': f'BKOFF{offline_id}',
+        'passenger_name': 'Offline Passenger',
+        'booking_date': booking_date.isoformat()
+    })
+
+
+def test_pages_cover_every_booking_once_newest_first(history, user):
+    bookings = all_pages(history, user, limit=2)
+    ids = [booking['booking_id'] for booking in bookings]
+    assert len(ids) == user['bookings']
+    assert len(set(ids)) == len(ids)
+    assert bookings == sorted(bookings, key=booking_key, reverse=True)
+
+
+@pytest.mark.parametrize('cursor', ['not a cursor!!', 'WzEsMl0=', ''])
+def test_unreadable_cursor_gives_first_page(history, user, cursor):
+    first = history.get_page(user['user_id'], user['username'], None, 2)
+    assert history.get_page(user['user_id'], user['username'], cursor, 2) == first
+
+
+def test_status_filter(db_handler, history, offline_mgr, user):
+    cancelled = query(db_handler, "SELECT booking_id FROM bookings WHERE user_id = %s LIMIT 1", (user['user_id'],))[0]
+    conn = db_handler.get_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE bookings SET booking_status = 'Cancelled' WHERE booking_id = %s", (cancelled['booking_id'],))
+    conn.commit()
+    cursor.close()
+    conn.close()
+    save_offline(offline_mgr, user, 'pending', datetime.now())
+
+    assert [b['booking_id'] for b in all_pages(history, user, 2, status='Cancelled')] == [cancelled['booking_id']]
+    assert [b['offline_id'] for b in all_pages(history, user, 2, status='Pending Sync')] == ['pending']
+    assert len(all_pages(history, user, 2, status='Confirmed')) == user['bookings'] - 1
+
+
+def test_offline_bookings_are_merged_in_date_order(history, offline_mgr, user):
+    online = all_pages(history, user, limit=100)
+    middle = datetime.fromisoformat(online[len(online) // 2]['booking_date']) - timedelta(seconds=1)
+    save_offline(offline_mgr, user, 'newest', datetime.now() + timedelta(minutes=1))
+    save_offline(offline_mgr, user, 'middle', middle)
+
+    bookings = all_pages(history, user, limit=2)
+    assert len(bookings) == len(online) + 2
+    assert bookings[0]['offline_id'] == 'newest'
+    assert bookings == sorted(bookings, key=booking_key, reverse=True)
+    assert sum(1 for booking in bookings if booking.get('offline_id') == 'middle') == 1
+
+
+def test_stream_json_exports_everything(history, offline_mgr, user):
+    save_offline(offline_mgr, user, 'export', datetime.now())
+    exported = json.loads(''.join(history.stream_json(user['user_id'], user['username'], batch_size=3)))
+    assert len(exported) == user['bookings'] + 1
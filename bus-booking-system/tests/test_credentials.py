@@ -0,0 +1,119 @@
+import hashlib
+
+import pytest
+
+from conftest import query
+from utils import credentials
+from utils.credentials import HasherBusy, PasswordHasher, is_legacy_hash
+from utils.offline_manager import OfflineManager
+from utils.sync_manager import SyncManager
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    """A cheap hasher installed as the process-wide one"""
+    cheap = PasswordHasher(scrypt_n=2 ** 10, workers=2, max_waiting=2)
+    monkeypatch.setattr(credentials, '_default', cheap)
+    return cheap
+
+
+def add_user(db_handler, username, password_hash):
+    conn = db_handler.get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO users (username, email, password_hash, full_name) VALUES (%s, %s, %s, %s)",
+        (username, f'{username}@example.com', password_hash, 'Test User')
+    )
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def stored_hash(db_handler, username):
+    return query(db_handler, "SELECT password_hash FROM users WHERE username = %s", (username,))[0]['password_hash']
+
+
+@pytest.mark.parametrize('algorithm', ['scrypt', 'pbkdf2_sha256'])
+def test_hash_and_verify(algorithm):
+    hasher = PasswordHasher(algorithm=algorithm, scrypt_n=2 ** 10, pbkdf2_iterations=1000)
+    encoded = hasher.hash('secret')
+    assert encoded.startswith(algorithm + '$')
+    assert encoded != hasher.hash('secret')
+    assert hasher.verify('secret', encoded)
+    assert not hasher.verify('wrong', encoded)
+    assert not hasher.needs_rehash(encoded)
+
+
+def test_legacy_and_outdated_hashes_need_rehash(hasher):
+    legacy = hashlib.sha256(b'secret').hexdigest()
+    assert is_legacy_hash(legacy)
+    assert hasher.verify('secret', legacy)
+    assert hasher.needs_rehash(legacy)
+    assert hasher.needs_rehash(PasswordHasher(scrypt_n=2 ** 11).hash('secret'))
+    assert not hasher.verify('secret', 'scrypt$garbage')
+
+
+def test_full_hasher_raises_busy():
+    hasher = PasswordHasher(scrypt_n=2 ** 10, workers=1, max_waiting=0, wait_timeout=0.01)
+    hasher._slots.acquire()
+    with pytest.raises(HasherBusy):
+        hasher.hash('secret')
+
+
+def test_register_then_login(db_handler, hasher):
+    assert db_handler.register_user('newuser', 'new@example.com', 'secret', 'New User')
+    assert stored_hash(db_handler, 'newuser').startswith('scrypt$')
+    assert db_handler.authenticate_user('newuser', 'secret')['username'] == 'newuser'
+    assert db_handler.authenticate_user('newuser', 'wrong') is None
+
+
+def test_login_upgrades_legacy_hash(db_handler, hasher):
+    add_user(db_handler, 'legacy', hashlib.sha256(b'secret').hexdigest())
+    assert db_handler.authenticate_user('legacy', 'secret')
+
+    upgraded = stored_hash(db_handler, 'legacy')
+    assert upgraded.startswith('scrypt$')
+    assert db_handler.authenticate_user('legacy', 'secret')
+    assert db_handler.authenticate_user('legacy', 'wrong') is None
+
+
+def test_busy_hasher_does_not_block_login(db_handler, hasher, monkeypatch):
+    legacy = hashlib.sha256(b'secret').hexdigest()
+    add_user(db_handler, 'legacy', legacy)
+
+    def busy(password):
+        raise HasherBusy('overloaded')
+    monkeypatch.setattr(hasher, 'hash', busy)
+
+    assert db_handler.authenticate_user('legacy', 'secret')['username'] == 'legacy'
+    assert stored_hash(db_handler, 'legacy') == legacy
+
+
+def test_bulk_user_sync_skips_only_the_busy_record(db_handler, hasher, offline_dir, monkeypatch):
+    offline_mgr = OfflineManager(offline_dir)
+    for i in range(4):
+        offline_mgr.journal.append('users', f'u{i}', {
+            'username': f'offline{i}', 'email': f'offline{i}@example.com', 'full_name': 'Offline User', 'password': 'secret'
+        })
+    sync_manager = SyncManager(offline_dir)
+
+    calls = []
+    real_hash = sync_manager.hash_password
+
+    def flaky(password):
+        calls.append(password)
+        if len(calls) == 2:
+            raise HasherBusy('overloaded')
+        return real_hash(password)
+    monkeypatch.setattr(sync_manager, 'hash_password', flaky)
+
+    first = sync_manager.bulk_sync_offline_users(db_handler, batch_size=2)
+    assert first['users_synced'] == 3
+    assert len(first['user_errors']) == 1
+    assert offline_mgr.journal.pending_count('users') == 1
+
+    second = sync_manager.bulk_sync_offline_users(db_handler)
+    assert second['users_synced'] == 1
+    assert offline_mgr.journal.pending_count('users') == 0
+    assert db_handler.authenticate_user('offline1', 'secret')
+    offline_mgr.close()
@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import random
+import time
+
+from utils.offline_journal import OfflineJournal
+
+
+def make_journal(path, **kwargs):
+    kwargs.setdefault('fsync', False)
+    return OfflineJournal(str(path), **kwargs)
+
+
+def test_append_ack_pending(tmp_path):
+    journal = make_journal(tmp_path)
+    journal.append('bookings', 'a', {'n': 1})
+    journal.append('bookings', 'b', {'n': 2})
+    journal.append('users', 'u', {'username': 'x'})
+    journal.ack('bookings', 'a')
+
+    assert journal.get('bookings', 'b') == {'n': 2}
+    assert journal.get('bookings', 'a') is None
+    assert journal.pending_count('bookings') == 1
+    assert journal.pending_count() == 2
+    journal.close()
+
+    # A fresh reader replays the same state from disk
+    reopened = make_journal(tmp_path)
+    assert reopened.pending_count('bookings') == 1
+    assert reopened.get('users', 'u') == {'username': 'x'}
+
+
+def test_compact_keeps_pending_entries(tmp_path):
+    journal = make_journal(tmp_path, segment_bytes=256)
+    for i in range(50):
+        journal.append('bookings', f'b{i}', {'n': i})
+    for i in range(0, 50, 2):
+        journal.ack('bookings', f'b{i}')
+
+    assert journal.compact() > 0
+    assert journal.pending_count('bookings') == 25
+
+    reopened = make_journal(tmp_path)
+    pending = {entry_id for entry_id, _ in reopened.pending('bookings')}
+    assert pending == {f'b{i}' for i in range(1, 50, 2)}
+
+
+def test_torn_tail_is_skipped(tmp_path):
+    journal = make_journal(tmp_path)
+    journal.append('bookings', 'a', {'n': 1})
+    journal.close()
+
+    # A crash mid-write leaves half a record at the end of the segment
+    segment = sorted(name for name in os.listdir(tmp_path) if name.startswith('segment-'))[-1]
+    with open(tmp_path / segment, 'ab') as f:
+        f.write(b'\x00\x01half a record')
+
+    reopened = make_journal(tmp_path)
+    reopened.append('bookings', 'b', {'n': 2})
+    reopened.close()
+
+    assert {entry_id for entry_id, _ in make_journal(tmp_path).pending('bookings')} == {'a', 'b'}
+
+
+def _slowed(func, delay, only=None):
+    """Widen the race window so a lost append shows up reliably"""
+    def wrapper(target, *args):
+        if only is None or only in str(target):
+            time.sleep(random.random() * delay)
+        return func(target, *args)
+    return wrapper
+
+
+def _append_many(journal_dir, writer, count):
+    os.write = _slowed(os.write, 0.004)
+    journal = OfflineJournal(journal_dir, segment_bytes=2048, fsync=False)
+    for i in range(count):
+        journal.append('bookings', f'{writer}-{i}', {'n': i})
+    journal.close()
+
+
+def _compact_until(journal_dir, stop):
+    os.remove = _slowed(os.remove, 0.01, only='segment-')
+    journal = OfflineJournal(journal_dir, segment_bytes=2048, fsync=False)
+    while not stop.is_set():
+        journal.compact()
+    journal.close()
+
+
+def test_compaction_does_not_lose_appends_from_other_processes(tmp_path):
+    journal_dir = str(tmp_path)
+    stop = multiprocessing.Event()
+    compactor = multiprocessing.Process(target=_compact_until, args=(journal_dir, stop))
+    compactor.start()
+    writers = [multiprocessing.Process(target=_append_many, args=(journal_dir, w, 200)) for w in range(4)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    stop.set()
+    compactor.join()
+
+    assert all(writer.exitcode == 0 for writer in writers)
+    assert make_journal(tmp_path).pending_count('bookings') == 800
@@ -0,0 +1,89 @@
+import pytest
+
+from conftest import query
+from utils.response_cache import ResponseCache, schedule_key
+
+
+@pytest.fixture
+def trip(db_handler, seeded):
+    """Origin, destination and date of a seeded schedule, plus its id"""
+    return query(
+        db_handler,
+        "SELECT s.schedule_id, r.origin_city, r.destination_city, s.travel_date FROM bus_schedules s "
+        "JOIN bus_routes r ON s.route_id = r.route_id WHERE s.schedule_id = %s",
+        (seeded['schedule_ids'][0],)
+    )[0]
+
+
+def search(db_handler, trip, origin=None):
+    return db_handler.get_search_response(origin or trip['origin_city'], trip['destination_city'], trip['travel_date'])
+
+
+def book(db_handler, seeded, schedule_id):
+    result = db_handler.create_booking(
+        seeded['user_ids'][0], schedule_id, 'Cache Passenger', 30, 'Other', 1, db_handler.generate_booking_ref()
+    )
+    assert result['success']
+
+
+def test_etag_is_stable_for_an_unchanged_result(db_handler, trip):
+    first = search(db_handler, trip)
+    assert any(row['schedule_id'] == trip['schedule_id'] for row in first['data'])
+
+    assert search(db_handler, trip)['etag'] == first['etag']
+    # Another spelling of the same query shares the entry
+    assert search(db_handler, trip, origin=f"  {trip['origin_city'].upper()} ")['etag'] == first['etag']
+    assert db_handler.response_cache.get_stats()['hits'] >= 2
+
+
+def test_matching_if_none_match_gets_304(db_handler, trip):
+    cache = db_handler.response_cache
+    entry = search(db_handler, trip)
+
+    status, body, headers = cache.respond(entry)
+    assert status == 200 and body and headers['ETag'] == entry['etag']
+
+    for if_none_match in (entry['etag'], f"W/{entry['etag']}", f'"stale", {entry["etag"]}'):
+        status, body, headers = cache.respond(entry, if_none_match)
+        assert (status, body) == (304, b'')
+        assert headers['ETag'] == entry['etag']
+
+    assert cache.respond(entry, '"stale"')[0] == 200
+
+
+def test_booking_invalidates_entries_for_its_schedule(db_handler, seeded, trip):
+    schedule_id = trip['schedule_id']
+    other_id = next(i for i in seeded['schedule_ids'] if i != schedule_id)
+    search_entry = search(db_handler, trip)
+    schedule_entry = db_handler.get_schedule_response(schedule_id)
+    other_entry = db_handler.get_schedule_response(other_id)
+
+    book(db_handler, seeded, schedule_id)
+
+    cache = db_handler.response_cache
+    assert cache.get(schedule_key(schedule_id)) is None
+    assert cache.get(schedule_key(other_id)) is other_entry
+
+    fresh = db_handler.get_schedule_response(schedule_id)
+    assert fresh['etag'] != schedule_entry['etag']
+    assert fresh['data']['available_seats'] == schedule_entry['data']['available_seats'] - 1
+    assert search(db_handler, trip)['etag'] != search_entry['etag']
+    assert cache.respond(fresh, schedule_entry['etag'])[0] == 200
+
+
+def test_result_read_before_an_invalidation_is_not_cached():
+    cache = ResponseCache()
+    since = cache.generation()
+    cache.invalidate_schedules([7])
+    cache.put(schedule_key(7), {'schedule_id': 7, 'available_seats': 3}, since)
+    assert cache.get(schedule_key(7)) is None
+
+    cache.put(schedule_key(7), {'schedule_id': 7, 'available_seats': 2}, cache.generation())
+    assert cache.get(schedule_key(7))['data']['available_seats'] == 2
+
+
+def test_empty_results_are_not_cached():
+    cache = ResponseCache()
+    entry = cache.put(('search', 'nowhere', 'elsewhere', '2026-01-01'), [])
+    assert entry['etag']
+    assert cache.get(entry['key']) is None
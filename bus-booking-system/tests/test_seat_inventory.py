@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from conftest import query
+
+
+def seat_statuses(db_handler, schedule_id):
+    rows = query(db_handler, "SELECT seat_number, status FROM schedule_seats WHERE schedule_id = %s", (schedule_id,))
+    return {row['seat_number']: row['status'] for row in rows}
+
+
+def test_hold_and_release(db_handler, seeded):
+    schedule_id = seeded['schedule_ids'][0]
+    hold = db_handler.hold_seats(schedule_id, 2)
+    assert hold['success']
+    assert len(hold['seats']) == 2
+
+    statuses = seat_statuses(db_handler, schedule_id)
+    assert all(statuses[seat] == 'Held' for seat in hold['seats'])
+    seat_map = {seat['seat_number']: seat['status'] for seat in db_handler.get_seat_map(schedule_id)['seats']}
+    assert all(seat_map[seat] == 'Held' for seat in hold['seats'])
+
+    assert db_handler.seat_inventory.release_hold(hold['hold_token'])
+    statuses = seat_statuses(db_handler, schedule_id)
+    assert all(statuses[seat] == 'Available' for seat in hold['seats'])
+
+
+@pytest.mark.parametrize('seat_count', [0, -1])
+def test_hold_needs_at_least_one_seat(db_handler, seeded, seat_count):
+    schedule_id = seeded['schedule_ids'][0]
+    assert not db_handler.hold_seats(schedule_id, seat_count)['success']
+    assert 'Held' not in seat_statuses(db_handler, schedule_id).values()
+
+
+def test_booking_uses_held_seats(db_handler, seeded):
+    schedule_id = seeded['schedule_ids'][0]
+    hold = db_handler.hold_seats(schedule_id, 2)
+    result = db_handler.create_booking(
+        seeded['user_ids'][0], schedule_id, 'Held Passenger', 30, 'Other', 2,
+        db_handler.generate_booking_ref(), hold['hold_token']
+    )
+    assert result['success']
+
+    statuses = seat_statuses(db_handler, schedule_id)
+    assert all(statuses[seat] == 'Booked' for seat in hold['seats'])
+
+
+def test_concurrent_bookings_get_distinct_seats(db_handler, seeded):
+    schedule_id = seeded['schedule_ids'][-1]
+    before = db_handler.get_schedule_details(schedule_id)
+    results = []
+    results_lock = threading.Lock()
+
+    def book(user_id):
+        for _ in range(10):
+            result = db_handler.create_booking(
+                user_id, schedule_id, 'Racing Passenger', 30, 'Other', 1, db_handler.generate_booking_ref()
+            )
+            with results_lock:
+                results.append(result)
+
+    threads = [threading.Thread(target=book, args=(seeded['user_ids'][i % len(seeded['user_ids'])],))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    booked = [result for result in results if result['success']]
+    assert len(booked) == min(80, before['available_seats'])
+
+    rows = query(db_handler, "SELECT seat_numbers FROM bookings WHERE schedule_id = %s", (schedule_id,))
+    seats = [seat for row in rows for seat in row['seat_numbers'].split(',') if seat]
+    assert len(seats) == len(set(seats))
+
+    # The schedule's counter agrees with the seat rows
+    after = query(db_handler, "SELECT available_seats FROM bus_schedules WHERE schedule_id = %s", (schedule_id,))
+    free = [status for status in seat_statuses(db_handler, schedule_id).values() if status == 'Available']
+    assert after[0]['available_seats'] == len(free) == before['available_seats'] - len(booked)
+
+
+def test_failed_group_booking_releases_holds(db_handler, seeded):
+    schedule_id = seeded['schedule_ids'][0]
+    hold = db_handler.hold_seats(schedule_id, 1)
+    passengers = [{'passenger_name': 'Group Passenger', 'passenger_age': 30, 'passenger_gender': 'Other'}]
+
+    result = db_handler.create_group_booking(seeded['user_ids'][0], [
+        {'schedule_id': schedule_id, 'passengers': passengers, 'hold_token': hold['hold_token']},
+        {'schedule_id': 999999, 'passengers': passengers}
+    ])
+    assert not result['success']
+    assert 'Held' not in seat_statuses(db_handler, schedule_id).values()
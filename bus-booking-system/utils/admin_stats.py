@@ -0,0 +1,302 @@
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from mysql.connector import Error
+
+COUNTERS = ('total_bookings', 'total_users', 'revenue')
+
+
+def _amount(value):
+    """Counter values come back as Decimal, int or float depending on the column and driver"""
+    return Decimal(str(value or 0))
+
+
+def _day(value):
+    """booking_date as a datetime, date or ISO string -> date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if value:
+        try:
+            return date.fromisoformat(str(value)[:10])
+        except ValueError:
+            pass
+    return date.today()
+
+
+class AdminStats:
+    """Running totals and daily booking/revenue rollups for the admin panel
+
+    Writers bump the counters inside their own transaction, so the numbers
+    commit (or roll back) together with the bookings themselves. Each
+    counter is spread over ``slots`` rows and a writer picks one at random,
+    so concurrent bookings don't queue on a single hot row; reading sums a
+    handful of rows. reconcile() recomputes everything from the base
+    tables to correct any drift, and runs periodically in the background.
+
+    The active schedule count is not a counter: schedules stop being
+    active as their travel date passes, which no write marks, so it is
+    counted on read from idx_travel_date instead.
+    """
+
+    def __init__(self, get_connection, slots=8, cache_ttl=5, reconcile_interval=3600, reconcile_days=2):
+        self.get_connection = get_connection
+        self.slots = slots
+        self.cache_ttl = cache_ttl
+        self.reconcile_interval = reconcile_interval
+        self.reconcile_days = reconcile_days
+
+        self._lock = threading.Lock()
+        self._cached = None
+        self._cached_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Writes (inside the caller's transaction)
+    # ------------------------------------------------------------------
+    def _bump(self, cursor, counters):
+        slot = random.randrange(self.slots)
+        cursor.executemany(
+            "INSERT INTO stats_counters (name, slot, value) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE value = value + VALUES(value)",
+            [(name, slot, amount) for name, amount in counters.items() if amount]
+        )
+
+    def record_bookings(self, cursor, bookings):
+        """Count new bookings given as (booking_date, total_fare) pairs"""
+        if not bookings:
+            return
+        revenue = sum(float(fare or 0) for _, fare in bookings)
+        self._bump(cursor, {'total_bookings': len(bookings), 'revenue': revenue})
+
+        days = {}
+        for booking_date, fare in bookings:
+            day = days.setdefault(_day(booking_date), [0, 0.0])
+            day[0] += 1
+            day[1] += float(fare or 0)
+        slot = random.randrange(self.slots)
+        cursor.executemany(
+            "INSERT INTO stats_daily (stat_date, slot, bookings, revenue) VALUES (%s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE bookings = bookings + VALUES(bookings), revenue = revenue + VALUES(revenue)",
+            [(day, slot, count, amount) for day, (count, amount) in sorted(days.items())]
+        )
+        self.invalidate()
+
+    def record_users(self, cursor, count=1):
+        """Count newly registered users"""
+        if count:
+            self._bump(cursor, {'total_users': count})
+            self.invalidate()
+
+    def invalidate(self):
+        """Drop the cached panel numbers so the next read sees new writes"""
+        self._cached = None
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def get_stats(self):
+        """Panel totals: reads a few small rows plus one index count, cached for ``cache_ttl`` seconds"""
+        cached = self._cached
+        if cached is not None and time.monotonic() - self._cached_at < self.cache_ttl:
+            return dict(cached)
+
+        conn = self.get_connection()
+        if not conn:
+            return {}
+
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("SELECT name, SUM(value) AS value FROM stats_counters GROUP BY name")
+            totals = {row['name']: row['value'] for row in cursor.fetchall()}
+
+            cursor.execute(
+                "SELECT COALESCE(SUM(bookings), 0) AS bookings FROM stats_daily WHERE stat_date = %s",
+                (date.today(),)
+            )
+            today = cursor.fetchone()
+
+            cursor.execute("SELECT COUNT(*) AS total FROM bus_schedules WHERE travel_date >= %s", (date.today(),))
+            active_schedules = cursor.fetchone()['total']
+
+            stats = {
+                'total_bookings': int(totals.get('total_bookings') or 0),
+                'total_users': int(totals.get('total_users') or 0),
+                'today_bookings': int(today['bookings'] or 0),
+                'revenue': float(totals.get('revenue') or 0),
+                'active_schedules': int(active_schedules or 0)
+            }
+            self._cached = stats
+            self._cached_at = time.monotonic()
+            return dict(stats)
+
+        except Error as e:
+            print(f"Stats error: {e}")
+            return {}
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+    def reconcile(self, days=None):
+        """Recompute the counters, and the last ``days`` daily rollups, from the base tables
+
+        ``days=0`` rebuilds the rollups for the whole booking history.
+        Returns True on success.
+
+        The recount takes no locks. It reads the counters and the base
+        tables in one consistent snapshot (REPEATABLE READ, InnoDB's
+        default). Writers bump the counters in the same transaction as
+        their rows, so counters and tables agree as of the same moment.
+        Only the difference is then added to slot 0, in a short
+        transaction that booking writers barely notice.
+        """
+        days = self.reconcile_days if days is None else days
+        conn = self.get_connection()
+        if not conn:
+            return False
+
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            since = date.today() - timedelta(days=days - 1) if days else None
+
+            # Snapshot: the first read fixes the view the rest of the reads see
+            conn.rollback()
+            cursor.execute("SELECT name, COALESCE(SUM(value), 0) AS value FROM stats_counters GROUP BY name")
+            counted = {row['name']: _amount(row['value']) for row in cursor.fetchall()}
+
+            cursor.execute("SELECT COUNT(*) AS total FROM bookings")
+            total_bookings = cursor.fetchone()['total']
+            cursor.execute("SELECT COUNT(*) AS total FROM users")
+            total_users = cursor.fetchone()['total']
+            cursor.execute(
+                "SELECT COALESCE(SUM(total_fare), 0) AS revenue FROM bookings WHERE booking_status = 'Confirmed'"
+            )
+            revenue = cursor.fetchone()['revenue']
+
+            values = {
+                'total_bookings': total_bookings,
+                'total_users': total_users,
+                'revenue': revenue
+            }
+
+            # Daily rollups: a range on booking_date (not DATE(booking_date)) so the index is used
+            rolled_query = "SELECT stat_date, SUM(bookings) AS bookings, SUM(revenue) AS revenue FROM stats_daily"
+            actual_query = (
+                "SELECT DATE(booking_date) AS stat_date, COUNT(*) AS bookings, "
+                "COALESCE(SUM(CASE WHEN booking_status = 'Confirmed' THEN total_fare END), 0) AS revenue "
+                "FROM bookings"
+            )
+            if since:
+                cursor.execute(f"{rolled_query} WHERE stat_date >= %s GROUP BY stat_date", (since,))
+                rolled = cursor.fetchall()
+                cursor.execute(f"{actual_query} WHERE booking_date >= %s GROUP BY DATE(booking_date)", (since,))
+                actual = cursor.fetchall()
+            else:
+                cursor.execute(f"{rolled_query} GROUP BY stat_date")
+                rolled = cursor.fetchall()
+                cursor.execute(f"{actual_query} GROUP BY DATE(booking_date)")
+                actual = cursor.fetchall()
+            conn.rollback()
+
+            drift = [
+                (name, 0, _amount(values[name]) - counted.get(name, 0))
+                for name in COUNTERS
+            ]
+            daily = {}
+            for row in rolled:
+                day = daily.setdefault(_day(row['stat_date']), [0, 0])
+                day[0] -= int(row['bookings'] or 0)
+                day[1] -= _amount(row['revenue'])
+            for row in actual:
+                day = daily.setdefault(_day(row['stat_date']), [0, 0])
+                day[0] += int(row['bookings'] or 0)
+                day[1] += _amount(row['revenue'])
+
+            # Short write: add the differences on top of whatever committed since
+            cursor.executemany(
+                "INSERT INTO stats_counters (name, slot, value) VALUES (%s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE value = value + VALUES(value)",
+                [row for row in drift if row[2]]
+            )
+            cursor.executemany(
+                "INSERT INTO stats_daily (stat_date, slot, bookings, revenue) VALUES (%s, 0, %s, %s) "
+                "ON DUPLICATE KEY UPDATE bookings = bookings + VALUES(bookings), revenue = revenue + VALUES(revenue)",
+                [(day, count, amount) for day, (count, amount) in sorted(daily.items()) if count or amount]
+            )
+            conn.commit()
+            self.invalidate()
+            return True
+
+        except Error as e:
+            conn.rollback()
+            print(f"Stats reconcile error: {e}")
+            return False
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    def get_daily(self, since, until=None):
+        """Bookings and revenue per day between ``since`` and ``until`` (inclusive)"""
+        conn = self.get_connection()
+        if not conn:
+            return []
+
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                "SELECT stat_date, SUM(bookings) AS bookings, SUM(revenue) AS revenue FROM stats_daily "
+                "WHERE stat_date BETWEEN %s AND %s GROUP BY stat_date ORDER BY stat_date",
+                (since, until or date.today())
+            )
+            return [
+                {
+                    'date': str(row['stat_date']),
+                    'bookings': int(row['bookings']),
+                    'revenue': float(row['revenue'])
+                }
+                for row in cursor.fetchall()
+            ]
+
+        except Error as e:
+            print(f"Daily stats error: {e}")
+            return []
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Background reconciliation
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._reconcile_loop, name='admin-stats-reconciler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _reconcile_loop(self):
+        # Reconcile once at startup so a fresh or drifted table is corrected straight away
+        while True:
+            try:
+                self.reconcile()
+            except Exception as e:
+                print(f"Stats reconcile error: {e}")
+            if self._stop.wait(self.reconcile_interval):
+                break
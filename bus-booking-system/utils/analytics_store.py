@@ -0,0 +1,442 @@
+import argparse
+import threading
+from datetime import date, datetime, timedelta
+
+from mysql.connector import Error
+
+GRANULARITIES = ('hour', 'day')
+SALES_METRICS = ('bookings', 'seats', 'revenue')
+SALES_DIMENSIONS = ('route_id', 'bus_operator', 'bus_type', 'lead_bucket')
+OCCUPANCY_DIMENSIONS = ('route_id', 'departure_hour', 'bus_operator', 'bus_type')
+
+# Days between booking and travel -> bucket label
+LEAD_BUCKETS = ((0, '0'), (1, '1'), (3, '2-3'), (7, '4-7'), (14, '8-14'), (30, '15-30'))
+
+LEAD_BUCKET_SQL = """CASE
+    WHEN DATEDIFF(s.travel_date, b.booking_date) <= 0 THEN '0'
+    WHEN DATEDIFF(s.travel_date, b.booking_date) = 1 THEN '1'
+    WHEN DATEDIFF(s.travel_date, b.booking_date) <= 3 THEN '2-3'
+    WHEN DATEDIFF(s.travel_date, b.booking_date) <= 7 THEN '4-7'
+    WHEN DATEDIFF(s.travel_date, b.booking_date) <= 14 THEN '8-14'
+    WHEN DATEDIFF(s.travel_date, b.booking_date) <= 30 THEN '15-30'
+    ELSE '31+' END"""
+
+# Seats in a booking, counted from its 'Seat-1, Seat-2' list
+SEAT_COUNT_SQL = "1 + LENGTH(b.seat_numbers) - LENGTH(REPLACE(b.seat_numbers, ',', ''))"
+
+
+def lead_bucket(booked_at, travel_date):
+    days = (travel_date - booked_at.date()).days
+    for limit, label in LEAD_BUCKETS:
+        if days <= limit:
+            return label
+    return '31+'
+
+
+def bucket_start(moment, granularity):
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if value:
+        try:
+            return datetime.fromisoformat(str(value))
+        except ValueError:
+            pass
+    return datetime.now()
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _departure_hour(value):
+    """TIME columns come back as timedelta; strings as 'HH:MM[:SS]'"""
+    if hasattr(value, 'total_seconds'):
+        return int(value.total_seconds() // 3600) % 24
+    return int(str(value).split(':')[0])
+
+
+class AnalyticsStore:
+    """Pre-aggregated booking analytics for the admin reports
+
+    ``analytics_sales`` holds bookings, seats and revenue per hour and per
+    day, broken down by route, operator, bus type and booking lead time.
+    ``analytics_occupancy`` holds seats sold and offered per travel date,
+    route and departure hour, for load factors.
+
+    New bookings are recorded in memory after they commit and flushed in
+    one batch every ``flush_interval`` seconds, so booking transactions
+    never wait on analytics rows. backfill() rebuilds a range from the
+    base tables, e.g. for history or after a crash lost a buffer.
+    """
+
+    def __init__(self, get_connection, flush_interval=30):
+        self.get_connection = get_connection
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._buffer = []       # (schedule_id, seats, revenue, booked_at)
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def record_booking(self, schedule_id, seats, revenue, booked_at=None):
+        """Count a committed booking; written out on the next flush"""
+        with self._lock:
+            self._buffer.append((int(schedule_id), int(seats), float(revenue or 0), _as_datetime(booked_at)))
+
+    def _load_dimensions(self, cursor, schedule_ids):
+        """schedule_id -> route/operator/type/departure/travel date, read fresh for each flush"""
+        schedule_ids = sorted(set(schedule_ids))
+        cursor.execute(
+            f"SELECT schedule_id, route_id, bus_operator, bus_type, departure_time, travel_date "
+            f"FROM bus_schedules WHERE schedule_id IN ({', '.join(['%s'] * len(schedule_ids))})",
+            tuple(schedule_ids)
+        )
+        dimensions = {}
+        for row in cursor.fetchall():
+            dimensions[row['schedule_id']] = {
+                'route_id': row['route_id'],
+                'bus_operator': row['bus_operator'] or '',
+                'bus_type': row['bus_type'] or '',
+                'departure_hour': _departure_hour(row['departure_time']),
+                'travel_date': _as_date(row['travel_date'])
+            }
+        return dimensions
+
+    def flush(self):
+        """Write buffered bookings into the hourly/daily buckets; returns how many were written"""
+        with self._lock:
+            buffer, self._buffer = self._buffer, []
+        if not buffer:
+            return 0
+
+        conn = self.get_connection()
+        if not conn:
+            self._requeue(buffer)
+            return 0
+
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            dimensions = self._load_dimensions(cursor, [item[0] for item in buffer])
+
+            sales = {}
+            sold = {}
+            for schedule_id, seats, revenue, booked_at in buffer:
+                dims = dimensions.get(schedule_id)
+                if dims is None:
+                    continue  # schedule deleted since the booking
+                lead = lead_bucket(booked_at, dims['travel_date'])
+                for granularity in GRANULARITIES:
+                    key = (granularity, bucket_start(booked_at, granularity), dims['route_id'],
+                           dims['bus_operator'], dims['bus_type'], lead)
+                    totals = sales.setdefault(key, [0, 0, 0.0])
+                    totals[0] += 1
+                    totals[1] += seats
+                    totals[2] += revenue
+                key = (dims['travel_date'], dims['route_id'], dims['departure_hour'],
+                       dims['bus_operator'], dims['bus_type'])
+                sold[key] = sold.get(key, 0) + seats
+
+            if sales:
+                cursor.executemany(
+                    "INSERT INTO analytics_sales "
+                    "(granularity, bucket_start, route_id, bus_operator, bus_type, lead_bucket, bookings, seats, revenue) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) "
+                    "ON DUPLICATE KEY UPDATE bookings = bookings + VALUES(bookings), "
+                    "seats = seats + VALUES(seats), revenue = revenue + VALUES(revenue)",
+                    [key + tuple(totals) for key, totals in sorted(sales.items())]
+                )
+            if sold:
+                cursor.executemany(
+                    "INSERT INTO analytics_occupancy "
+                    "(travel_date, route_id, departure_hour, bus_operator, bus_type, seats_sold) "
+                    "VALUES (%s, %s, %s, %s, %s, %s) "
+                    "ON DUPLICATE KEY UPDATE seats_sold = seats_sold + VALUES(seats_sold)",
+                    [key + (seats,) for key, seats in sorted(sold.items())]
+                )
+                self._refresh_capacity(cursor, sorted({key[0] for key in sold}))
+            conn.commit()
+            return len(buffer)
+
+        except Error as e:
+            conn.rollback()
+            self._requeue(buffer)
+            print(f"Analytics flush error: {e}")
+            return 0
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    def _requeue(self, buffer):
+        with self._lock:
+            self._buffer[:0] = buffer
+
+    def _refresh_capacity(self, cursor, travel_dates):
+        """Set seats offered for the given travel dates from bus_schedules"""
+        cursor.execute(
+            f"SELECT travel_date, route_id, HOUR(departure_time) AS departure_hour, "
+            f"COALESCE(bus_operator, '') AS bus_operator, COALESCE(bus_type, '') AS bus_type, "
+            f"SUM(total_seats) AS seats_offered FROM bus_schedules "
+            f"WHERE travel_date IN ({', '.join(['%s'] * len(travel_dates))}) AND status <> 'Cancelled' "
+            f"GROUP BY travel_date, route_id, HOUR(departure_time), bus_operator, bus_type",
+            tuple(travel_dates)
+        )
+        rows = cursor.fetchall()
+        if rows:
+            cursor.executemany(
+                "INSERT INTO analytics_occupancy "
+                "(travel_date, route_id, departure_hour, bus_operator, bus_type, seats_offered) "
+                "VALUES (%s, %s, %s, %s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE seats_offered = VALUES(seats_offered)",
+                [
+                    (row['travel_date'], row['route_id'], row['departure_hour'],
+                     row['bus_operator'], row['bus_type'], row['seats_offered'])
+                    for row in rows
+                ]
+            )
+
+    # ------------------------------------------------------------------
+    # Backfill
+    # ------------------------------------------------------------------
+    def backfill(self, since, until=None):
+        """Rebuild sales for bookings made in [since, until) and occupancy for trips travelling from ``since``
+
+        ``until`` defaults to the start of the current hour so the sales
+        range never overlaps bookings still waiting in a flush buffer.
+        Occupancy counts every booking on a trip, whenever it was made, so
+        it is rebuilt for trips up to ``until`` when one is given and for
+        all upcoming trips otherwise; seats sold are summed from the
+        bookings, as the incremental path does.
+        """
+        since = bucket_start(_as_datetime(since), 'day')
+        travel_until = _as_datetime(until).date() if until else date.max
+        until = _as_datetime(until) if until else bucket_start(datetime.now(), 'hour')
+        # Write out what is buffered so it isn't counted again on top of the rebuild
+        self.flush()
+
+        conn = self.get_connection()
+        if not conn:
+            return False
+
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+
+            cursor.execute(
+                "DELETE FROM analytics_sales WHERE granularity = 'hour' AND bucket_start >= %s AND bucket_start < %s",
+                (since, until)
+            )
+            cursor.execute(
+                "DELETE FROM analytics_sales WHERE granularity = 'day' AND bucket_start >= %s AND bucket_start < %s",
+                (since, bucket_start(until, 'day'))
+            )
+            for granularity, bucket_sql, end in (
+                ('hour', "DATE_FORMAT(b.booking_date, '%%Y-%%m-%%d %%H:00:00')", until),
+                ('day', "DATE(b.booking_date)", bucket_start(until, 'day')),
+            ):
+                cursor.execute(f"""
+                    INSERT INTO analytics_sales
+                    (granularity, bucket_start, route_id, bus_operator, bus_type, lead_bucket, bookings, seats, revenue)
+                    SELECT '{granularity}', {bucket_sql}, s.route_id,
+                           COALESCE(s.bus_operator, ''), COALESCE(s.bus_type, ''), {LEAD_BUCKET_SQL},
+                           COUNT(*), SUM({SEAT_COUNT_SQL}), SUM(b.total_fare)
+                    FROM bookings b
+                    JOIN bus_schedules s ON b.schedule_id = s.schedule_id
+                    WHERE b.booking_date >= %s AND b.booking_date < %s AND b.booking_status <> 'Cancelled'
+                    GROUP BY 2, 3, 4, 5, 6
+                """, (since, end))
+
+            # Occupancy is keyed by travel date
+            cursor.execute(
+                "DELETE FROM analytics_occupancy WHERE travel_date >= %s AND travel_date < %s",
+                (since.date(), travel_until)
+            )
+            cursor.execute(f"""
+                INSERT INTO analytics_occupancy
+                (travel_date, route_id, departure_hour, bus_operator, bus_type, seats_offered, seats_sold)
+                SELECT s.travel_date, s.route_id, HOUR(s.departure_time),
+                       COALESCE(s.bus_operator, ''), COALESCE(s.bus_type, ''),
+                       SUM(s.total_seats), COALESCE(SUM(sold.seats), 0)
+                FROM bus_schedules s
+                LEFT JOIN (
+                    SELECT b.schedule_id, SUM({SEAT_COUNT_SQL}) AS seats
+                    FROM bookings b
+                    WHERE b.booking_status <> 'Cancelled'
+                    GROUP BY b.schedule_id
+                ) sold ON sold.schedule_id = s.schedule_id
+                WHERE s.travel_date >= %s AND s.travel_date < %s AND s.status <> 'Cancelled'
+                GROUP BY 1, 2, 3, 4, 5
+            """, (since.date(), travel_until))
+
+            conn.commit()
+            return True
+
+        except Error as e:
+            conn.rollback()
+            print(f"Analytics backfill error: {e}")
+            return False
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def _query(self, query, params):
+        conn = self.get_connection()
+        if not conn:
+            return []
+
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        except Error as e:
+            print(f"Analytics query error: {e}")
+            return []
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    def _filters(self, filters, allowed):
+        clauses = []
+        params = []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name not in allowed:
+                raise ValueError(f"Cannot filter on {name}")
+            clauses.append(f"{name} = %s")
+            params.append(value)
+        return clauses, params
+
+    def get_series(self, metric, since, until=None, granularity='day', group_by=None, **filters):
+        """Time series of ``metric`` (bookings, seats or revenue) per bucket
+
+        Returns ``{group: [{'bucket': ..., 'value': ...}, ...]}``; the group
+        is the ``group_by`` dimension value, or 'all' without one. Filters
+        (route_id, bus_operator, bus_type, lead_bucket) narrow the rows.
+        """
+        if metric not in SALES_METRICS:
+            raise ValueError(f"Unknown metric {metric}")
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity {granularity}")
+        if group_by is not None and group_by not in SALES_DIMENSIONS:
+            raise ValueError(f"Cannot group by {group_by}")
+
+        clauses, params = self._filters(filters, SALES_DIMENSIONS)
+        group = group_by or "'all'"
+        rows = self._query(
+            f"SELECT {group} AS grp, bucket_start, SUM({metric}) AS value FROM analytics_sales "
+            f"WHERE granularity = %s AND bucket_start >= %s AND bucket_start < %s "
+            f"{''.join(' AND ' + clause for clause in clauses)} "
+            f"GROUP BY grp, bucket_start ORDER BY grp, bucket_start",
+            (granularity, _as_datetime(since), _as_datetime(until) if until else datetime.now(), *params)
+        )
+        series = {}
+        for row in rows:
+            series.setdefault(row['grp'], []).append({
+                'bucket': _as_datetime(row['bucket_start']).isoformat(),
+                'value': float(row['value'] or 0)
+            })
+        return series
+
+    def get_load_factors(self, since, until=None, group_by=('route_id', 'departure_hour'), **filters):
+        """Seats sold / seats offered for trips travelling in [since, until), per ``group_by``"""
+        group_by = tuple(group_by)
+        for name in group_by:
+            if name not in OCCUPANCY_DIMENSIONS:
+                raise ValueError(f"Cannot group by {name}")
+        clauses, params = self._filters(filters, OCCUPANCY_DIMENSIONS)
+        columns = ', '.join(group_by) or "'all'"
+        rows = self._query(
+            f"SELECT {columns}, SUM(seats_sold) AS seats_sold, SUM(seats_offered) AS seats_offered "
+            f"FROM analytics_occupancy WHERE travel_date >= %s AND travel_date < %s "
+            f"{''.join(' AND ' + clause for clause in clauses)} "
+            f"GROUP BY {columns} ORDER BY {columns}",
+            (_as_date(since), _as_date(until) if until else date.today() + timedelta(days=1), *params)
+        )
+        for row in rows:
+            sold = int(row['seats_sold'] or 0)
+            offered = int(row['seats_offered'] or 0)
+            row['seats_sold'] = sold
+            row['seats_offered'] = offered
+            row['load_factor'] = round(sold / offered, 4) if offered else None
+        return rows
+
+    def get_lead_time_distribution(self, since, until=None, **filters):
+        """Share of bookings per lead-time bucket (days booked ahead of travel)"""
+        series = self.get_series('bookings', since, until, granularity='day', group_by='lead_bucket', **filters)
+        counts = {bucket: sum(point['value'] for point in points) for bucket, points in series.items()}
+        total = sum(counts.values())
+        labels = [label for _, label in LEAD_BUCKETS] + ['31+']
+        return [
+            {
+                'lead_days': label,
+                'bookings': int(counts.get(label, 0)),
+                'share': round(counts.get(label, 0) / total, 4) if total else 0.0
+            }
+            for label in labels
+        ]
+
+    # ------------------------------------------------------------------
+    # Background flushing
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name='analytics-flusher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher, writing out whatever is still buffered"""
+        self._stop.set()
+        self.flush()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Analytics flush error: {e}")
+
+
+def main():
+    """python -m utils.analytics_store backfill --since 2024-01-01 [--until 2024-12-31]"""
+    from utils.database_handler import DatabaseHandler
+
+    parser = argparse.ArgumentParser(description='Booking analytics maintenance')
+    parser.add_argument('command', choices=['backfill'])
+    parser.add_argument('--since', required=True, help='first day to rebuild (YYYY-MM-DD)')
+    parser.add_argument('--until', help='rebuild up to, not including, this day (default: now)')
+    args = parser.parse_args()
+
+    db = DatabaseHandler(start_monitor=False)
+    if db.analytics.backfill(args.since, args.until):
+        print(f"Analytics rebuilt from {args.since} to {args.until or 'now'}")
+    else:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from config import Config
+from utils.response_cache import schedule_key, search_key
+
+
+class AsyncBusy(Exception):
+    """Too many blocking calls already waiting for a worker thread"""
+
+
+def _copy(result):
+    # Callers sharing one coalesced result each get their own rows
+    if isinstance(result, list):
+        return [dict(row) if isinstance(row, dict) else row for row in result]
+    if isinstance(result, dict):
+        return dict(result)
+    return result
+
+
+class AsyncDataAccess:
+    """asyncio front for the read path of DatabaseHandler and OfflineManager
+
+    Answers that need no I/O are served straight from memory on the event
+    loop: schedule searches the in-memory index can answer, and the
+    connection status kept by the health monitor / status broadcaster.
+    Everything else runs the existing blocking method on a small thread
+    pool sized like the connection pool, so a waiting request costs a
+    coroutine rather than a worker thread. Identical searches and schedule
+    lookups that are in flight at the same time share one call. Beyond
+    ``max_in_flight`` offloaded calls, new ones raise AsyncBusy so the
+    route can answer 503 instead of queueing without bound.
+
+    The blocking API is unchanged; this class only wraps it.
+    """
+
+    def __init__(self, db_handler, offline_mgr, broadcaster=None, workers=None, max_in_flight=None):
+        self.db_handler = db_handler
+        self.offline_mgr = offline_mgr
+        self.broadcaster = broadcaster
+        self.metrics = db_handler.metrics
+        self.max_in_flight = max_in_flight or Config.ASYNC_MAX_IN_FLIGHT
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or Config.ASYNC_DB_WORKERS, thread_name_prefix='async-db'
+        )
+        self._in_flight = 0
+        self._shared_calls = {}    # key -> future of the call already running
+        self._loop = None
+        self._status_waiters = set()
+        if broadcaster:
+            broadcaster.add_listener(self._on_status_change)
+
+    # ------------------------------------------------------------------
+    # Offloading
+    # ------------------------------------------------------------------
+    async def _offload(self, func, *args):
+        if self._in_flight >= self.max_in_flight:
+            raise AsyncBusy("Too many requests waiting for the database, try again")
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._in_flight -= 1
+
+    async def _shared(self, key, func, *args):
+        """Run ``func(*args)`` once for all concurrent callers asking for ``key``"""
+        future = self._shared_calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._offload(func, *args))
+            self._shared_calls[key] = future
+            future.add_done_callback(lambda _: self._shared_calls.pop(key, None))
+        return _copy(await asyncio.shield(future))
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+    async def search_schedules(self, origin, destination, travel_date, primary=False):
+        """Same results as DatabaseHandler.search_schedules"""
+        index = self.db_handler.schedule_index
+        if index.is_ready() and not index.needs_refresh():
+            schedules = index.search(origin, destination, travel_date, refresh=False)
+            if schedules is not None:
+                self.metrics.inc('busbooking_schedule_index_lookups_total', result='hit')
+                return schedules
+
+        key = ('search', origin.strip().lower(), destination.strip().lower(), str(travel_date), primary)
+        return await self._shared(
+            key, self.db_handler.search_schedules, origin, destination, travel_date, None, primary
+        )
+
+    async def search_schedules_offline(self, origin, destination, travel_date):
+        """Same results as OfflineManager.search_schedules_offline"""
+        key = ('offline_search', origin.strip().lower(), destination.strip().lower(), str(travel_date))
+        return await self._shared(key, self.offline_mgr.search_schedules_offline, origin, destination, travel_date)
+
+    async def get_schedule_details(self, schedule_id):
+        return await self._shared(('schedule', str(schedule_id)), self.db_handler.get_schedule_details, schedule_id)
+
+    async def search_response(self, origin, destination, travel_date):
+        """Like DatabaseHandler.get_search_response"""
+        cache = self.db_handler.response_cache
+        key = search_key(origin, destination, travel_date)
+        entry = cache.get(key)
+        if entry is None:
+            since = cache.generation()
+            # Shared cache: filled from the primary, never from a lagging replica
+            schedules = await self.search_schedules(origin, destination, travel_date, primary=True)
+            entry = cache.put(key, schedules, since)
+        return entry
+
+    async def schedule_response(self, schedule_id):
+        """Like DatabaseHandler.get_schedule_response"""
+        cache = self.db_handler.response_cache
+        key = schedule_key(schedule_id)
+        entry = cache.get(key)
+        if entry is None:
+            since = cache.generation()
+            entry = cache.put(key, await self.get_schedule_details(schedule_id), since)
+        return entry
+
+    async def get_user_bookings(self, user_id):
+        return await self._offload(self.db_handler.get_user_bookings, user_id)
+
+    async def get_user_offline_bookings(self, username):
+        return await self._offload(self.offline_mgr.get_user_offline_bookings, username)
+
+    # ------------------------------------------------------------------
+    # Connectivity status
+    # ------------------------------------------------------------------
+    def check_connection(self):
+        """Cached by the health monitor, so no await is needed"""
+        return self.db_handler.check_connection()
+
+    def get_connection_status(self):
+        """Status as the /check-connection route reports it (broadcaster state when there is one)"""
+        if self.broadcaster:
+            return self.broadcaster.snapshot()[1]
+        return self.db_handler.get_connection_status()
+
+    async def wait_for_status_change(self, since=None, timeout=25):
+        """Long-poll like StatusBroadcaster.wait_for_change, without holding a thread while waiting"""
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        deadline = loop.time() + timeout
+        while True:
+            version, state = self.broadcaster.snapshot()
+            remaining = deadline - loop.time()
+            if since is None or version > since or remaining <= 0:
+                return version, state
+
+            waiter = loop.create_future()
+            self._status_waiters.add(waiter)
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._status_waiters.discard(waiter)
+
+    def _on_status_change(self, version, state):
+        # Called from the publishing thread; hand over to the event loop
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake_status_waiters)
+
+    def _wake_status_waiters(self):
+        for waiter in list(self._status_waiters):
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def get_stats(self):
+        return {'in_flight': self._in_flight, 'shared_calls': len(self._shared_calls),
+                'status_waiters': len(self._status_waiters)}
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+def create_asgi_app(data_access):
+    """Plain ASGI app serving the search and status routes from ``data_access``
+
+    Runs under any ASGI server next to the Flask app, e.g. an ``asgi.py``
+    with ``app = create_asgi_app(AsyncDataAccess(db_handler, offline_mgr,
+    broadcaster))`` served by ``uvicorn asgi:app --workers 2``, with the
+    proxy sending these paths to it:
+
+    - ``GET /check-connection``: connection/sync status
+    - ``GET /status/wait?since=<version>``: long-poll for the next change
+    - ``GET /api/search?origin=&destination=&date=``: schedules, from MySQL
+      or from the offline cache when the database is down
+    - ``GET /api/schedules/<id>``: one schedule
+
+    Online search and schedule answers carry an ETag and are answered 304
+    when the request's ``If-None-Match`` still matches.
+    """
+    cache = data_access.db_handler.response_cache
+
+    async def respond(send, status, body, headers=()):
+        payload = b'' if status == 304 else json.dumps(body, default=str).encode('utf-8')
+        start = [(b'content-length', str(len(payload)).encode())]
+        if status != 304:
+            start.append((b'content-type', b'application/json'))
+        await send({'type': 'http.response.start', 'status': status, 'headers': start + list(headers)})
+        await send({'type': 'http.response.body', 'body': payload})
+
+    async def respond_cached(send, request_headers, entry, body):
+        headers = [(name.lower().encode(), value.encode()) for name, value in cache.headers(entry).items()]
+        if cache.not_modified(entry, request_headers.get(b'if-none-match', b'').decode('latin-1')):
+            return await respond(send, 304, None, headers)
+        return await respond(send, 200, body, headers)
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                data_access.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+
+        path = scope['path'].rstrip('/')
+        request_headers = dict(scope.get('headers') or [])
+        query = {key: values[-1] for key, values in parse_qs(scope['query_string'].decode('latin-1')).items()}
+        if scope['method'] != 'GET':
+            return await respond(send, 405, {'error': 'Method not allowed'})
+
+        try:
+            if path == '/check-connection':
+                return await respond(send, 200, data_access.get_connection_status())
+
+            if path == '/status/wait':
+                if data_access.broadcaster is None:
+                    return await respond(send, 404, {'error': 'Status broadcasting is not enabled'})
+                since = int(query['since']) if query.get('since', '').isdigit() else None
+                version, state = await data_access.wait_for_status_change(since)
+                return await respond(send, 200, dict(state, version=version))
+
+            if path == '/api/search':
+                origin, destination, travel_date = query.get('origin'), query.get('destination'), query.get('date')
+                if not (origin and destination and travel_date):
+                    return await respond(send, 400, {'error': 'origin, destination and date are required'})
+                if data_access.check_connection():
+                    entry = await data_access.search_response(origin, destination, travel_date)
+                    return await respond_cached(send, request_headers, entry,
+                                                {'online': True, 'schedules': entry['data']})
+                schedules = await data_access.search_schedules_offline(origin, destination, travel_date)
+                return await respond(send, 200, {'online': False, 'schedules': schedules})
+
+            if path.startswith('/api/schedules/'):
+                schedule_id = path.rsplit('/', 1)[-1]
+                if not schedule_id.isdigit():
+                    return await respond(send, 404, {'error': 'Schedule not found'})
+                entry = await data_access.schedule_response(int(schedule_id))
+                if not entry['data']:
+                    return await respond(send, 404, {'error': 'Schedule not found'})
+                return await respond_cached(send, request_headers, entry, entry['data'])
+
+            return await respond(send, 404, {'error': 'Not found'})
+
+        except AsyncBusy as e:
+            return await respond(send, 503, {'error': str(e)}, [(b'retry-after', b'1')])
+        except Exception as e:
+            print(f"Async route error: {e}")
+            return await respond(send, 500, {'error': 'Internal error'})
+
+    return app
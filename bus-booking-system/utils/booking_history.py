@@ -0,0 +1,99 @@
+import base64
+import json
+from datetime import date, datetime
+
+ONLINE, OFFLINE = 1, 0
+
+
+def encode_cursor(key):
+    """Page position -> opaque URL-safe token"""
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor(); None (the first page) for a missing, malformed or tampered token"""
+    if not token:
+        return None
+    try:
+        booking_date, source, booking_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        datetime.fromisoformat(booking_date)
+    except (ValueError, TypeError):
+        return None
+    # Same types booking_key() produces, so comparing against it can't raise
+    if source == ONLINE and type(booking_id) is int:
+        return (booking_date, source, booking_id)
+    if source == OFFLINE and isinstance(booking_id, str):
+        return (booking_date, source, booking_id)
+    return None
+
+
+def booking_key(booking):
+    """Sort key shared by database and offline bookings; pages run newest first
+
+    At the same timestamp database bookings come before offline ones, and
+    ties within a source are broken by booking_id / offline_id.
+    """
+    if booking.get('is_offline'):
+        return (booking.get('booking_date') or '', OFFLINE, booking.get('offline_id') or '')
+    return (booking.get('booking_date') or '', ONLINE, booking.get('booking_id') or 0)
+
+
+class BookingHistory:
+    """My Bookings pages that merge database and pending offline bookings
+
+    Database bookings are fetched one keyset page at a time; the user's
+    offline bookings come from the offline username index, and only those
+    belonging to the current page are merged in.
+    """
+
+    def __init__(self, db_handler, offline_mgr):
+        self.db_handler = db_handler
+        self.offline_mgr = offline_mgr
+
+    def _offline_matches(self, booking, status, upcoming_only):
+        if status and status != booking.get('booking_status'):
+            return False
+        if upcoming_only:
+            travel_date = (booking.get('schedule_data') or {}).get('travel_date')
+            if travel_date and str(travel_date)[:10] < date.today().isoformat():
+                return False
+        return True
+
+    def get_page(self, user_id, username, cursor=None, limit=20, status=None, upcoming_only=False):
+        """``limit`` bookings after ``cursor`` plus the cursor for the next page (None on the last)"""
+        after = decode_cursor(cursor)
+
+        online = []
+        if user_id and status != 'Pending Sync':
+            db_after = None
+            if after:
+                booking_date, source, booking_id = after
+                db_after = (booking_date, booking_id if source == ONLINE else None)
+            # One extra row tells us whether another page follows
+            online = self.db_handler.get_user_bookings_page(user_id, db_after, limit + 1, status, upcoming_only)
+
+        offline = [
+            booking for booking in self.offline_mgr.get_user_offline_bookings(username)
+            if self._offline_matches(booking, status, upcoming_only)
+            and (after is None or booking_key(booking) < after)
+        ]
+
+        merged = sorted(online + offline, key=booking_key, reverse=True)
+        page = merged[:limit]
+        next_cursor = encode_cursor(booking_key(page[-1])) if len(merged) > limit else None
+        return {'bookings': page, 'next_cursor': next_cursor}
+
+    def stream_json(self, user_id, username, status=None, upcoming_only=False, batch_size=500):
+        """Yield a JSON array of all matching bookings in chunks (e.g. for a streamed download)"""
+        yield '['
+        first = True
+        cursor = None
+        while True:
+            page = self.get_page(user_id, username, cursor, batch_size, status, upcoming_only)
+            for booking in page['bookings']:
+                yield ('' if first else ',') + json.dumps(booking, default=str, ensure_ascii=False)
+                first = False
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        yield ']'
@@ -0,0 +1,411 @@
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Mapping
+from datetime import date
+from decimal import Decimal
+
+MAGIC = b'BSCC'
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct('<4sII')  # magic, format version, header length
+ALIGN = 8
+
+INT_NULL = -2 ** 31
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Storage kind for the known schedule fields; any other field is inferred
+SCHEDULE_COLUMNS = {
+    'schedule_id': 'int',
+    'route_id': 'int',
+    'total_seats': 'int',
+    'available_seats': 'int',
+    'fare': 'float',
+    'distance_km': 'float',
+    'estimated_hours': 'float',
+    'estimated_duration_hours': 'float',
+    'travel_date': 'date',
+    'departure_time': 'time',
+    'arrival_time': 'time',
+    'bus_number': 'str',
+    'bus_operator': 'str',
+    'bus_type': 'str',
+    'amenities': 'str',
+    'route_name': 'str',
+    'origin_city': 'str',
+    'destination_city': 'str',
+    'route_type': 'str',
+    'via_route': 'str',
+    'status': 'str',
+    'amenities_list': 'json',
+}
+
+TYPECODES = {
+    'int': 'i',
+    'bool': 'b',
+    'float': 'd',
+    'date': 'i',
+    'time': 'i',
+    'str': 'i',
+    'json': 'i',
+}
+
+
+def _infer_kind(values):
+    kinds = set()
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            kinds.add('bool')
+        elif isinstance(value, int):
+            kinds.add('int')
+        elif isinstance(value, (float, Decimal)):
+            kinds.add('float')
+        elif isinstance(value, str):
+            kinds.add('str')
+        else:
+            kinds.add('json')
+    if kinds <= {'int'} and kinds:
+        return 'int'
+    if kinds <= {'int', 'float'} and kinds:
+        return 'float'
+    if kinds == {'bool'}:
+        return 'bool'
+    if kinds <= {'str'}:
+        return 'str'
+    return 'json'
+
+
+def _parse_time(value):
+    """'8:00', '08:00:00' or a timedelta -> seconds since midnight"""
+    if hasattr(value, 'total_seconds'):
+        return int(value.total_seconds())
+    parts = [int(p) for p in str(value).split(':')]
+    while len(parts) < 3:
+        parts.append(0)
+    return parts[0] * 3600 + parts[1] * 60 + parts[2]
+
+
+def _format_time(seconds, with_seconds):
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if with_seconds:
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    return f"{hours:02d}:{minutes:02d}"
+
+
+def _encode_column(kind, values, strings):
+    """Turn one column of Python values into an array plus header metadata"""
+    meta = {}
+    if kind == 'int':
+        data = array('i', (INT_NULL if v is None else int(v) for v in values))
+    elif kind == 'bool':
+        data = array('b', (-1 if v is None else int(bool(v)) for v in values))
+    elif kind == 'float':
+        data = array('d', (math.nan if v is None else float(v) for v in values))
+    elif kind == 'date':
+        data = array('i', (
+            INT_NULL if not v else date.fromisoformat(str(v)[:10]).toordinal() - EPOCH_ORDINAL
+            for v in values
+        ))
+    elif kind == 'time':
+        present = [v for v in values if v not in (None, '')]
+        meta['seconds'] = not all(isinstance(v, str) and v.count(':') == 1 for v in present)
+        data = array('i', (INT_NULL if v in (None, '') else _parse_time(v) for v in values))
+    else:
+        # Dictionary-encoded strings; json columns store the serialized value
+        codes = {}
+        dictionary = []
+        encoded = array('i')
+        for value in values:
+            if value is None:
+                encoded.append(-1)
+                continue
+            if kind == 'json':
+                value = json.dumps(value, ensure_ascii=False, sort_keys=True)
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(dictionary)
+                dictionary.append(value)
+            encoded.append(code)
+        meta['dictionary'] = len(strings)
+        strings.append(dictionary)
+        data = encoded
+    return data, meta
+
+
+def _versions(path):
+    """Files written for ``path`` by write_columnar(), oldest first"""
+    directory, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    found = []
+    for entry in os.listdir(directory or '.'):
+        version = entry[len(stem) + 1:len(entry) - len(ext)]
+        if entry.startswith(f"{stem}.") and entry.endswith(ext) and version.isdigit():
+            found.append(entry)
+    return [os.path.join(directory, entry) for entry in sorted(found)]
+
+
+def current_columnar(path):
+    """File holding the newest cache written for ``path``, or None if there is none"""
+    try:
+        versions = _versions(path)
+    except OSError:
+        versions = []
+    if versions:
+        return versions[-1]
+    # A cache written before files were versioned
+    return path if os.path.exists(path) else None
+
+
+def delta_path(cache_path):
+    """Delta file holding rows changed since the cache file ``cache_path`` was written"""
+    return os.path.splitext(cache_path)[0] + '.delta'
+
+
+def _delta_value(kind, value):
+    # The value a round trip through write_columnar() would give back
+    if value in (None, ''):
+        return value
+    if kind == 'int':
+        return int(value)
+    if kind == 'float':
+        return float(value)
+    if kind == 'date':
+        return str(value)[:10]
+    if kind == 'time':
+        return _format_time(_parse_time(value), True)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def append_delta(cache_path, rows):
+    """Append changed schedule rows to the delta of ``cache_path``, one JSON line each
+
+    Rows are written in a single append, so a reader never sees half a
+    batch, and values are normalized to what the cache itself returns.
+    """
+    lines = []
+    for row in rows:
+        row = {name: _delta_value(SCHEDULE_COLUMNS.get(name), value) for name, value in row.items()}
+        lines.append(json.dumps(row, ensure_ascii=False, default=str).encode('utf-8') + b'\n')
+    with open(delta_path(cache_path), 'ab') as f:
+        f.write(b''.join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_delta(cache_path, offset=0):
+    """Rows appended to the delta of ``cache_path`` from byte ``offset`` on, and the offset to resume from
+
+    A line still being written is left for the next call.
+    """
+    try:
+        with open(delta_path(cache_path), 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except OSError:
+        return [], offset
+    end = data.rfind(b'\n') + 1
+    return [json.loads(line) for line in data[:end].splitlines() if line.strip()], offset + end
+
+
+def merge_delta(cache_path, rows):
+    """``rows`` read from ``cache_path`` with its delta applied, as plain dicts"""
+    merged = {}
+    for row in rows:
+        merged[row.get('schedule_id')] = dict(row)
+    for row in read_delta(cache_path)[0]:
+        merged[row.get('schedule_id')] = row
+    return list(merged.values())
+
+
+def write_columnar(path, rows):
+    """Write schedule rows for ``path`` in the column-oriented cache format
+
+    Every write goes to a new versioned file next to ``path`` (e.g.
+    ``cache.bin`` -> ``cache.<version>.bin``); current_columnar() finds
+    the newest. A file that a reader has mapped is never replaced, which
+    Windows refuses to do. Versions older than the previous one are
+    removed; one still mapped somewhere is left for a later write to
+    remove. Returns the new file's path.
+    """
+    names = []
+    for row in rows:
+        for name in row:
+            if name not in names:
+                names.append(name)
+
+    strings = []
+    columns = []
+    blocks = []
+    for name in names:
+        values = [row.get(name) for row in rows]
+        kind = SCHEDULE_COLUMNS.get(name) or _infer_kind(values)
+        data, meta = _encode_column(kind, values, strings)
+        columns.append(dict(meta, name=name, kind=kind))
+        blocks.append(data.tobytes())
+
+    header = {
+        'rows': len(rows),
+        'byteorder': sys.byteorder,
+        'columns': columns,
+        'dictionaries': strings,
+    }
+
+    # Column offsets depend on the header size, which depends on the offsets;
+    # reserve room for the offsets first and pad the header to a fixed length
+    for column in columns:
+        column['offset'] = 0
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    reserve = len(header_bytes) + 24 * len(columns) + ALIGN
+
+    def aligned(n):
+        return (n + ALIGN - 1) // ALIGN * ALIGN
+
+    offset = aligned(PREAMBLE.size + reserve)
+    for column, block in zip(columns, blocks):
+        column['offset'] = offset
+        offset = aligned(offset + len(block))
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8').ljust(reserve)
+
+    directory, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    version_path = os.path.join(directory, f"{stem}.{time.time_ns():020d}{ext}")
+    tmp_path = f"{version_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for column, block in zip(columns, blocks):
+            f.write(b'\0' * (column['offset'] - f.tell()))
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, version_path)
+
+    # Keep the previous version for readers that picked it just before this write
+    stale = [path]
+    for old in _versions(path)[:-2]:
+        stale.extend((old, delta_path(old)))
+    for old in stale:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    return version_path
+
+
+class ColumnarRow(Mapping):
+    """Read-only view of one schedule; values are decoded from the mapped columns on access"""
+
+    __slots__ = ('_store', '_pos')
+
+    def __init__(self, store, pos):
+        self._store = store
+        self._pos = pos
+
+    def __getitem__(self, name):
+        return self._store.value(name, self._pos)
+
+    def __iter__(self):
+        return iter(self._store.column_names)
+
+    def __len__(self):
+        return len(self._store.column_names)
+
+    def __repr__(self):
+        return f"ColumnarRow({dict(self)!r})"
+
+
+class ColumnarScheduleCache:
+    """Memory-mapped reader for files produced by write_columnar()
+
+    close() (or a ``with`` block) unmaps the file; rows read from the
+    cache can't be used after that. A cache that is never closed is
+    unmapped when the last reference to it, or to one of its rows, goes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_len = PREAMBLE.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} schedule cache")
+        header = json.loads(bytes(self._map[PREAMBLE.size:PREAMBLE.size + header_len]))
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError(f"{path} was written on a {header['byteorder']}-endian machine")
+
+        self.rows = header['rows']
+        self.column_names = [column['name'] for column in header['columns']]
+        self._dictionaries = header['dictionaries']
+        self._columns = {}
+        self._view = memoryview(self._map)
+        for column in header['columns']:
+            typecode = TYPECODES[column['kind']]
+            size = array(typecode).itemsize
+            start = column['offset']
+            data = self._view[start:start + size * self.rows].cast(typecode)
+            self._columns[column['name']] = (column, data)
+
+    def close(self):
+        if self._map is None:
+            return
+        # The mapping can only be closed once no views of it are left
+        for _, data in self._columns.values():
+            data.release()
+        self._view.release()
+        self._map.close()
+        self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.rows
+
+    def column(self, name):
+        """Raw column values (codes for dictionary-encoded columns) without decoding"""
+        return self._columns[name][1]
+
+    def value(self, name, pos):
+        column, data = self._columns[name]
+        raw = data[pos]
+        kind = column['kind']
+        if kind == 'float':
+            return None if math.isnan(raw) else raw
+        if kind == 'bool':
+            return None if raw < 0 else bool(raw)
+        if kind in ('str', 'json'):
+            if raw < 0:
+                return None
+            value = self._dictionaries[column['dictionary']][raw]
+            return json.loads(value) if kind == 'json' else value
+        if raw == INT_NULL:
+            return None
+        if kind == 'date':
+            return date.fromordinal(raw + EPOCH_ORDINAL).isoformat()
+        if kind == 'time':
+            return _format_time(raw, column.get('seconds', True))
+        return raw
+
+    def row(self, pos):
+        return ColumnarRow(self, pos)
+
+    def __iter__(self):
+        for pos in range(self.rows):
+            yield ColumnarRow(self, pos)
+
+    def to_dicts(self):
+        """Fully decoded rows, e.g. for a JSON export"""
+        return [dict(row) for row in self]
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+from mysql.connector import Error
+
+
+class PoolTimeoutError(Error):
+    """Raised when no pooled connection becomes free within the checkout timeout"""
+
+
+class PooledConnection:
+    """Wrapper handed out by the pool; close() returns the connection instead of dropping it"""
+
+    def __init__(self, pool, raw_conn, created_at):
+        self._pool = pool
+        self._conn = raw_conn
+        self._created_at = created_at
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        """Hand the connection back to the pool"""
+        if self._released:
+            return
+        self._released = True
+        self._pool.release(self._conn, self._created_at)
+
+
+class ConnectionPool:
+    """Bounded MySQL connection pool with stale checks and recycling"""
+
+    def __init__(self, connect_args, size=10, timeout=5.0, recycle=1800, validate_after=30):
+        self.connect_args = dict(connect_args)
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.validate_after = validate_after
+
+        self._lock = threading.Condition()
+        self._idle = deque()  # (raw_conn, created_at, returned_at)
+        self._in_use = 0
+
+        # Checkout wait statistics
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+
+    def _connect(self):
+        return mysql.connector.connect(**self.connect_args)
+
+    def _discard(self, raw_conn):
+        try:
+            raw_conn.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, raw_conn, created_at, returned_at, now):
+        """Decide whether an idle connection can be handed out again"""
+        if self.recycle and now - created_at > self.recycle:
+            return False
+        if self.validate_after is not None and now - returned_at >= self.validate_after:
+            try:
+                raw_conn.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def get_connection(self):
+        """Check out a connection, waiting up to the pool timeout for a free slot"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        with self._lock:
+            while not self._idle and self._in_use >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        msg=f"Timed out after {self.timeout}s waiting for a database connection"
+                    )
+                self._lock.wait(remaining)
+
+            candidate = self._idle.popleft() if self._idle else None
+            self._in_use += 1
+            self._record_wait(time.monotonic() - start)
+
+        # Validate or open outside the lock so slow network calls don't block other checkouts
+        try:
+            if candidate:
+                raw_conn, created_at, returned_at = candidate
+                if self._is_usable(raw_conn, created_at, returned_at, time.monotonic()):
+                    return PooledConnection(self, raw_conn, created_at)
+                self._discard(raw_conn)
+
+            raw_conn = self._connect()
+            return PooledConnection(self, raw_conn, time.monotonic())
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+
+    def release(self, raw_conn, created_at):
+        """Return a connection to the idle set, dropping it if it is broken or expired"""
+        reusable = True
+        try:
+            if raw_conn.in_transaction:
+                raw_conn.rollback()
+            reusable = raw_conn.is_connected()
+        except Exception:
+            reusable = False
+
+        now = time.monotonic()
+        if reusable and self.recycle and now - created_at > self.recycle:
+            reusable = False
+
+        if not reusable:
+            self._discard(raw_conn)
+
+        with self._lock:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append((raw_conn, created_at, now))
+            self._lock.notify()
+
+    def _record_wait(self, waited):
+        self._checkouts += 1
+        self._wait_total += waited
+        if waited > self._wait_max:
+            self._wait_max = waited
+
+    def get_stats(self):
+        """Snapshot of pool usage and checkout wait times"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'avg_wait_ms': (self._wait_total / self._checkouts * 1000) if self._checkouts else 0.0,
+                'max_wait_ms': self._wait_max * 1000
+            }
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for raw_conn, _, _ in idle:
+            self._discard(raw_conn)
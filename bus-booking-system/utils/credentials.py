@@ -0,0 +1,201 @@
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+LEGACY_SHA256_LENGTH = 64
+
+
+class HasherBusy(Exception):
+    """Too many password hashes already waiting for a worker"""
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def is_legacy_hash(encoded):
+    """Unsalted SHA-256 hex digest from before the KDF switch"""
+    return bool(encoded) and len(encoded) == LEGACY_SHA256_LENGTH and '$' not in encoded
+
+
+class PasswordHasher:
+    """Salted, tunable-cost password hashing (scrypt or PBKDF2-SHA256)
+
+    Hashes are stored as ``scrypt$n$r$p$salt$hash`` or
+    ``pbkdf2_sha256$iterations$salt$hash``, so the cost can be raised later
+    and old hashes still verify; needs_rehash() tells the login path when to
+    upgrade one. Legacy unsalted SHA-256 hex digests verify too and always
+    need a rehash.
+
+    The KDF is deliberately slow, so it runs on a small worker pool:
+    at most ``workers`` hashes are computed at once (hashlib releases the
+    GIL, so other requests keep being served) and at most ``max_waiting``
+    more queue up; beyond that hash()/verify() raise HasherBusy instead of
+    piling up request threads.
+    """
+
+    def __init__(self, algorithm='scrypt', scrypt_n=2 ** 14, scrypt_r=8, scrypt_p=1,
+                 pbkdf2_iterations=600000, workers=4, max_waiting=32, wait_timeout=10):
+        if algorithm not in ('scrypt', 'pbkdf2_sha256'):
+            raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.scrypt_n = scrypt_n
+        self.scrypt_r = scrypt_r
+        self.scrypt_p = scrypt_p
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self.wait_timeout = wait_timeout
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + max_waiting)
+
+    # ------------------------------------------------------------------
+    # KDFs (run on the worker pool)
+    # ------------------------------------------------------------------
+    def _scrypt(self, password, salt, n, r, p):
+        # scrypt needs 128 * r * n bytes; allow a little more than that
+        maxmem = 128 * r * (n + p + 2) + 1024 * 1024
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=32)
+
+    def _pbkdf2(self, password, salt, iterations):
+        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+
+    def _encode(self, password):
+        salt = os.urandom(16)
+        if self.algorithm == 'scrypt':
+            n, r, p = self.scrypt_n, self.scrypt_r, self.scrypt_p
+            return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(self._scrypt(password, salt, n, r, p))}"
+        iterations = self.pbkdf2_iterations
+        return f"pbkdf2_sha256${iterations}${_b64(salt)}${_b64(self._pbkdf2(password, salt, iterations))}"
+
+    def _check(self, password, encoded):
+        if is_legacy_hash(encoded):
+            legacy = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(legacy, encoded.lower())
+
+        parts = encoded.split('$')
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            derived = self._scrypt(password, _unb64(parts[4]), n, r, p)
+            return hmac.compare_digest(derived, _unb64(parts[5]))
+        if parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            derived = self._pbkdf2(password, _unb64(parts[2]), int(parts[1]))
+            return hmac.compare_digest(derived, _unb64(parts[3]))
+        return False
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise HasherBusy("Password hashing is overloaded, try again")
+        try:
+            return self._pool.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def hash(self, password):
+        """New salted hash of ``password`` with the current parameters"""
+        return self._run(self._encode, password)
+
+    def verify(self, password, encoded):
+        """True if ``password`` matches ``encoded`` (a KDF or legacy SHA-256 hash)"""
+        if not password or not encoded:
+            return False
+        try:
+            return self._run(self._check, password, encoded)
+        except (ValueError, TypeError):
+            # Malformed stored hash
+            return False
+
+    def needs_rehash(self, encoded):
+        """True for legacy hashes and hashes made with other algorithm/cost settings"""
+        if not encoded or is_legacy_hash(encoded):
+            return True
+        parts = encoded.split('$')
+        if self.algorithm == 'scrypt':
+            return parts[0] != 'scrypt' or parts[1:4] != [str(self.scrypt_n), str(self.scrypt_r), str(self.scrypt_p)]
+        return parts[0] != 'pbkdf2_sha256' or parts[1] != str(self.pbkdf2_iterations)
+
+    def calibrate(self, target_ms=250, rounds=3):
+        """Pick the cost whose single hash takes about ``target_ms`` on this machine
+
+        Returns the chosen parameters and the measured milliseconds; nothing
+        is changed, copy the numbers into config.py.
+        """
+        def measure(func, *args):
+            timings = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                func(*args)
+                timings.append((time.perf_counter() - started) * 1000)
+            return min(timings)
+
+        salt = os.urandom(16)
+        if self.algorithm == 'scrypt':
+            # Cost is a power of two: double n until one hash reaches the target
+            n = 2 ** 10
+            elapsed = measure(self._scrypt, 'calibration', salt, n, self.scrypt_r, self.scrypt_p)
+            while elapsed < target_ms and n < 2 ** 20:
+                n *= 2
+                elapsed = measure(self._scrypt, 'calibration', salt, n, self.scrypt_r, self.scrypt_p)
+            return {'algorithm': 'scrypt', 'scrypt_n': n, 'scrypt_r': self.scrypt_r,
+                    'scrypt_p': self.scrypt_p, 'ms': round(elapsed, 1)}
+
+        # PBKDF2 time is linear in the iteration count
+        sample = 100000
+        elapsed = measure(self._pbkdf2, 'calibration', salt, sample)
+        iterations = max(100000, int(sample * target_ms / elapsed) // 1000 * 1000)
+        elapsed = measure(self._pbkdf2, 'calibration', salt, iterations)
+        return {'algorithm': 'pbkdf2_sha256', 'pbkdf2_iterations': iterations, 'ms': round(elapsed, 1)}
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_hasher():
+    """Process-wide PasswordHasher built from Config, so every caller shares one worker pool"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = PasswordHasher(
+                    algorithm=Config.PASSWORD_HASH_ALGORITHM,
+                    scrypt_n=Config.PASSWORD_SCRYPT_N,
+                    scrypt_r=Config.PASSWORD_SCRYPT_R,
+                    scrypt_p=Config.PASSWORD_SCRYPT_P,
+                    pbkdf2_iterations=Config.PASSWORD_PBKDF2_ITERATIONS,
+                    workers=Config.PASSWORD_HASH_WORKERS,
+                    max_waiting=Config.PASSWORD_HASH_MAX_WAITING
+                )
+    return _default
+
+
+def main():
+    """python -m utils.credentials calibrate [--target-ms 250] [--algorithm scrypt]"""
+    parser = argparse.ArgumentParser(description='Password hashing maintenance')
+    parser.add_argument('command', choices=['calibrate'])
+    parser.add_argument('--target-ms', type=float, default=250, help='wanted time for one hash')
+    parser.add_argument('--algorithm', choices=['scrypt', 'pbkdf2_sha256'], default=Config.PASSWORD_HASH_ALGORITHM)
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(algorithm=args.algorithm, scrypt_r=Config.PASSWORD_SCRYPT_R,
+                            scrypt_p=Config.PASSWORD_SCRYPT_P, workers=1)
+    result = hasher.calibrate(args.target_ms)
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,393 +1,1027 @@
-import mysql.connector
-from mysql.connector import Error
-import hashlib
-from datetime import datetime
-
-class DatabaseHandler:
-    def __init__(self):
-        self.config = {
-            'host': 'localhost',
-            'user': 'root',
-            'password': '',  # XAMPP default is empty
-            'database': 'bus_booking_system',
-            'port': 3306,
-            'charset': 'utf8mb4'
-        }
-    
-    def check_connection(self):
-        """Check if MySQL database is accessible"""
-        try:
-            conn = mysql.connector.connect(**self.config)
-            if conn.is_connected():
-                conn.close()
-                return True
-        except Error:
-            pass
-        return False
-    
-    def get_connection(self):
-        """Establish database connection"""
-        try:
-            conn = mysql.connector.connect(**self.config)
-            return conn
-        except Error as e:
-            print(f"Database connection error: {e}")
-            return None
-    
-    def hash_password(self, password):
-        """Hash password for storage"""
-        return hashlib.sha256(password.encode()).hexdigest()
-    
-    def register_user(self, username, email, password, full_name, phone=None):
-        """Register a new user"""
-        conn = self.get_connection()
-        if not conn:
-            return False
-        
-        cursor = None
-        try:
-            cursor = conn.cursor()
-            hashed_pw = self.hash_password(password)
-            
-            query = """
-            INSERT INTO users (username, email, password_hash, full_name, phone)
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            
-            cursor.execute(query, (username, email, hashed_pw, full_name, phone))
-            conn.commit()
-            return cursor.lastrowid
-            
-        except Error as e:
-            print(f"Registration error: {e}")
-            return False
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-    
-    def authenticate_user(self, username, password):
-        """Authenticate user login"""
-        conn = self.get_connection()
-        if not conn:
-            return None
-        
-        cursor = None
-        try:
-            cursor = conn.cursor(dictionary=True)
-            hashed_pw = self.hash_password(password)
-            
-            query = """
-            SELECT user_id, username, email, full_name, is_admin 
-            FROM users 
-            WHERE username = %s AND password_hash = %s
-            """
-            
-            cursor.execute(query, (username, hashed_pw))
-            user = cursor.fetchone()
-            return user
-            
-        except Error as e:
-            print(f"Authentication error: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-    
-    def get_all_schedules(self):
-        """Get all schedules for caching"""
-        conn = self.get_connection()
-        if not conn:
-            return []
-        
-        cursor = None
-        try:
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """
-            SELECT s.*, r.route_name, r.origin_city, r.destination_city
-            FROM bus_schedules s
-            JOIN bus_routes r ON s.route_id = r.route_id
-            WHERE s.travel_date >= CURDATE()
-            ORDER BY s.travel_date, s.departure_time
-            """
-            
-            cursor.execute(query)
-            schedules = cursor.fetchall()
-            
-            # Convert datetime objects to strings
-            for schedule in schedules:
-                if 'travel_date' in schedule and schedule['travel_date']:
-                    schedule['travel_date'] = schedule['travel_date'].isoformat()
-                if 'departure_time' in schedule and schedule['departure_time']:
-                    if isinstance(schedule['departure_time'], str):
-                        schedule['departure_time'] = schedule['departure_time']
-                    else:
-                        schedule['departure_time'] = str(schedule['departure_time'])
-                if 'arrival_time' in schedule and schedule['arrival_time']:
-                    if isinstance(schedule['arrival_time'], str):
-                        schedule['arrival_time'] = schedule['arrival_time']
-                    else:
-                        schedule['arrival_time'] = str(schedule['arrival_time'])
-            
-            return schedules
-            
-        except Error as e:
-            print(f"Get schedules error: {e}")
-            return []
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-    
-    def search_schedules(self, origin, destination, travel_date):
-        """Search for available bus schedules"""
-        conn = self.get_connection()
-        if not conn:
-            return []
-        
-        cursor = None
-        try:
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """
-            SELECT s.*, r.route_name, r.origin_city, r.destination_city
-            FROM bus_schedules s
-            JOIN bus_routes r ON s.route_id = r.route_id
-            WHERE LOWER(r.origin_city) LIKE LOWER(%s)
-            AND LOWER(r.destination_city) LIKE LOWER(%s)
-            AND s.travel_date = %s
-            AND s.available_seats > 0
-            ORDER BY s.departure_time
-            """
-            
-            cursor.execute(query, (f"%{origin}%", f"%{destination}%", travel_date))
-            schedules = cursor.fetchall()
-            
-            # Format dates and times
-            for schedule in schedules:
-                if 'travel_date' in schedule:
-                    schedule['travel_date'] = schedule['travel_date'].isoformat()
-            
-            return schedules
-            
-        except Error as e:
-            print(f"Search error: {e}")
-            return []
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-    
-    def get_schedule_details(self, schedule_id):
-        """Get details for a specific schedule"""
-        conn = self.get_connection()
-        if not conn:
-            return None
-        
-        cursor = None
-        try:
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """
-            SELECT s.*, r.route_name, r.origin_city, r.destination_city
-            FROM bus_schedules s
-            JOIN bus_routes r ON s.route_id = r.route_id
-            WHERE s.schedule_id = %s
-            """
-            
-            cursor.execute(query, (schedule_id,))
-            schedule = cursor.fetchone()
-            
-            if schedule and 'travel_date' in schedule:
-                schedule['travel_date'] = schedule['travel_date'].isoformat()
-            
-            return schedule
-            
-        except Error as e:
-            print(f"Get schedule error: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-    
-    def create_booking(self, user_id, schedule_id, passenger_name, 
-                      passenger_age, passenger_gender, seat_count, booking_ref):
-        """Create a new booking"""
-        conn = self.get_connection()
-        if not conn:
-            return {'success': False, 'message': 'Database connection failed'}
-        
-        cursor = None
-        try:
-            cursor = conn.cursor(dictionary=True)
-            
-            # Check seat availability
-            cursor.execute(
-                "SELECT available_seats, fare FROM bus_schedules WHERE schedule_id = %s FOR UPDATE",
-                (schedule_id,)
-            )
-            schedule = cursor.fetchone()
-            
-            if not schedule:
-                return {'success': False, 'message': 'Schedule not found'}
-            
-            if schedule['available_seats'] < seat_count:
-                return {'success': False, 'message': 'Not enough seats available'}
-            
-            # Calculate total fare
-            total_fare = schedule['fare'] * seat_count
-            
-            # Generate seat numbers
-            seat_numbers = ", ".join([f"Seat-{i+1}" for i in range(seat_count)])
-            
-            # Create booking
-            booking_query = """
-            INSERT INTO bookings 
-            (user_id, schedule_id, booking_reference, passenger_name, passenger_age, 
-             passenger_gender, seat_numbers, total_fare, booking_status)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'Confirmed')
-            """
-            
-            cursor.execute(booking_query, (
-                user_id, schedule_id, booking_ref, passenger_name, passenger_age,
-                passenger_gender, seat_numbers, total_fare
-            ))
-            
-            # Update available seats
-            cursor.execute(
-                "UPDATE bus_schedules SET available_seats = available_seats - %s WHERE schedule_id = %s",
-                (seat_count, schedule_id)
-            )
-            
-            conn.commit()
-            return {
-                'success': True, 
-                'booking_ref': booking_ref, 
-                'total_fare': total_fare,
-                'booking_id': cursor.lastrowid
-            }
-            
-        except Error as e:
-            if conn:
-                conn.rollback()
-            print(f"Booking error: {e}")
-            return {'success': False, 'message': f'Booking failed: {str(e)}'}
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-    
-    def get_user_bookings(self, user_id):
-        """Get all bookings for a user"""
-        conn = self.get_connection()
-        if not conn:
-            return []
-        
-        cursor = None
-        try:
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """
-            SELECT b.*, s.bus_number, s.departure_time, s.arrival_time, s.travel_date,
-                   r.route_name, r.origin_city, r.destination_city
-            FROM bookings b
-            JOIN bus_schedules s ON b.schedule_id = s.schedule_id
-            JOIN bus_routes r ON s.route_id = r.route_id
-            WHERE b.user_id = %s
-            ORDER BY b.booking_date DESC
-            """
-            
-            cursor.execute(query, (user_id,))
-            bookings = cursor.fetchall()
-            
-            # Format dates
-            for booking in bookings:
-                if 'booking_date' in booking:
-                    booking['booking_date'] = booking['booking_date'].isoformat()
-                if 'travel_date' in booking:
-                    booking['travel_date'] = booking['travel_date'].isoformat()
-                booking['is_offline'] = False
-            
-            return bookings
-            
-        except Error as e:
-            print(f"Get bookings error: {e}")
-            return []
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-    
-    def get_admin_stats(self):
-        """Get statistics for admin panel"""
-        conn = self.get_connection()
-        if not conn:
-            return {}
-        
-        cursor = None
-        try:
-            cursor = conn.cursor(dictionary=True)
-            stats = {}
-            
-            # Total bookings
-            cursor.execute("SELECT COUNT(*) as total FROM bookings")
-            stats['total_bookings'] = cursor.fetchone()['total']
-            
-            # Total users
-            cursor.execute("SELECT COUNT(*) as total FROM users")
-            stats['total_users'] = cursor.fetchone()['total']
-            
-            # Today's bookings
-            cursor.execute("""
-                SELECT COUNT(*) as total FROM bookings 
-                WHERE DATE(booking_date) = CURDATE()
-            """)
-            stats['today_bookings'] = cursor.fetchone()['total']
-            
-            # Total revenue
-            cursor.execute("""
-                SELECT COALESCE(SUM(total_fare), 0) as revenue 
-                FROM bookings 
-                WHERE booking_status = 'Confirmed'
-            """)
-            stats['revenue'] = float(cursor.fetchone()['revenue'])
-            
-            # Available schedules
-            cursor.execute("SELECT COUNT(*) as total FROM bus_schedules WHERE travel_date >= CURDATE()")
-            stats['active_schedules'] = cursor.fetchone()['total']
-            
-            # Recent bookings
-            cursor.execute("""
-                SELECT b.booking_reference, u.username, b.passenger_name, b.total_fare, b.booking_date
-                FROM bookings b
-                JOIN users u ON b.user_id = u.user_id
-                ORDER BY b.booking_date DESC
-                LIMIT 5
-            """)
-            stats['recent_bookings'] = cursor.fetchall()
-            
-            # Format dates in recent bookings
-            for booking in stats['recent_bookings']:
-                if 'booking_date' in booking:
-                    booking['booking_date'] = booking['booking_date'].isoformat()
-            
-            return stats
-            
-        except Error as e:
-            print(f"Stats error: {e}")
-            return {}
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
+import mysql.connector
+from mysql.connector import Error
+import uuid
+from datetime import datetime
+
+from config import Config
+from utils.admin_stats import AdminStats
+from utils.analytics_store import AnalyticsStore
+from utils.connection_pool import ConnectionPool
+from utils.credentials import HasherBusy, get_hasher
+from utils.health_monitor import HealthMonitor
+from utils.metrics import get_metrics
+from utils.place_index import BARANGAY, CITY, HUB, PROVINCE
+from utils.replica_router import Replica, ReplicaRouter
+from utils.response_cache import ResponseCache, schedule_key, search_key
+from utils.schedule_index import ScheduleIndex
+from utils.seat_inventory import SeatInventory, format_seats
+
+POOL_SETTINGS = ('pool_size', 'pool_timeout', 'pool_recycle', 'pool_validate_after')
+INSTRUMENTED_METHODS = (
+    'register_user', 'authenticate_user', 'get_all_schedules', 'get_schedules_changed_since',
+    'search_schedules', 'get_places', 'get_schedule_details', 'hold_seats', 'get_seat_map',
+    'create_booking', 'create_group_booking', 'get_user_bookings_page', 'get_user_bookings', 'get_admin_stats'
+)
+
+class DatabaseHandler:
+    def __init__(self, db_config=None, start_monitor=True, pool=None, replicas=None):
+        db_config = dict(db_config or Config.DB_CONFIG)
+        self.config = {k: v for k, v in db_config.items() if k not in POOL_SETTINGS}
+        self.config.setdefault('charset', 'utf8mb4')
+        self.metrics = get_metrics()
+        
+        # ``pool`` replaces the MySQL pool with anything offering get_connection()
+        # and get_stats(), e.g. the in-process stand-in used by the benchmarks
+        self._external_pool = pool is not None
+        self.pool = pool or ConnectionPool(
+            self.config,
+            size=db_config.get('pool_size', 10),
+            timeout=db_config.get('pool_timeout', 5),
+            recycle=db_config.get('pool_recycle', 1800),
+            validate_after=db_config.get('pool_validate_after', 30)
+        )
+        
+        # Read replicas (Config.DB_REPLICAS unless given); writes always use the pool above
+        replicas = Config.DB_REPLICAS if replicas is None else replicas
+        self.router = ReplicaRouter(
+            [self._make_replica(number, replica, db_config) for number, replica in enumerate(replicas)],
+            max_lag=Config.REPLICA_MAX_LAG,
+            check_interval=Config.REPLICA_LAG_CHECK_INTERVAL,
+            sticky_window=Config.READ_YOUR_WRITES_WINDOW,
+            metrics=self.metrics
+        )
+        if start_monitor:
+            self.router.start()
+        
+        self.monitor = HealthMonitor(
+            self._probe_connection,
+            interval=Config.HEALTH_CHECK_INTERVAL,
+            max_backoff=Config.HEALTH_CHECK_MAX_BACKOFF
+        )
+        if start_monitor:
+            self.monitor.start()
+        
+        self.schedule_index = ScheduleIndex(
+            loader=self._load_indexed_schedules,
+            reloader=self._load_indexed_schedules,
+            ttl=Config.SCHEDULE_INDEX_TTL,
+            window_days=Config.SCHEDULE_INDEX_WINDOW_DAYS,
+            poller=lambda since: self._load_indexed_schedules(since=since),
+            poll_interval=Config.SCHEDULE_INDEX_POLL_INTERVAL,
+            poll_overlap=Config.SCHEDULE_INDEX_POLL_OVERLAP,
+            on_change=lambda schedule_ids: self.response_cache.invalidate_schedules(schedule_ids)
+        )
+        
+        self.response_cache = ResponseCache(
+            max_entries=Config.RESPONSE_CACHE_SIZE,
+            ttl=Config.RESPONSE_CACHE_TTL,
+            max_age=Config.RESPONSE_CACHE_MAX_AGE
+        )
+        
+        self.seat_inventory = SeatInventory(
+            self.get_connection,
+            hold_ttl=Config.SEAT_HOLD_TTL,
+            sweep_interval=Config.SEAT_HOLD_SWEEP_INTERVAL,
+            map_ttl=Config.SEAT_MAP_TTL
+        )
+        if start_monitor:
+            self.seat_inventory.start()
+        
+        self.admin_stats = AdminStats(
+            self.get_connection,
+            slots=Config.STATS_COUNTER_SLOTS,
+            cache_ttl=Config.STATS_CACHE_TTL,
+            reconcile_interval=Config.STATS_RECONCILE_INTERVAL
+        )
+        if start_monitor:
+            self.admin_stats.start()
+        
+        self.analytics = AnalyticsStore(self.get_connection, flush_interval=Config.ANALYTICS_FLUSH_INTERVAL)
+        if start_monitor:
+            self.analytics.start()
+        
+        # Timings for the request-facing methods; SQL is timed in get_connection()
+        self.metrics.instrument(self, 'database', INSTRUMENTED_METHODS)
+        self.metrics.register_gauge('busbooking_db_online', lambda handler: int(handler.check_connection()), self)
+        self.metrics.register_gauge('busbooking_db_pool', lambda handler: [
+            ({'stat': key}, value) for key, value in handler.get_pool_stats().items()
+            if isinstance(value, (int, float))
+        ], self)
+    
+    def close(self):
+        """Stop the background threads and take this handler's gauges out of the metrics registry"""
+        self.monitor.stop()
+        self.router.stop()
+        self.seat_inventory.stop()
+        self.admin_stats.stop()
+        self.analytics.stop()
+        self.metrics.unregister_gauges(self)
+        self.metrics.unregister_gauges(self.router)
+    
+    def _make_replica(self, number, replica, db_config):
+        """Replica for one DB_REPLICAS entry: settings overriding DB_CONFIG, or a ready-made pool"""
+        if hasattr(replica, 'get_connection'):
+            return Replica(f"replica{number + 1}", replica)
+        settings = dict(db_config, **replica)
+        name = settings.pop('name', None) or f"{settings.get('host')}:{settings.get('port', 3306)}"
+        connect_args = {k: v for k, v in settings.items() if k not in POOL_SETTINGS}
+        connect_args.setdefault('charset', 'utf8mb4')
+        return Replica(name, ConnectionPool(
+            connect_args,
+            size=settings.get('pool_size', 10),
+            timeout=settings.get('pool_timeout', 5),
+            recycle=settings.get('pool_recycle', 1800),
+            validate_after=settings.get('pool_validate_after', 30)
+        ))
+    
+    def _probe_connection(self):
+        """Open a short-lived connection; only called from the health monitor thread"""
+        if self._external_pool:
+            try:
+                self.pool.get_connection().close()
+                return True
+            except Error:
+                return False
+        try:
+            conn = mysql.connector.connect(
+                connection_timeout=Config.HEALTH_CHECK_TIMEOUT, **self.config
+            )
+            if conn.is_connected():
+                conn.close()
+                return True
+        except Error:
+            pass
+        return False
+    
+    def check_connection(self):
+        """Check if MySQL database is accessible (cached by the health monitor)"""
+        return self.monitor.is_online()
+    
+    def get_connection_status(self):
+        """Cached online/offline state with last-changed and last-checked timestamps"""
+        return self.monitor.get_status()
+    
+    def get_connection(self):
+        """Check out a pooled database connection (close() returns it to the pool)"""
+        try:
+            return self.metrics.wrap_connection(self.pool.get_connection())
+        except Error as e:
+            print(f"Database connection error: {e}")
+            self.monitor.request_probe()
+            return None
+    
+    def get_read_connection(self, user_id=None):
+        """Connection for a read that may be up to REPLICA_MAX_LAG stale: a healthy replica, else the primary
+        
+        ``user_id``'s reads stay on the primary for a short while after they
+        write (see note_write()).
+        """
+        replica = self.router.choose(user_id)
+        if replica is not None:
+            try:
+                conn = self.metrics.wrap_connection(replica.pool.get_connection())
+                self.metrics.inc('busbooking_db_reads_total', target='replica')
+                return conn
+            except Error as e:
+                self.router.mark_failed(replica, e)
+        self.metrics.inc('busbooking_db_reads_total', target='primary')
+        return self.get_connection()
+    
+    def note_write(self, user_id):
+        """Keep ``user_id``'s reads on the primary until replicas have their write"""
+        self.router.note_write(user_id)
+    
+    def get_pool_stats(self):
+        """Connection pool usage: in-use/idle counts and checkout wait times"""
+        return self.pool.get_stats()
+    
+    def hash_password(self, password):
+        """Hash password for storage (salted KDF, computed on the shared hashing pool)"""
+        return get_hasher().hash(password)
+    
+    def register_user(self, username, email, password, full_name, phone=None):
+        """Register a new user"""
+        # Hash before checking out a connection so the slow KDF doesn't hold one
+        try:
+            hashed_pw = self.hash_password(password)
+        except HasherBusy as e:
+            print(f"Registration error: {e}")
+            return False
+        
+        conn = self.get_connection()
+        if not conn:
+            return False
+        
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            
+            query = """
+            INSERT INTO users (username, email, password_hash, full_name, phone)
+            VALUES (%s, %s, %s, %s, %s)
+            """
+            
+            cursor.execute(query, (username, email, hashed_pw, full_name, phone))
+            user_id = cursor.lastrowid
+            self.admin_stats.record_users(cursor)
+            conn.commit()
+            return user_id
+            
+        except Error as e:
+            print(f"Registration error: {e}")
+            return False
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def authenticate_user(self, username, password):
+        """Authenticate user login
+        
+        The password is checked after the connection is back in the pool, so
+        the slow KDF never holds one. Legacy SHA-256 hashes (and hashes with
+        an outdated cost) are replaced with a fresh one on success.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            query = """
+            SELECT user_id, username, email, full_name, is_admin, password_hash 
+            FROM users 
+            WHERE username = %s
+            """
+            
+            cursor.execute(query, (username,))
+            user = cursor.fetchone()
+            
+        except Error as e:
+            print(f"Authentication error: {e}")
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+        
+        if not user:
+            return None
+        
+        stored_hash = user.pop('password_hash')
+        hasher = get_hasher()
+        try:
+            if not hasher.verify(password, stored_hash):
+                return None
+        except HasherBusy as e:
+            print(f"Authentication error: {e}")
+            return None
+        
+        # The upgrade is opportunistic: if the hasher is too busy now, the next login does it
+        try:
+            if hasher.needs_rehash(stored_hash):
+                self._rehash_password(user['user_id'], stored_hash, hasher.hash(password))
+        except HasherBusy as e:
+            print(f"Password rehash skipped: {e}")
+        return user
+    
+    def _rehash_password(self, user_id, old_hash, new_hash):
+        """Swap in an upgraded hash, unless the password was changed meanwhile"""
+        conn = self.get_connection()
+        if not conn:
+            return False
+        
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE users SET password_hash = %s WHERE user_id = %s AND password_hash = %s",
+                (new_hash, user_id, old_hash)
+            )
+            conn.commit()
+            return True
+            
+        except Error as e:
+            print(f"Password rehash error: {e}")
+            return False
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def _format_schedule(self, schedule):
+        """Convert date/time columns of a schedule row to strings for caching"""
+        if 'travel_date' in schedule and schedule['travel_date']:
+            schedule['travel_date'] = schedule['travel_date'].isoformat()
+        for field in ('departure_time', 'arrival_time'):
+            if field in schedule and schedule[field] and not isinstance(schedule[field], str):
+                schedule[field] = str(schedule[field])
+        if schedule.get('updated_at') and not isinstance(schedule['updated_at'], str):
+            schedule['updated_at'] = schedule['updated_at'].isoformat()
+        return schedule
+    
+    def get_all_schedules(self):
+        """Get all schedules for caching"""
+        conn = self.get_read_connection()
+        if not conn:
+            return []
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            query = """
+            SELECT s.*, r.route_name, r.origin_city, r.destination_city
+            FROM bus_schedules s
+            JOIN bus_routes r ON s.route_id = r.route_id
+            WHERE s.travel_date >= CURDATE()
+            ORDER BY s.travel_date, s.departure_time
+            """
+            
+            cursor.execute(query)
+            schedules = cursor.fetchall()
+            
+            # Convert datetime objects to strings
+            for schedule in schedules:
+                self._format_schedule(schedule)
+            
+            return schedules
+            
+        except Error as e:
+            print(f"Get schedules error: {e}")
+            return []
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def _load_indexed_schedules(self, schedule_ids=None, since=None):
+        """Load rows for the schedule index: the whole window, just ``schedule_ids``,
+        or the window's rows updated at or after ``since``
+        
+        Returns None on failure so the index keeps serving what it has.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            query = """
+            SELECT s.*, r.route_name, r.origin_city, r.destination_city
+            FROM bus_schedules s
+            JOIN bus_routes r ON s.route_id = r.route_id
+            """
+            if schedule_ids:
+                placeholders = ", ".join(["%s"] * len(schedule_ids))
+                query += f" WHERE s.schedule_id IN ({placeholders})"
+                params = tuple(schedule_ids)
+            else:
+                query += " WHERE s.travel_date BETWEEN CURDATE() AND CURDATE() + INTERVAL %s DAY"
+                params = (Config.SCHEDULE_INDEX_WINDOW_DAYS,)
+                if since is not None:
+                    # Served by idx_updated_at
+                    query += " AND s.updated_at >= %s"
+                    params += (since,)
+            
+            cursor.execute(query, params)
+            schedules = cursor.fetchall()
+            
+            for schedule in schedules:
+                if schedule.get('travel_date'):
+                    schedule['travel_date'] = schedule['travel_date'].isoformat()
+            
+            return schedules
+            
+        except Error as e:
+            print(f"Schedule index load error: {e}")
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def invalidate_schedule(self, schedule_id):
+        """Mark a schedule's cached search data stale after its seats change"""
+        self.schedule_index.invalidate(schedule_id)
+        self.response_cache.invalidate_schedules([schedule_id])
+    
+    def get_schedules_changed_since(self, since=None):
+        """Upcoming schedules modified at or after ``since`` (all upcoming when None)
+        
+        Returns (schedules, high_water_mark) where the mark is the newest
+        ``updated_at`` seen, or None on failure.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return [], None
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            query = """
+            SELECT s.*, r.route_name, r.origin_city, r.destination_city
+            FROM bus_schedules s
+            JOIN bus_routes r ON s.route_id = r.route_id
+            WHERE s.travel_date >= CURDATE()
+            """
+            params = ()
+            if since:
+                query += " AND s.updated_at >= %s"
+                params = (since,)
+            query += " ORDER BY s.updated_at"
+            
+            cursor.execute(query, params)
+            schedules = cursor.fetchall()
+            
+            high_water_mark = since
+            if schedules and schedules[-1].get('updated_at'):
+                high_water_mark = schedules[-1]['updated_at']
+            
+            for schedule in schedules:
+                self._format_schedule(schedule)
+            
+            return schedules, high_water_mark
+            
+        except Error as e:
+            print(f"Get changed schedules error: {e}")
+            return [], None
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def search_schedules(self, origin, destination, travel_date, user_id=None, primary=False):
+        """Search for available bus schedules
+        
+        Searches the index can't answer go to a replica unless ``primary``
+        is set (results that get cached must come from the primary).
+        """
+        # Served from the in-memory index for dates inside its window
+        schedules = self.schedule_index.search(origin, destination, travel_date)
+        if schedules is not None:
+            self.metrics.inc('busbooking_schedule_index_lookups_total', result='hit')
+            return schedules
+        self.metrics.inc('busbooking_schedule_index_lookups_total', result='miss')
+        
+        conn = self.get_connection() if primary else self.get_read_connection(user_id)
+        if not conn:
+            return []
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            query = """
+            SELECT s.*, r.route_name, r.origin_city, r.destination_city
+            FROM bus_schedules s
+            JOIN bus_routes r ON s.route_id = r.route_id
+            WHERE LOWER(r.origin_city) LIKE LOWER(%s)
+            AND LOWER(r.destination_city) LIKE LOWER(%s)
+            AND s.travel_date = %s
+            AND s.available_seats > 0
+            ORDER BY s.departure_time
+            """
+            
+            cursor.execute(query, (f"%{origin}%", f"%{destination}%", travel_date))
+            schedules = cursor.fetchall()
+            
+            # Format dates and times
+            for schedule in schedules:
+                if 'travel_date' in schedule:
+                    schedule['travel_date'] = schedule['travel_date'].isoformat()
+            
+            return schedules
+            
+        except Error as e:
+            print(f"Search error: {e}")
+            return []
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def get_search_response(self, origin, destination, travel_date):
+        """search_schedules() through the response cache; an entry for ResponseCache.respond()"""
+        key = search_key(origin, destination, travel_date)
+        entry = self.response_cache.get(key)
+        if entry is None:
+            since = self.response_cache.generation()
+            entry = self.response_cache.put(
+                key, self.search_schedules(origin, destination, travel_date, primary=True), since
+            )
+        return entry
+    
+    def get_places(self):
+        """Cities, provinces and barangays with display labels, for the autocomplete index"""
+        conn = self.get_read_connection()
+        if not conn:
+            return []
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            places = []
+            
+            cursor.execute("""
+            SELECT c.name, c.is_major_transport_hub, p.province_name
+            FROM cities_municipalities c
+            JOIN provinces p ON c.province_id = p.province_id
+            """)
+            for row in cursor.fetchall():
+                places.append({
+                    'name': row['name'],
+                    'label': f"{row['name']}, {row['province_name']}",
+                    'tier': HUB if row['is_major_transport_hub'] else CITY
+                })
+            
+            cursor.execute("""
+            SELECT p.province_name, r.region_name
+            FROM provinces p
+            JOIN regions r ON p.region_id = r.region_id
+            """)
+            for row in cursor.fetchall():
+                places.append({
+                    'name': row['province_name'],
+                    'label': f"{row['province_name']} ({row['region_name']})",
+                    'tier': PROVINCE
+                })
+            
+            cursor.execute("""
+            SELECT b.name, c.name AS city_name
+            FROM barangays b
+            JOIN cities_municipalities c ON b.city_muni_id = c.city_muni_id
+            """)
+            for row in cursor.fetchall():
+                places.append({
+                    'name': row['name'],
+                    'label': f"{row['name']}, {row['city_name']}",
+                    'tier': BARANGAY
+                })
+            
+            return places
+            
+        except Error as e:
+            print(f"Get places error: {e}")
+            return []
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def get_schedule_details(self, schedule_id):
+        """Get details for a specific schedule"""
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            query = """
+            SELECT s.*, r.route_name, r.origin_city, r.destination_city
+            FROM bus_schedules s
+            JOIN bus_routes r ON s.route_id = r.route_id
+            WHERE s.schedule_id = %s
+            """
+            
+            cursor.execute(query, (schedule_id,))
+            schedule = cursor.fetchone()
+            
+            if schedule and 'travel_date' in schedule:
+                schedule['travel_date'] = schedule['travel_date'].isoformat()
+            
+            return schedule
+            
+        except Error as e:
+            print(f"Get schedule error: {e}")
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def get_schedule_response(self, schedule_id):
+        """get_schedule_details() through the response cache; ``entry['data']`` is None if not found"""
+        key = schedule_key(schedule_id)
+        entry = self.response_cache.get(key)
+        if entry is None:
+            since = self.response_cache.generation()
+            entry = self.response_cache.put(key, self.get_schedule_details(schedule_id), since)
+        return entry
+    
+    def hold_seats(self, schedule_id, seat_count, seat_numbers=None):
+        """Hold seats while the booking form is filled out; pass the hold_token to create_booking"""
+        return self.seat_inventory.hold_seats(schedule_id, seat_count, seat_numbers)
+    
+    def release_seat_hold(self, hold_token):
+        """Give back seats held for an abandoned booking form"""
+        return self.seat_inventory.release_hold(hold_token)
+    
+    def get_seat_map(self, schedule_id):
+        """Per-seat availability of a schedule"""
+        return self.seat_inventory.get_seat_map(schedule_id)
+    
+    def create_booking(self, user_id, schedule_id, passenger_name, 
+                      passenger_age, passenger_gender, seat_count, booking_ref, hold_token=None):
+        """Create a new booking"""
+        conn = self.get_connection()
+        if not conn:
+            return {'success': False, 'message': 'Database connection failed'}
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            # Plain read: the seat rows decide whether the booking fits, so
+            # bookings on one bus only wait for each other on the seats they take
+            cursor.execute(
+                "SELECT available_seats, fare FROM bus_schedules WHERE schedule_id = %s",
+                (schedule_id,)
+            )
+            schedule = cursor.fetchone()
+            
+            if not schedule:
+                return {'success': False, 'message': 'Schedule not found'}
+            
+            if schedule['available_seats'] < seat_count:
+                return {'success': False, 'message': 'Not enough seats available'}
+            
+            # Calculate total fare
+            total_fare = schedule['fare'] * seat_count
+            
+            # Take the held seats, or any free ones if the hold has run out
+            seats = None
+            if hold_token:
+                seats = self.seat_inventory.book_seats(cursor, schedule_id, seat_count, booking_ref, hold_token)
+            if seats is None:
+                seats = self.seat_inventory.book_seats(cursor, schedule_id, seat_count, booking_ref)
+            if seats is None:
+                conn.rollback()
+                if hold_token:
+                    self.seat_inventory.release_hold(hold_token)
+                return {'success': False, 'message': 'Not enough seats available'}
+            seat_numbers = format_seats(seats)
+            
+            # Create booking
+            booking_query = """
+            INSERT INTO bookings 
+            (user_id, schedule_id, booking_reference, passenger_name, passenger_age, 
+             passenger_gender, seat_numbers, total_fare, booking_status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'Confirmed')
+            """
+            
+            cursor.execute(booking_query, (
+                user_id, schedule_id, booking_ref, passenger_name, passenger_age,
+                passenger_gender, seat_numbers, total_fare
+            ))
+            
+            booking_id = cursor.lastrowid
+            
+            self.admin_stats.record_bookings(cursor, [(datetime.now(), total_fare)])
+            
+            conn.commit()
+            self.apply_seat_counts({schedule_id: seat_count})
+            self.note_write(user_id)
+            self.seat_inventory.mark_booked(schedule_id, seats)
+            self.analytics.record_booking(schedule_id, seat_count, total_fare)
+            self.invalidate_schedule(schedule_id)
+            return {
+                'success': True, 
+                'booking_ref': booking_ref, 
+                'total_fare': total_fare,
+                'seat_numbers': seat_numbers,
+                'booking_id': booking_id
+            }
+            
+        except Error as e:
+            if conn:
+                conn.rollback()
+            print(f"Booking error: {e}")
+            return {'success': False, 'message': f'Booking failed: {str(e)}'}
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def apply_seat_counts(self, taken):
+        """Take booked seats off ``available_seats`` in a short transaction of its own
+        
+        ``taken`` maps schedule_id -> seats booked. Called after the booking
+        commits, so the booking transaction never locks the schedule row and
+        the counter (read by search) lags the seat rows by this one statement.
+        Decrements commute, so concurrent bookings can apply them in any order.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return False
+        
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            for schedule_id, seats in sorted(taken.items()):
+                cursor.execute(
+                    "UPDATE bus_schedules SET available_seats = "
+                    "CASE WHEN available_seats > %s THEN available_seats - %s ELSE 0 END "
+                    "WHERE schedule_id = %s",
+                    (seats, seats, schedule_id)
+                )
+            conn.commit()
+            return True
+            
+        except Error as e:
+            conn.rollback()
+            print(f"Seat count error: {e}")
+            return False
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def generate_booking_ref(self):
+        """Unique booking reference, e.g. BK241215A1B2C3D4"""
+        return f"BK{datetime.now():%y%m%d}{uuid.uuid4().hex[:8].upper()}"
+    
+    def create_group_booking(self, user_id, legs):
+        """Book several passengers on one or more schedules in a single transaction
+        
+        ``legs`` is a list of ``{'schedule_id', 'passengers', 'hold_token'}``
+        dicts (e.g. outbound and return), where each passenger is a dict with
+        ``passenger_name``, ``passenger_age``, ``passenger_gender`` and an
+        optional ``booking_reference``. Every passenger gets one seat and one
+        booking row. Either all bookings are made or none are.
+        """
+        legs = [leg for leg in legs if leg.get('passengers')]
+        if not legs:
+            return {'success': False, 'message': 'No passengers to book'}
+        
+        conn = self.get_connection()
+        if not conn:
+            self._release_holds(legs)
+            return {'success': False, 'message': 'Database connection failed'}
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            # Claim seats schedule by schedule in id order, so two group bookings
+            # sharing schedules lock seat rows in the same order and can't deadlock
+            legs = sorted(legs, key=lambda leg: int(leg['schedule_id']))
+            schedule_ids = sorted({int(leg['schedule_id']) for leg in legs})
+            
+            cursor.execute(
+                f"SELECT schedule_id, available_seats, fare FROM bus_schedules "
+                f"WHERE schedule_id IN ({', '.join(['%s'] * len(schedule_ids))})",
+                tuple(schedule_ids)
+            )
+            schedules = {row['schedule_id']: row for row in cursor.fetchall()}
+            
+            needed = {}
+            for leg in legs:
+                schedule_id = int(leg['schedule_id'])
+                needed[schedule_id] = needed.get(schedule_id, 0) + len(leg['passengers'])
+            for schedule_id in schedule_ids:
+                schedule = schedules.get(schedule_id)
+                if not schedule:
+                    self._release_holds(legs)
+                    return {'success': False, 'message': f'Schedule {schedule_id} not found'}
+                if schedule['available_seats'] < needed[schedule_id]:
+                    self._release_holds(legs)
+                    return {'success': False, 'message': f'Not enough seats available on schedule {schedule_id}'}
+            
+            rows = []
+            bookings = []
+            booked_seats = []
+            for leg in legs:
+                schedule_id = int(leg['schedule_id'])
+                passengers = leg['passengers']
+                refs = [p.get('booking_reference') or self.generate_booking_ref() for p in passengers]
+                requests = [(ref, 1) for ref in refs]
+                
+                seats = None
+                if leg.get('hold_token'):
+                    seats = self.seat_inventory.book_seats_for_batch(
+                        cursor, schedule_id, requests, leg['hold_token']
+                    )
+                if seats is None:
+                    seats = self.seat_inventory.book_seats_for_batch(cursor, schedule_id, requests)
+                if seats is None:
+                    conn.rollback()
+                    self._release_holds(legs)
+                    return {'success': False, 'message': f'Not enough seats available on schedule {schedule_id}'}
+                
+                fare = schedules[schedule_id]['fare']
+                for passenger, ref, seat in zip(passengers, refs, seats):
+                    seat_numbers = format_seats(seat)
+                    rows.append((
+                        user_id, schedule_id, ref, passenger['passenger_name'],
+                        passenger.get('passenger_age'), passenger.get('passenger_gender'),
+                        seat_numbers, fare
+                    ))
+                    bookings.append({
+                        'booking_ref': ref,
+                        'schedule_id': schedule_id,
+                        'passenger_name': passenger['passenger_name'],
+                        'seat_numbers': seat_numbers,
+                        'total_fare': fare
+                    })
+                    booked_seats.append((schedule_id, seat))
+            
+            booking_query = """
+            INSERT INTO bookings 
+            (user_id, schedule_id, booking_reference, passenger_name, passenger_age, 
+             passenger_gender, seat_numbers, total_fare, booking_status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'Confirmed')
+            """
+            cursor.executemany(booking_query, rows)
+            
+            now = datetime.now()
+            self.admin_stats.record_bookings(cursor, [(now, booking['total_fare']) for booking in bookings])
+            
+            conn.commit()
+            self.apply_seat_counts(needed)
+            self.note_write(user_id)
+            for schedule_id, seat in booked_seats:
+                self.seat_inventory.mark_booked(schedule_id, seat)
+            for booking in bookings:
+                self.analytics.record_booking(booking['schedule_id'], 1, booking['total_fare'], now)
+            for schedule_id in schedule_ids:
+                self.invalidate_schedule(schedule_id)
+            return {
+                'success': True,
+                'booking_refs': [booking['booking_ref'] for booking in bookings],
+                'bookings': bookings,
+                'total_fare': sum(booking['total_fare'] for booking in bookings)
+            }
+            
+        except (Error, KeyError, ValueError) as e:
+            if conn:
+                conn.rollback()
+                self._release_holds(legs)
+            print(f"Group booking error: {e}")
+            return {'success': False, 'message': f'Group booking failed: {str(e)}'}
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def _release_holds(self, legs):
+        """Give back the seats held for a group booking that didn't go through"""
+        for leg in legs:
+            if leg.get('hold_token'):
+                self.seat_inventory.release_hold(leg['hold_token'])
+    
+    def _format_booking(self, booking):
+        """Make a booking row JSON/template friendly"""
+        for field in ('booking_date', 'travel_date'):
+            if hasattr(booking.get(field), 'isoformat'):
+                booking[field] = booking[field].isoformat()
+        for field in ('departure_time', 'arrival_time'):
+            if booking.get(field) is not None:
+                booking[field] = str(booking[field])
+        booking['is_offline'] = False
+        return booking
+    
+    def get_user_bookings_page(self, user_id, after=None, limit=20, status=None, upcoming_only=False):
+        """One page of a user's bookings, newest first
+        
+        Keyset pagination on (booking_date, booking_id) using
+        idx_user_booking_date: ``after`` is the (booking_date, booking_id) of
+        the last row already shown, or (booking_date, None) for "strictly
+        older than booking_date". The cost of a page does not grow with how
+        far back it is. An ``after`` that can't be read gives the first page.
+        """
+        if after:
+            try:
+                booking_date, booking_id = after
+                if isinstance(booking_date, str):
+                    booking_date = datetime.fromisoformat(booking_date)
+                if booking_id is not None:
+                    booking_id = int(booking_id)
+                after = (booking_date, booking_id)
+            except (TypeError, ValueError):
+                after = None
+        
+        conn = self.get_read_connection(user_id)
+        if not conn:
+            return []
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            conditions = ["b.user_id = %s"]
+            params = [user_id]
+            if after:
+                booking_date, booking_id = after
+                if booking_id is None:
+                    conditions.append("b.booking_date < %s")
+                    params.append(booking_date)
+                else:
+                    conditions.append("(b.booking_date < %s OR (b.booking_date = %s AND b.booking_id < %s))")
+                    params.extend([booking_date, booking_date, booking_id])
+            if status:
+                conditions.append("b.booking_status = %s")
+                params.append(status)
+            if upcoming_only:
+                conditions.append("s.travel_date >= CURDATE()")
+            
+            query = f"""
+            SELECT b.*, s.bus_number, s.departure_time, s.arrival_time, s.travel_date,
+                   r.route_name, r.origin_city, r.destination_city
+            FROM bookings b
+            JOIN bus_schedules s ON b.schedule_id = s.schedule_id
+            JOIN bus_routes r ON s.route_id = r.route_id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY b.booking_date DESC, b.booking_id DESC
+            LIMIT %s
+            """
+            params.append(limit)
+            
+            cursor.execute(query, tuple(params))
+            return [self._format_booking(booking) for booking in cursor.fetchall()]
+            
+        except Error as e:
+            print(f"Get bookings error: {e}")
+            return []
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def iter_user_bookings(self, user_id, status=None, upcoming_only=False, batch_size=500):
+        """Yield all of a user's bookings newest first, one keyset page at a time
+        
+        The connection goes back to the pool between pages, so a slow
+        consumer (e.g. a streamed export) doesn't hold it.
+        """
+        after = None
+        while True:
+            page = self.get_user_bookings_page(user_id, after, batch_size, status, upcoming_only)
+            yield from page
+            if len(page) < batch_size:
+                return
+            after = (page[-1]['booking_date'], page[-1]['booking_id'])
+    
+    def get_user_bookings(self, user_id):
+        """Get all bookings for a user"""
+        return list(self.iter_user_bookings(user_id))
+    
+    def get_admin_stats(self):
+        """Get statistics for admin panel (totals come from the materialized counters)"""
+        stats = self.admin_stats.get_stats()
+        
+        conn = self.get_read_connection()
+        if not conn:
+            return stats
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            # Recent bookings
+            cursor.execute("""
+                SELECT b.booking_reference, u.username, b.passenger_name, b.total_fare, b.booking_date
+                FROM bookings b
+                JOIN users u ON b.user_id = u.user_id
+                ORDER BY b.booking_date DESC
+                LIMIT 5
+            """)
+            stats['recent_bookings'] = cursor.fetchall()
+            
+            # Format dates in recent bookings
+            for booking in stats['recent_bookings']:
+                if 'booking_date' in booking:
+                    booking['booking_date'] = booking['booking_date'].isoformat()
+            
+            return stats
+            
+        except Error as e:
+            print(f"Stats error: {e}")
+            # The counters were read fine; only the recent list is missing
+            stats['recent_bookings'] = []
+            return stats
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
                 conn.close()
\ No newline at end of file
@@ -0,0 +1,115 @@
+import random
+import threading
+from datetime import datetime
+
+
+class HealthMonitor:
+    """Background thread that probes the database and caches the up/down state"""
+
+    def __init__(self, probe, interval=10, max_backoff=120, jitter=0.2, min_request_gap=1.0):
+        self.probe = probe
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.min_request_gap = min_request_gap
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._online = False
+        self._last_changed = None
+        self._last_checked = None
+        self._failures = 0
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Call ``callback(status)`` from the monitor thread on every online/offline transition"""
+        self._listeners.append(callback)
+
+    def start(self):
+        """Run one probe synchronously, then keep probing in the background"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._run_probe()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='db-health-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self._next_delay())
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self._run_probe()
+
+    def _next_delay(self):
+        """Regular interval while up; jittered exponential backoff while down"""
+        with self._lock:
+            failures = self._failures
+        if failures == 0:
+            delay = self.interval
+        else:
+            delay = min(self.max_backoff, self.interval * (2 ** (failures - 1)))
+        spread = delay * self.jitter
+        return max(0.5, delay + random.uniform(-spread, spread))
+
+    def _run_probe(self):
+        try:
+            ok = bool(self.probe())
+        except Exception:
+            ok = False
+        self._publish(ok)
+
+    def _publish(self, ok):
+        now = datetime.now()
+        changed = False
+        with self._lock:
+            self._last_checked = now
+            if ok != self._online or self._last_changed is None:
+                self._online = ok
+                self._last_changed = now
+                changed = True
+            self._failures = 0 if ok else self._failures + 1
+
+        if changed:
+            status = self.get_status()
+            for callback in list(self._listeners):
+                try:
+                    callback(status)
+                except Exception as e:
+                    print(f"Health listener error: {e}")
+
+    def request_probe(self):
+        """Ask the background thread to re-probe now (e.g. after a failed checkout)
+
+        Only honoured while the database is seen as up, and at most once
+        per ``min_request_gap`` seconds, so the first failures of an outage
+        are noticed quickly. Once a probe has failed the backoff alone
+        decides when to probe again, however many checkouts fail.
+        """
+        with self._lock:
+            if not self._online or self._failures:
+                return
+            if self._last_checked and (datetime.now() - self._last_checked).total_seconds() < self.min_request_gap:
+                return
+        self._wake.set()
+
+    def is_online(self):
+        return self._online
+
+    def get_status(self):
+        """Cached connection state; never touches the network"""
+        with self._lock:
+            return {
+                'online': self._online,
+                'last_changed': self._last_changed.isoformat() if self._last_changed else None,
+                'last_checked': self._last_checked.isoformat() if self._last_checked else None,
+                'consecutive_failures': self._failures
+            }
@@ -0,0 +1,361 @@
+import functools
+import re
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+
+from config import Config
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Latency histogram bucket bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'busbooking_method_seconds': 'Time spent in instrumented handler methods',
+    'busbooking_method_errors_total': 'Exceptions raised out of instrumented handler methods',
+    'busbooking_sql_seconds': 'SQL statement execution time, by statement kind and table',
+    'busbooking_sql_rows_total': 'Rows fetched, by statement kind and table',
+    'busbooking_sql_errors_total': 'SQL statements that raised an error',
+    'busbooking_slow_queries_total': 'SQL statements slower than the slow-query threshold',
+    'busbooking_schedule_index_lookups_total': 'Schedule searches answered by the in-memory index (hit) or MySQL (miss)',
+    'busbooking_offline_lookups_total': 'Offline-mode lookups answered from the schedule cache or the sample data',
+    'busbooking_offline_queue_depth': 'Offline records waiting to be synced',
+    'busbooking_db_online': '1 while the health monitor sees MySQL as reachable',
+    'busbooking_db_pool': 'Connection pool statistics',
+    'busbooking_db_reads_total': 'Replica-eligible reads, by where they were sent',
+    'busbooking_replica_lag_seconds': 'Replication lag last measured on each replica',
+    'busbooking_replica_healthy': '1 while a replica is within the lag limit and serving reads'
+}
+
+# Where the main table follows each kind of statement
+_TABLE_AFTER = {
+    'SELECT': re.compile(r'\bFROM\s+`?(\w+)', re.I),
+    'DELETE': re.compile(r'\bFROM\s+`?(\w+)', re.I),
+    'INSERT': re.compile(r'\bINTO\s+`?(\w+)', re.I),
+    'REPLACE': re.compile(r'\bINTO\s+`?(\w+)', re.I),
+    'UPDATE': re.compile(r'^\s*UPDATE\s+`?(\w+)', re.I)
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Counters, latency histograms and pulled gauges, rendered as Prometheus text
+
+    Handlers opt in with instrument() (per-method timings) and
+    wrap_connection() (per-statement timings, row counts and the
+    slow-query log). When the registry is disabled both hand back the
+    original object untouched and inc()/observe() return at once, so the
+    cost is a single attribute check on the few explicit counters.
+
+    A ``/metrics`` route returns ``Response(metrics.render(),
+    mimetype=CONTENT_TYPE)``.
+    """
+
+    def __init__(self, enabled=True, slow_query_ms=200, slow_query_log_size=100, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.buckets = tuple(buckets)
+
+        self._lock = threading.Lock()
+        self._counters = {}      # name -> {labels: value}
+        self._histograms = {}    # name -> {labels: [bucket counts..., sum, count]}
+        self._gauges = {}        # name -> (func, weakref to its owner or None)
+        self._slow_queries = deque(maxlen=slow_query_log_size)
+        self._fingerprints = {}
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            values = series.get(key)
+            if values is None:
+                values = series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                values[index] += 1
+            values[-2] += seconds
+            values[-1] += 1
+
+    def register_gauge(self, name, func, owner=None):
+        """Gauge read when metrics are rendered; ``func`` returns a number or [(labels, number)]
+
+        With an ``owner`` the gauge is read as ``func(owner)`` and the
+        registry only keeps a weak reference to it: the gauge goes away
+        with the owner (or with unregister_gauges(owner)) instead of
+        keeping it alive. Registering a name again replaces the earlier
+        gauge.
+        """
+        with self._lock:
+            self._gauges[name] = (func, weakref.ref(owner) if owner is not None else None)
+
+    def unregister_gauges(self, owner):
+        """Drop every gauge registered with ``owner``"""
+        with self._lock:
+            for name, (_, ref) in list(self._gauges.items()):
+                # Dead owners' gauges go too
+                if ref is not None and (ref() is owner or ref() is None):
+                    del self._gauges[name]
+
+    # ------------------------------------------------------------------
+    # Instrumentation
+    # ------------------------------------------------------------------
+    def instrument(self, obj, component, methods):
+        """Replace ``obj``'s bound ``methods`` with timed versions (nothing happens when disabled)"""
+        if not self.enabled:
+            return obj
+        for method in methods:
+            setattr(obj, method, self._timed(getattr(obj, method), component, method))
+        return obj
+
+    def _timed(self, func, component, method):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                self.inc('busbooking_method_errors_total', component=component, method=method)
+                raise
+            finally:
+                self.observe('busbooking_method_seconds', time.perf_counter() - started,
+                             component=component, method=method)
+        return wrapper
+
+    def wrap_connection(self, conn):
+        """Connection whose cursors time every statement (``conn`` itself when disabled or None)"""
+        if not self.enabled or conn is None:
+            return conn
+        return TimedConnection(self, conn)
+
+    def fingerprint(self, query):
+        """Low-cardinality label for a statement, e.g. 'SELECT bus_schedules'"""
+        label = self._fingerprints.get(query)
+        if label is None:
+            verb = (query.split(None, 1) or ['?'])[0].upper()
+            match = _TABLE_AFTER[verb].search(query) if verb in _TABLE_AFTER else None
+            label = f"{verb} {match.group(1)}" if match else verb
+            if len(self._fingerprints) > 2000:
+                # IN (...) lists make many distinct strings; start over rather than grow forever
+                self._fingerprints.clear()
+            self._fingerprints[query] = label
+        return label
+
+    def record_statement(self, query, params, seconds, many=False, failed=False):
+        statement = self.fingerprint(query)
+        self.observe('busbooking_sql_seconds', seconds, statement=statement)
+        if failed:
+            self.inc('busbooking_sql_errors_total', statement=statement)
+
+        elapsed_ms = seconds * 1000
+        if elapsed_ms < self.slow_query_ms:
+            return statement
+
+        self.inc('busbooking_slow_queries_total', statement=statement)
+        sql = ' '.join(query.split())
+        if 'password' in sql.lower():
+            shown = '<redacted>'
+        elif many:
+            rows = list(params or ())
+            shown = f"{len(rows)} rows, first {rows[0]!r}" if rows else '0 rows'
+        else:
+            shown = repr(params)
+        entry = {
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'ms': round(elapsed_ms, 1),
+            'statement': statement,
+            'sql': sql[:500],
+            'params': shown[:300]
+        }
+        with self._lock:
+            self._slow_queries.append(entry)
+        print(f"Slow query ({entry['ms']} ms): {entry['sql']} params={entry['params']}")
+        return statement
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def get_slow_queries(self):
+        """Most recent slow statements, newest first"""
+        with self._lock:
+            return list(reversed(self._slow_queries))
+
+    def _gauge_samples(self):
+        with self._lock:
+            gauges = list(self._gauges.items())
+        samples = []
+        for name, (func, ref) in gauges:
+            try:
+                if ref is None:
+                    value = func()
+                else:
+                    owner = ref()
+                    if owner is None:
+                        continue
+                    value = func(owner)
+            except Exception as e:
+                print(f"Metrics gauge error ({name}): {e}")
+                continue
+            if isinstance(value, (int, float)):
+                value = [({}, value)]
+            samples.append((name, [(tuple(sorted(labels.items())), number) for labels, number in value]))
+        return samples
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {key: list(values) for key, values in series.items()}
+                          for name, series in self._histograms.items()}
+
+        lines = []
+
+        def header(name, kind):
+            if name in HELP:
+                lines.append(f"# HELP {name} {HELP[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name in sorted(counters):
+            header(name, 'counter')
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for name in sorted(histograms):
+            header(name, 'histogram')
+            for labels, values in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, values):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {values[-1]}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(round(values[-2], 6))}")
+                lines.append(f"{name}_count{_format_labels(labels)} {values[-1]}")
+
+        for name, samples in sorted(self._gauge_samples()):
+            header(name, 'gauge')
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        return '\n'.join(lines) + '\n'
+
+
+class TimedConnection:
+    """Connection proxy handing out TimedCursors; everything else goes to the real connection"""
+
+    def __init__(self, metrics, conn):
+        self._metrics = metrics
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._metrics, self._conn.cursor(*args, **kwargs))
+
+    def close(self):
+        return self._conn.close()
+
+
+class TimedCursor:
+    """Cursor proxy that times execute()/executemany() and counts fetched rows"""
+
+    def __init__(self, metrics, cursor):
+        self._metrics = metrics
+        self._cursor = cursor
+        self._statement = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _run(self, method, query, params, many):
+        started = time.perf_counter()
+        try:
+            result = method(query, params)
+        except Exception:
+            self._statement = self._metrics.record_statement(
+                query, params, time.perf_counter() - started, many, failed=True
+            )
+            raise
+        self._statement = self._metrics.record_statement(query, params, time.perf_counter() - started, many)
+        return result
+
+    def execute(self, query, params=None):
+        return self._run(self._cursor.execute, query, params, False)
+
+    def executemany(self, query, params):
+        return self._run(self._cursor.executemany, query, params, True)
+
+    def _count(self, rows):
+        if rows:
+            self._metrics.inc('busbooking_sql_rows_total', rows, statement=self._statement)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        self._count(0 if row is None else 1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count(len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        return self._cursor.close()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_metrics():
+    """Process-wide Metrics registry built from Config"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = Metrics(
+                    enabled=Config.METRICS_ENABLED,
+                    slow_query_ms=Config.SLOW_QUERY_MS,
+                    slow_query_log_size=Config.SLOW_QUERY_LOG_SIZE
+                )
+    return _default
@@ -0,0 +1,413 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: a segment still open in a writer can't be removed, so compact() can't race it
+    fcntl = None
+
+RECORD_MAGIC = b'OJ'
+RECORD_HEADER = struct.Struct('<2sII')  # magic, payload length, crc32 of payload
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.log'
+
+
+class OfflineJournal:
+    """Append-only, checksummed journal for records queued while offline
+
+    Each record is a small JSON payload framed with a magic marker, its
+    length and a CRC32, so a torn write from a crash is detected and
+    skipped on replay. ``put`` records queue an item and ``ack`` records
+    mark it synced. Segments rotate once they reach ``segment_bytes``,
+    and compact() drops sealed segments after carrying any still-pending
+    items forward.
+
+    The live (unsynced) items are kept in memory per queue, so counting
+    and iterating them never touches the directory. Appends from other
+    processes are picked up by tailing the segment files. Secondary
+    indexes registered with add_index() are kept in step with every put
+    and ack, so lookups by a field (e.g. username) are direct.
+
+    Within a process, get a directory's journal from shared_journal():
+    the instance lock is what keeps an append out of a segment that
+    compact() is removing. Across processes, every append holds
+    append.lock shared and compact() holds it exclusively from its last
+    read of the sealed segments until they are removed, so no append can
+    land in a segment after it was read for the last time.
+    """
+
+    def __init__(self, journal_dir, segment_bytes=4 * 1024 * 1024, fsync=True, refresh_interval=1.0):
+        self.journal_dir = journal_dir
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.refresh_interval = refresh_interval
+        os.makedirs(journal_dir, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._live = {}          # queue -> OrderedDict(entry_id -> data)
+        self._indexes = {}       # (queue, name) -> (key_func, {key: OrderedDict(entry_id -> data)})
+        self._offsets = {}       # segment number -> bytes consumed
+        self._active = None      # segment number appended to
+        self._fd = None
+        self._append_lock_fd = None
+        self._compacting = False
+        self._last_refresh = 0.0
+        self.refresh(force=True)
+        self._recover_tail()
+
+    # ------------------------------------------------------------------
+    # Segment files
+    # ------------------------------------------------------------------
+    def _segment_path(self, number):
+        return f"{self.journal_dir}/{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}"
+
+    def _segments(self):
+        numbers = []
+        for name in os.listdir(self.journal_dir):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+
+    def _open_active(self, number):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self._segment_path(number), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._active = number
+
+    def _rotate_if_needed(self):
+        if self._active is None:
+            segments = self._segments()
+            self._open_active(segments[-1] if segments else 1)
+
+        # Another process may already have moved on to a newer segment
+        while os.path.exists(self._segment_path(self._active + 1)):
+            self._open_active(self._active + 1)
+
+        if os.fstat(self._fd).st_size >= self.segment_bytes:
+            self._open_active(self._active + 1)
+
+    @contextmanager
+    def _append_lock(self, exclusive=False):
+        """Hold append.lock shared (appending) or exclusive (compacting) across processes"""
+        if fcntl is None or (self._compacting and not exclusive):
+            # compact() already holds it exclusively for this journal
+            yield
+            return
+        if self._append_lock_fd is None:
+            self._append_lock_fd = os.open(f"{self.journal_dir}/append.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._append_lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._append_lock_fd, fcntl.LOCK_UN)
+
+    def _recover_tail(self):
+        """Start a fresh segment if the newest one ends in a torn record
+
+        Appends landing after torn bytes would stay unreadable while the
+        segment is the newest (its reader waits for the record to finish);
+        once sealed, _tail() skips the torn bytes and reads on.
+        """
+        segments = self._segments()
+        if not segments:
+            return
+        last = segments[-1]
+        try:
+            size = os.path.getsize(self._segment_path(last))
+        except OSError:
+            return
+        if self._offsets.get(last, 0) < size:
+            print(f"Offline journal: segment {last} ends in an incomplete record, starting segment {last + 1}")
+            with self._lock:
+                self._open_active(last + 1)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def _encode(self, payload):
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return RECORD_HEADER.pack(RECORD_MAGIC, len(body), zlib.crc32(body)) + body
+
+    def _write(self, payload):
+        record = self._encode(payload)
+        with self._lock, self._append_lock():
+            self._rotate_if_needed()
+            # A single O_APPEND write keeps records from interleaving between processes
+            os.write(self._fd, record)
+            if os.fstat(self._fd).st_nlink == 0:
+                # Another process compacted this segment away under us; write again
+                self._active = None
+                self._rotate_if_needed()
+                os.write(self._fd, record)
+            if self.fsync:
+                os.fsync(self._fd)
+            # Track the segment so we notice if it is compacted away
+            self._offsets.setdefault(self._active, 0)
+
+    def append(self, queue, entry_id, data):
+        """Queue ``data`` under ``entry_id``; O(1) regardless of how much is queued"""
+        self._write({'op': 'put', 'queue': queue, 'id': entry_id, 'data': data})
+        with self._lock:
+            self._put_live(queue, entry_id, data)
+        return True
+
+    def ack(self, queue, entry_id):
+        """Mark an entry as synced so it is no longer pending"""
+        self._write({'op': 'ack', 'queue': queue, 'id': entry_id})
+        with self._lock:
+            self._drop_live(queue, entry_id)
+
+    # ------------------------------------------------------------------
+    # Live entries and secondary indexes
+    # ------------------------------------------------------------------
+    def _put_live(self, queue, entry_id, data):
+        items = self._live.setdefault(queue, OrderedDict())
+        if entry_id in items:
+            self._unindex(queue, entry_id, items[entry_id])
+        items[entry_id] = data
+        self._index(queue, entry_id, data)
+
+    def _drop_live(self, queue, entry_id):
+        data = self._live.get(queue, {}).pop(entry_id, None)
+        if data is not None:
+            self._unindex(queue, entry_id, data)
+
+    def _index_key(self, key_func, data):
+        try:
+            return key_func(data)
+        except (AttributeError, KeyError, TypeError):
+            return None
+
+    def _index(self, queue, entry_id, data):
+        for (index_queue, _), (key_func, entries) in self._indexes.items():
+            if index_queue != queue:
+                continue
+            key = self._index_key(key_func, data)
+            if key is not None:
+                entries.setdefault(key, OrderedDict())[entry_id] = data
+
+    def _unindex(self, queue, entry_id, data):
+        for (index_queue, _), (key_func, entries) in self._indexes.items():
+            if index_queue != queue:
+                continue
+            key = self._index_key(key_func, data)
+            bucket = entries.get(key)
+            if bucket is not None:
+                bucket.pop(entry_id, None)
+                if not bucket:
+                    del entries[key]
+
+    def add_index(self, queue, name, key_func):
+        """Index pending entries of ``queue`` by ``key_func(data)``; None keys are not indexed"""
+        with self._lock:
+            entries = {}
+            self._indexes[(queue, name)] = (key_func, entries)
+            for entry_id, data in self._live.get(queue, {}).items():
+                key = self._index_key(key_func, data)
+                if key is not None:
+                    entries.setdefault(key, OrderedDict())[entry_id] = data
+
+    def lookup(self, queue, name, key):
+        """Pending (entry_id, data) pairs whose indexed ``name`` equals ``key``"""
+        self.refresh()
+        with self._lock:
+            _, entries = self._indexes[(queue, name)]
+            return list(entries.get(key, {}).items())
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def _apply(self, payload):
+        if payload.get('op') == 'put':
+            self._put_live(payload.get('queue'), payload.get('id'), payload.get('data'))
+        elif payload.get('op') == 'ack':
+            self._drop_live(payload.get('queue'), payload.get('id'))
+
+    def _tail(self, number, sealed=False):
+        """Apply records appended to one segment since we last read it
+
+        In the newest segment an incomplete record may still be being
+        written, so reading stops there. In a ``sealed`` one (a newer
+        segment exists) it can only be a torn write, so reading goes on
+        from the next record marker.
+        """
+        offset = self._offsets.get(number, 0)
+        try:
+            with open(self._segment_path(number), 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return
+
+        pos = 0
+        header_size = RECORD_HEADER.size
+        while pos + header_size <= len(data):
+            magic, length, crc = RECORD_HEADER.unpack_from(data, pos)
+            if magic != RECORD_MAGIC:
+                # Torn or corrupt bytes: resynchronize on the next record marker
+                next_pos = data.find(RECORD_MAGIC, pos + 1)
+                pos = next_pos if next_pos != -1 else len(data)
+                continue
+            end = pos + header_size + length
+            if end > len(data):
+                next_pos = data.find(RECORD_MAGIC, pos + 1) if sealed else -1
+                if next_pos == -1:
+                    # Incomplete record; it may still be being written
+                    break
+                pos = next_pos
+                continue
+            body = data[pos + header_size:end]
+            if zlib.crc32(body) != crc:
+                pos += 1
+                continue
+            try:
+                self._apply(json.loads(body))
+            except ValueError:
+                pass
+            pos = end
+        self._offsets[number] = offset + pos
+
+    def refresh(self, force=False):
+        """Pick up records written by other processes (at most every refresh_interval)"""
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return
+        with self._lock:
+            segments = self._segments()
+            if any(number not in segments for number in self._offsets):
+                # Segments we had read were compacted away, possibly with acks we
+                # never saw; the surviving segments hold every live entry, so replay them
+                self._live = {}
+                self._offsets = {}
+                for _, entries in self._indexes.values():
+                    entries.clear()
+            for number in segments:
+                self._tail(number, sealed=number != segments[-1])
+            self._last_refresh = now
+
+    def pending(self, queue):
+        """Snapshot of unsynced (entry_id, data) pairs in the order they were queued"""
+        self.refresh()
+        with self._lock:
+            return list(self._live.get(queue, {}).items())
+
+    def get(self, queue, entry_id, refresh=False):
+        """Data for a pending entry, or None once it has been acked"""
+        if refresh:
+            self.refresh(force=True)
+        with self._lock:
+            return self._live.get(queue, {}).get(entry_id)
+
+    def pending_count(self, queue=None):
+        self.refresh()
+        with self._lock:
+            if queue is not None:
+                return len(self._live.get(queue, {}))
+            return sum(len(items) for items in self._live.values())
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+    def compact(self):
+        """Drop sealed segments, re-appending entries that are still pending
+
+        Returns the number of segments removed.
+        """
+        lock_path = f"{self.journal_dir}/compact.lock"
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # A stale lock (crashed compaction) is cleared after ten minutes
+            try:
+                if time.time() - os.stat(lock_path).st_mtime > 600:
+                    os.remove(lock_path)
+            except OSError:
+                pass
+            return 0
+        os.close(fd)
+
+        try:
+            with self._lock:
+                self.refresh(force=True)
+                self._rotate_if_needed()
+                sealed = [number for number in self._segments() if number <= self._active]
+                if not sealed:
+                    return 0
+
+                # Start a fresh segment and carry the pending entries into it
+                self._open_active(sealed[-1] + 1)
+                live = [(queue, entry_id, data)
+                        for queue, items in self._live.items()
+                        for entry_id, data in items.items()]
+                for queue, entry_id, data in live:
+                    self._write({'op': 'put', 'queue': queue, 'id': entry_id, 'data': data})
+
+                # Records another process wrote to a sealed segment while we were
+                # copying would be lost with it; carry them over too. Appends wait
+                # from this last read until the segments are gone, and then go to
+                # the new segment
+                with self._append_lock(exclusive=True):
+                    self._compacting = True
+                    try:
+                        self.refresh(force=True)
+                        carried = {(queue, entry_id) for queue, entry_id, _ in live}
+                        for queue, items in self._live.items():
+                            for entry_id, data in items.items():
+                                if (queue, entry_id) not in carried:
+                                    self._write({'op': 'put', 'queue': queue, 'id': entry_id, 'data': data})
+                        for queue, entry_id, _ in live:
+                            if entry_id not in self._live.get(queue, {}):
+                                self._write({'op': 'ack', 'queue': queue, 'id': entry_id})
+
+                        removed = 0
+                        for number in sealed:
+                            try:
+                                os.remove(self._segment_path(number))
+                            except OSError as e:
+                                # e.g. still open in another process on Windows; its entries
+                                # were carried forward, so it is only retried next time
+                                print(f"Offline journal: could not remove segment {number}: {e}")
+                                continue
+                            self._offsets.pop(number, None)
+                            removed += 1
+                    finally:
+                        self._compacting = False
+                return removed
+        finally:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            if self._append_lock_fd is not None:
+                os.close(self._append_lock_fd)
+                self._append_lock_fd = None
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_journal(journal_dir, **kwargs):
+    """The process-wide OfflineJournal for ``journal_dir``, created on first use with ``kwargs``"""
+    key = os.path.abspath(journal_dir)
+    with _shared_lock:
+        journal = _shared.get(key)
+        if journal is None:
+            journal = _shared[key] = OfflineJournal(journal_dir, **kwargs)
+        return journal
@@ -1,263 +1,336 @@
-import json
-import os
-import uuid
-from datetime import datetime
-import hashlib
-
-class OfflineManager:
-    def __init__(self):
-        self.offline_dir = "database/offline_data"
-        self.ensure_directories()
-    
-    def ensure_directories(self):
-        """Create necessary directories for offline storage"""
-        os.makedirs(f"{self.offline_dir}/users", exist_ok=True)
-        os.makedirs(f"{self.offline_dir}/bookings", exist_ok=True)
-        os.makedirs(f"{self.offline_dir}/schedules", exist_ok=True)
-    
-    def hash_password(self, password):
-        """Consistent password hashing with database handler"""
-        return hashlib.sha256(password.encode()).hexdigest()
-    
-    def save_user_offline(self, user_data):
-        """Save user registration data offline"""
-        try:
-            # Generate unique filename
-            filename = f"{user_data['offline_id']}.json"
-            filepath = f"{self.offline_dir}/users/{filename}"
-            
-            # Ensure all required fields
-            user_data.setdefault('created_at', datetime.now().isoformat())
-            user_data.setdefault('is_admin', False)
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(user_data, f, indent=2, ensure_ascii=False)
-            
-            print(f"Saved offline user: {user_data['username']}")
-            return True
-            
-        except Exception as e:
-            print(f"Save user offline error: {e}")
-            return False
-    
-    def authenticate_offline(self, username, password):
-        """Authenticate user from offline storage"""
-        try:
-            users_dir = f"{self.offline_dir}/users"
-            if not os.path.exists(users_dir):
-                return None
-            
-            for filename in os.listdir(users_dir):
-                if filename.endswith('.json'):
-                    filepath = f"{users_dir}/{filename}"
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            user = json.load(f)
-                        
-                        # Simple password check (in production, use hashing)
-                        if user['username'] == username and user['password'] == password:
-                            return user
-                    except (json.JSONDecodeError, KeyError) as e:
-                        print(f"Error reading user file {filename}: {e}")
-                        continue
-            
-            return None
-            
-        except Exception as e:
-            print(f"Offline auth error: {e}")
-            return None
-    
-    def save_booking_offline(self, booking_data):
-        """Save booking data offline"""
-        try:
-            # Generate unique filename
-            filename = f"{booking_data['offline_id']}.json"
-            filepath = f"{self.offline_dir}/bookings/{filename}"
-            
-            # Ensure all required fields
-            booking_data.setdefault('booking_status', 'Pending Sync')
-            booking_data.setdefault('is_synced', False)
-            booking_data.setdefault('booking_date', datetime.now().isoformat())
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(booking_data, f, indent=2, ensure_ascii=False)
-            
-            print(f"Saved offline booking: {booking_data['booking_reference']}")
-            return True
-            
-        except Exception as e:
-            print(f"Save booking offline error: {e}")
-            return False
-    
-    def get_user_offline_bookings(self, username):
-        """Get offline bookings for a user"""
-        bookings = []
-        try:
-            bookings_dir = f"{self.offline_dir}/bookings"
-            if not os.path.exists(bookings_dir):
-                return bookings
-            
-            for filename in os.listdir(bookings_dir):
-                if filename.endswith('.json'):
-                    filepath = f"{bookings_dir}/{filename}"
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            booking = json.load(f)
-                        
-                        # Check if booking belongs to this user
-                        if booking.get('username') == username:
-                            # Format for display
-                            formatted_booking = {
-                                'booking_reference': booking['booking_reference'],
-                                'passenger_name': booking['passenger_name'],
-                                'booking_date': booking['booking_date'],
-                                'total_fare': booking.get('total_fare', 50),
-                                'booking_status': 'Pending Sync',
-                                'is_offline': True,
-                                'seat_count': booking.get('seat_count', 1),
-                                'schedule_data': booking.get('schedule_data', {})
-                            }
-                            bookings.append(formatted_booking)
-                            
-                    except (json.JSONDecodeError, KeyError) as e:
-                        print(f"Error reading booking file {filename}: {e}")
-                        continue
-            
-            return bookings
-            
-        except Exception as e:
-            print(f"Get offline bookings error: {e}")
-            return []
-    
-    def search_schedules_offline(self, origin, destination, travel_date):
-        """Search schedules from cached offline data"""
-        try:
-            cache_file = f"{self.offline_dir}/schedules/cache.json"
-            if not os.path.exists(cache_file):
-                # Return sample data if cache doesn't exist
-                return self.get_sample_schedules(origin, destination, travel_date)
-            
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                all_schedules = json.load(f)
-            
-            # Filter schedules
-            filtered_schedules = []
-            origin_lower = origin.lower()
-            destination_lower = destination.lower()
-            
-            for schedule in all_schedules:
-                schedule_origin = schedule.get('origin_city', '').lower()
-                schedule_dest = schedule.get('destination_city', '').lower()
-                schedule_date = schedule.get('travel_date', '')
-                
-                if (origin_lower in schedule_origin and 
-                    destination_lower in schedule_dest and 
-                    schedule_date == travel_date):
-                    filtered_schedules.append(schedule)
-            
-            return filtered_schedules
-            
-        except Exception as e:
-            print(f"Offline search error: {e}")
-            return self.get_sample_schedules(origin, destination, travel_date)
-    
-    def get_sample_schedules(self, origin, destination, travel_date):
-        """Return sample schedules for offline mode"""
-        sample_schedules = [
-            {
-                'schedule_id': 1,
-                'route_id': 1,
-                'route_name': f'{origin} to {destination} Express',
-                'origin_city': origin,
-                'destination_city': destination,
-                'bus_number': 'BUS-001',
-                'departure_time': '08:00:00',
-                'arrival_time': '12:00:00',
-                'travel_date': travel_date,
-                'total_seats': 40,
-                'available_seats': 20,
-                'fare': 50.00,
-                'estimated_duration_hours': 4.0
-            },
-            {
-                'schedule_id': 2,
-                'route_id': 1,
-                'route_name': f'{origin} to {destination} Deluxe',
-                'origin_city': origin,
-                'destination_city': destination,
-                'bus_number': 'BUS-002',
-                'departure_time': '14:00:00',
-                'arrival_time': '18:30:00',
-                'travel_date': travel_date,
-                'total_seats': 40,
-                'available_seats': 15,
-                'fare': 65.00,
-                'estimated_duration_hours': 4.5
-            }
-        ]
-        return sample_schedules
-    
-    def get_schedule_offline(self, schedule_id):
-        """Get a specific schedule from cache or sample data"""
-        try:
-            cache_file = f"{self.offline_dir}/schedules/cache.json"
-            if os.path.exists(cache_file):
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    all_schedules = json.load(f)
-                
-                for schedule in all_schedules:
-                    if schedule.get('schedule_id') == schedule_id:
-                        return schedule
-            
-            # Return sample schedule if not found in cache
-            return {
-                'schedule_id': schedule_id,
-                'route_id': 1,
-                'route_name': 'Sample Route',
-                'origin_city': 'Sample City',
-                'destination_city': 'Destination City',
-                'bus_number': 'BUS-SAMPLE',
-                'departure_time': '10:00:00',
-                'arrival_time': '14:00:00',
-                'travel_date': datetime.now().date().isoformat(),
-                'total_seats': 40,
-                'available_seats': 30,
-                'fare': 50.00
-            }
-            
-        except Exception as e:
-            print(f"Get schedule offline error: {e}")
-            return None
-    
-    def get_cached_schedules(self):
-        """Get all cached schedules"""
-        try:
-            cache_file = f"{self.offline_dir}/schedules/cache.json"
-            if os.path.exists(cache_file):
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return []
-        except Exception as e:
-            print(f"Get cached schedules error: {e}")
-            return []
-    
-    def get_pending_sync_count(self):
-        """Count pending sync items"""
-        try:
-            count = 0
-            
-            # Count pending users
-            users_dir = f"{self.offline_dir}/users"
-            if os.path.exists(users_dir):
-                count += len([f for f in os.listdir(users_dir) if f.endswith('.json')])
-            
-            # Count pending bookings
-            bookings_dir = f"{self.offline_dir}/bookings"
-            if os.path.exists(bookings_dir):
-                count += len([f for f in os.listdir(bookings_dir) if f.endswith('.json')])
-            
-            return count
-            
-        except Exception as e:
-            print(f"Get pending sync count error: {e}")
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+import hmac
+
+from config import Config
+from utils.columnar_cache import ColumnarScheduleCache, current_columnar, delta_path, merge_delta, read_delta
+from utils.credentials import get_hasher
+from utils.metrics import get_metrics
+from utils.offline_journal import shared_journal
+from utils.schedule_index import ScheduleIndex
+
+class OfflineManager:
+    def __init__(self, offline_dir=None):
+        self.offline_dir = offline_dir or Config.OFFLINE_DATA_DIR
+        self.ensure_directories()
+        
+        # Queued users/bookings live in an append-only journal
+        self.journal = shared_journal(
+            f"{self.offline_dir}/journal",
+            segment_bytes=Config.OFFLINE_JOURNAL_SEGMENT_BYTES,
+            fsync=Config.OFFLINE_JOURNAL_FSYNC
+        )
+        # Direct lookups by username/email; kept in step with every save and sync ack
+        self.journal.add_index('users', 'username', lambda user: user['username'])
+        self.journal.add_index('users', 'email', lambda user: self.normalize_email(user['email']))
+        self.journal.add_index('bookings', 'username', lambda booking: booking['username'])
+        self.import_legacy_files()
+        
+        # Parsed schedule cache, rebuilt only when the file on disk changes
+        self._schedule_index = ScheduleIndex()
+        self._cache_stamp = None
+        self._delta_offset = 0  # bytes of the cache's delta file already applied to the index
+        self._cache_lock = threading.Lock()
+        
+        self.metrics = get_metrics()
+        self.metrics.instrument(self, 'offline', (
+            'get_user_offline', 'save_user_offline', 'authenticate_offline', 'save_booking_offline',
+            'get_user_offline_bookings', 'search_schedules_offline', 'get_schedule_offline', 'get_cached_schedules'
+        ))
+        self.metrics.register_gauge('busbooking_offline_queue_depth', lambda manager: [
+            ({'queue': queue}, manager.journal.pending_count(queue)) for queue in ('users', 'bookings')
+        ], self)
+    
+    def close(self):
+        """Take this manager's gauge out of the metrics registry"""
+        self.metrics.unregister_gauges(self)
+    
+    def ensure_directories(self):
+        """Create necessary directories for offline storage"""
+        os.makedirs(f"{self.offline_dir}/users", exist_ok=True)
+        os.makedirs(f"{self.offline_dir}/bookings", exist_ok=True)
+        os.makedirs(f"{self.offline_dir}/schedules", exist_ok=True)
+    
+    def import_legacy_files(self):
+        """Move records queued as one-JSON-file-per-record into the journal"""
+        for queue in ('users', 'bookings'):
+            queue_dir = f"{self.offline_dir}/{queue}"
+            if not os.path.exists(queue_dir):
+                continue
+            for filename in os.listdir(queue_dir):
+                if not filename.endswith('.json'):
+                    continue
+                filepath = f"{queue_dir}/{filename}"
+                try:
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    self.journal.append(queue, data.get('offline_id') or filename[:-5], data)
+                    os.remove(filepath)
+                except (OSError, ValueError) as e:
+                    print(f"Error importing offline file {filename}: {e}")
+    
+    def hash_password(self, password):
+        """Consistent password hashing with database handler"""
+        return get_hasher().hash(password)
+    
+    def normalize_email(self, email):
+        """Emails are matched case-insensitively"""
+        return email.strip().lower() if email else None
+    
+    def get_user_offline(self, username=None, email=None):
+        """Pending offline user by username or email, or None"""
+        if username is not None:
+            matches = self.journal.lookup('users', 'username', username)
+        else:
+            matches = self.journal.lookup('users', 'email', self.normalize_email(email))
+        return matches[-1][1] if matches else None
+    
+    def save_user_offline(self, user_data):
+        """Save user registration data offline"""
+        try:
+            # Ensure all required fields
+            user_data.setdefault('created_at', datetime.now().isoformat())
+            user_data.setdefault('is_admin', False)
+            
+            # Never keep the plaintext password on disk
+            if 'password' in user_data:
+                user_data['password_hash'] = self.hash_password(user_data.pop('password'))
+            
+            self.journal.append('users', user_data['offline_id'], user_data)
+            
+            print(f"Saved offline user: {user_data['username']}")
+            return True
+            
+        except Exception as e:
+            print(f"Save user offline error: {e}")
+            return False
+    
+    def authenticate_offline(self, username, password):
+        """Authenticate user from offline storage"""
+        try:
+            for entry_id, user in self.journal.lookup('users', 'username', username):
+                try:
+                    if 'password_hash' in user:
+                        if get_hasher().verify(password, user['password_hash']):
+                            return user
+                    # Queued before passwords were hashed offline
+                    elif hmac.compare_digest(user['password'].encode(), password.encode()):
+                        return user
+                except KeyError as e:
+                    print(f"Error reading offline user {entry_id}: {e}")
+                    continue
+            
+            return None
+            
+        except Exception as e:
+            print(f"Offline auth error: {e}")
+            return None
+    
+    def save_booking_offline(self, booking_data):
+        """Save booking data offline"""
+        try:
+            # Ensure all required fields
+            booking_data.setdefault('booking_status', 'Pending Sync')
+            booking_data.setdefault('is_synced', False)
+            booking_data.setdefault('booking_date', datetime.now().isoformat())
+            
+            self.journal.append('bookings', booking_data['offline_id'], booking_data)
+            
+            print(f"Saved offline booking: {booking_data['booking_reference']}")
+            return True
+            
+        except Exception as e:
+            print(f"Save booking offline error: {e}")
+            return False
+    
+    def get_user_offline_bookings(self, username):
+        """Get offline bookings for a user"""
+        bookings = []
+        try:
+            for entry_id, booking in self.journal.lookup('bookings', 'username', username):
+                try:
+                    # Format for display
+                    formatted_booking = {
+                        'offline_id': entry_id,
+                        'booking_reference': booking['booking_reference'],
+                        'passenger_name': booking['passenger_name'],
+                        'booking_date': booking['booking_date'],
+                        'total_fare': booking.get('total_fare', 50),
+                        'booking_status': 'Pending Sync',
+                        'is_offline': True,
+                        'seat_count': booking.get('seat_count', 1),
+                        'schedule_data': booking.get('schedule_data', {})
+                    }
+                    bookings.append(formatted_booking)
+                    
+                except KeyError as e:
+                    print(f"Error reading offline booking {entry_id}: {e}")
+                    continue
+            
+            return bookings
+            
+        except Exception as e:
+            print(f"Get offline bookings error: {e}")
+            return []
+    
+    def _load_schedule_cache(self):
+        """Make sure the schedule index reflects the cache on disk; returns False if there is none
+        
+        The columnar cache.bin is preferred and memory-mapped, so the index
+        holds lightweight row views rather than parsed dicts. The file is
+        only opened again when its mtime/size stamp changes; rows appended
+        to its delta file since are applied on top, reading only the new
+        bytes.
+        """
+        for cache_file in (current_columnar(f"{self.offline_dir}/schedules/cache.bin"),
+                           f"{self.offline_dir}/schedules/cache.json"):
+            if cache_file is None:
+                continue
+            try:
+                stat = os.stat(cache_file)
+                break
+            except OSError:
+                continue
+        else:
+            return False
+        
+        stamp = (cache_file, stat.st_mtime_ns, stat.st_size)
+        try:
+            delta_size = os.path.getsize(delta_path(cache_file))
+        except OSError:
+            delta_size = 0
+        if stamp == self._cache_stamp and delta_size == self._delta_offset:
+            return True
+        
+        with self._cache_lock:
+            if stamp != self._cache_stamp:
+                if cache_file.endswith('.bin'):
+                    all_schedules = ColumnarScheduleCache(cache_file)
+                else:
+                    with open(cache_file, 'r', encoding='utf-8') as f:
+                        all_schedules = json.load(f)
+                # Not closed here: the index rows keep their store mapped, so a
+                # replaced store is unmapped once the last search using it is done
+                self._schedule_index.build(all_schedules)
+                self._cache_stamp = stamp
+                self._delta_offset = 0
+            
+            if delta_size < self._delta_offset:
+                # Rewritten under us; applying it again from the start is harmless
+                self._delta_offset = 0
+            changed, self._delta_offset = read_delta(cache_file, self._delta_offset)
+            if changed:
+                self._schedule_index.upsert(changed)
+        return True
+    
+    def search_schedules_offline(self, origin, destination, travel_date):
+        """Search schedules from cached offline data"""
+        try:
+            if not self._load_schedule_cache():
+                # Return sample data if cache doesn't exist
+                self.metrics.inc('busbooking_offline_lookups_total', operation='search', result='sample')
+                return self.get_sample_schedules(origin, destination, travel_date)
+            
+            self.metrics.inc('busbooking_offline_lookups_total', operation='search', result='cache')
+            return self._schedule_index.search(origin, destination, travel_date, only_available=False)
+            
+        except Exception as e:
+            print(f"Offline search error: {e}")
+            self.metrics.inc('busbooking_offline_lookups_total', operation='search', result='sample')
+            return self.get_sample_schedules(origin, destination, travel_date)
+    
+    def get_sample_schedules(self, origin, destination, travel_date):
+        """Return sample schedules for offline mode"""
+        sample_schedules = [
+            {
+                'schedule_id': 1,
+                'route_id': 1,
+                'route_name': f'{origin} to {destination} Express',
+                'origin_city': origin,
+                'destination_city': destination,
+                'bus_number': 'BUS-001',
+                'departure_time': '08:00:00',
+                'arrival_time': '12:00:00',
+                'travel_date': travel_date,
+                'total_seats': 40,
+                'available_seats': 20,
+                'fare': 50.00,
+                'estimated_duration_hours': 4.0
+            },
+            {
+                'schedule_id': 2,
+                'route_id': 1,
+                'route_name': f'{origin} to {destination} Deluxe',
+                'origin_city': origin,
+                'destination_city': destination,
+                'bus_number': 'BUS-002',
+                'departure_time': '14:00:00',
+                'arrival_time': '18:30:00',
+                'travel_date': travel_date,
+                'total_seats': 40,
+                'available_seats': 15,
+                'fare': 65.00,
+                'estimated_duration_hours': 4.5
+            }
+        ]
+        return sample_schedules
+    
+    def get_schedule_offline(self, schedule_id):
+        """Get a specific schedule from cache or sample data"""
+        try:
+            if self._load_schedule_cache():
+                schedule = self._schedule_index.get(schedule_id)
+                if schedule:
+                    self.metrics.inc('busbooking_offline_lookups_total', operation='schedule', result='cache')
+                    return schedule
+            
+            self.metrics.inc('busbooking_offline_lookups_total', operation='schedule', result='sample')
+            # Return sample schedule if not found in cache
+            return {
+                'schedule_id': schedule_id,
+                'route_id': 1,
+                'route_name': 'Sample Route',
+                'origin_city': 'Sample City',
+                'destination_city': 'Destination City',
+                'bus_number': 'BUS-SAMPLE',
+                'departure_time': '10:00:00',
+                'arrival_time': '14:00:00',
+                'travel_date': datetime.now().date().isoformat(),
+                'total_seats': 40,
+                'available_seats': 30,
+                'fare': 50.00
+            }
+            
+        except Exception as e:
+            print(f"Get schedule offline error: {e}")
+            return None
+    
+    def get_cached_schedules(self):
+        """Get all cached schedules"""
+        try:
+            cache_dir = f"{self.offline_dir}/schedules"
+            cache_bin = current_columnar(f"{cache_dir}/cache.bin")
+            if cache_bin:
+                with ColumnarScheduleCache(cache_bin) as cache:
+                    return merge_delta(cache_bin, cache)
+            cache_file = f"{cache_dir}/cache.json"
+            if os.path.exists(cache_file):
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    return merge_delta(cache_file, json.load(f))
+            return []
+        except Exception as e:
+            print(f"Get cached schedules error: {e}")
+            return []
+    
+    def get_pending_sync_count(self):
+        """Count pending sync items"""
+        try:
+            # Maintained by the journal; no directory listing needed
+            return self.journal.pending_count()
+            
+        except Exception as e:
+            print(f"Get pending sync count error: {e}")
             return 0
\ No newline at end of file
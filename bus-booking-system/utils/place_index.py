@@ -0,0 +1,148 @@
+import threading
+import unicodedata
+from bisect import bisect_left
+
+# Common names travellers type that don't appear in the tables
+ALIASES = {
+    'Metro Manila': ['NCR', 'National Capital Region'],
+    'Quezon City': ['QC'],
+    'Cagayan de Oro': ['CDO'],
+    'General Santos': ['GenSan'],
+    'Lapu-Lapu': ['Opon'],
+    'Baguio': ['Summer Capital']
+}
+
+# Result order: transport hubs, other cities/municipalities, provinces, barangays
+HUB, CITY, PROVINCE, BARANGAY = range(4)
+TIER_KIND = {HUB: 'city', CITY: 'city', PROVINCE: 'province', BARANGAY: 'barangay'}
+
+
+def normalize_place(text):
+    """Accent-, case- and punctuation-insensitive form ('Parañaque' -> 'paranaque', 'Lapu-Lapu' -> 'lapu lapu')"""
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(ch if ch.isalnum() else ' ' for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.lower().split())
+
+
+def _name_keys(name):
+    """Keys a name is found under, as (whole-name keys, later-word keys)
+
+    'Barangay Bahay Toro' is found by 'bar', and less prominently by 'bah'
+    and 'tor'; a trailing 'City' and a leading 'City of' are optional
+    ('cebu' finds 'Cebu City').
+    """
+    words = normalize_place(name).split()
+    if len(words) > 1 and words[-1] == 'city':
+        variants = [words, words[:-1]]
+    elif len(words) > 2 and words[:2] == ['city', 'of']:
+        variants = [words, words[2:]]
+    else:
+        variants = [words]
+    whole = {' '.join(variant) for variant in variants}
+    later = {' '.join(variant[i:]) for variant in variants for i in range(1, len(variant))}
+    return whole, later - whole
+
+
+class PlaceIndex:
+    """Sorted prefix index over city, province and barangay names for autocomplete
+
+    Each ranking tier keeps a sorted list of (key, place) pairs, so a query
+    is one bisect per list plus a walk over the first ``limit`` matches; the
+    work doesn't grow with the number of places. Transport hubs come
+    first, then other cities, provinces and barangays. Within a tier,
+    names that start with the query come before names where a later word
+    does, and then they are alphabetical.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tiers = [([], []) for _ in range(8)]   # per tier and key kind: (sorted keys, places)
+        self._size = 0
+        self.source = None
+
+    def build(self, places, source=None):
+        """Replace the index with ``places``
+
+        Each place is a dict with ``name``, ``tier`` and a display
+        ``label``; optional ``aliases`` are indexed as extra keys.
+        """
+        tiers = [[] for _ in range(8)]
+        for place in places:
+            result = {
+                'name': place['name'],
+                'label': place.get('label') or place['name'],
+                'kind': TIER_KIND[place['tier']],
+                'is_hub': place['tier'] == HUB
+            }
+            whole, later = _name_keys(place['name'])
+            for alias in list(place.get('aliases') or ()) + ALIASES.get(place['name'], []):
+                alias_whole, alias_later = _name_keys(alias)
+                whole |= alias_whole
+                later |= alias_later
+            tiers[place['tier'] * 2].extend((key, result) for key in whole if key)
+            tiers[place['tier'] * 2 + 1].extend((key, result) for key in later - whole if key)
+
+        built = []
+        for entries in tiers:
+            entries.sort(key=lambda entry: (entry[0], entry[1]['label']))
+            built.append(([key for key, _ in entries], [result for _, result in entries]))
+
+        with self._lock:
+            self._tiers = built
+            self._size = len(places)
+            self.source = source
+
+    def search(self, prefix, limit=10):
+        """Up to ``limit`` places with a name (or word, or alias) starting with ``prefix``"""
+        needle = normalize_place(prefix)
+        if not needle:
+            return []
+
+        tiers = self._tiers
+        results = []
+        seen = set()
+        for keys, places in tiers:
+            i = bisect_left(keys, needle)
+            while i < len(keys) and keys[i].startswith(needle):
+                place = places[i]
+                if id(place) not in seen:
+                    seen.add(id(place))
+                    results.append(place)
+                    if len(results) >= limit:
+                        return [dict(place) for place in results]
+                i += 1
+        return [dict(place) for place in results]
+
+    def is_ready(self):
+        return self.source is not None
+
+    def get_stats(self):
+        return {'places': self._size, 'keys': sum(len(keys) for keys, _ in self._tiers), 'source': self.source}
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def load(self, db_handler, offline_mgr):
+        """Build from the location tables, or from the offline schedule cache when MySQL is down"""
+        if db_handler.check_connection():
+            places = db_handler.get_places()
+            if places:
+                self.build(places, source='database')
+                return True
+
+        # Offline: only the cities that appear in cached schedules, all ranked as cities
+        names = set()
+        for schedule in offline_mgr.get_cached_schedules():
+            names.update(
+                name for name in (schedule.get('origin_city'), schedule.get('destination_city')) if name
+            )
+        self.build([{'name': name, 'tier': CITY} for name in sorted(names)], source='offline_cache')
+        return bool(names)
+
+    def watch(self, monitor, db_handler, offline_mgr):
+        """Rebuild from the tables once MySQL comes back, if the index was built offline"""
+        def on_change(status):
+            if status['online'] and self.source != 'database':
+                self.load(db_handler, offline_mgr)
+
+        monitor.add_listener(on_change)
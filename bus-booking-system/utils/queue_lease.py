@@ -0,0 +1,70 @@
+import os
+import time
+import uuid
+
+
+class QueueLease:
+    """File-based leases so several sync workers can drain the offline queue without overlap
+
+    A lease is a file created with O_EXCL, so exactly one worker can hold
+    it. Leases older than ``ttl`` seconds belong to a crashed worker and
+    can be taken over.
+    """
+
+    def __init__(self, lease_dir, worker_id=None, ttl=300):
+        self.lease_dir = lease_dir
+        self.worker_id = worker_id or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.ttl = ttl
+        os.makedirs(lease_dir, exist_ok=True)
+
+    def _path(self, queue, name):
+        return f"{self.lease_dir}/{queue}-{name}.lease"
+
+    def claim(self, queue, name):
+        """Try to take the lease for one queued item; True if this worker now holds it"""
+        path = self._path(queue, name)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._break_if_expired(path):
+                    return False
+                continue
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.worker_id)
+            return True
+        return False
+
+    def _break_if_expired(self, path):
+        try:
+            if time.time() - os.stat(path).st_mtime < self.ttl:
+                return False
+            # Renaming is atomic, so only one worker wins the takeover
+            os.rename(path, f"{path}.{self.worker_id}.expired")
+            os.remove(f"{path}.{self.worker_id}.expired")
+            return True
+        except OSError:
+            # Another worker released or took over the lease first; try to claim again
+            return True
+
+    def renew(self, queue, name):
+        """Push out the expiry of a lease this worker holds; False if another worker has taken it over"""
+        path = self._path(queue, name)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                if f.read() != self.worker_id:
+                    return False
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+
+    def release(self, queue, name):
+        path = self._path(queue, name)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                owner = f.read()
+            if owner == self.worker_id:
+                os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,183 @@
+import itertools
+import threading
+import time
+
+from mysql.connector import Error
+
+LAG_QUERIES = (
+    ("SHOW REPLICA STATUS", 'Seconds_Behind_Source'),   # MySQL 8.0.22+
+    ("SHOW SLAVE STATUS", 'Seconds_Behind_Master')      # older MySQL, MariaDB
+)
+
+
+class Replica:
+    """One read replica: its pool plus the lag and health the router last measured"""
+
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.lag = None
+        self.healthy = False        # admitted only after the first lag check
+        self.reason = 'not checked yet'
+        self.checked_at = None
+
+
+class ReplicaRouter:
+    """Chooses where a read goes: a healthy replica, or the primary
+
+    A background thread measures each replica's replication lag every
+    ``check_interval`` seconds. A replica whose lag exceeds ``max_lag``,
+    whose replication has stopped, or that can't be reached is ejected,
+    and is taken back once its lag falls to half of ``max_lag``.
+    Reads fall back to the primary while no replica is healthy.
+
+    Read-your-writes: note_write(user_id) pins that user's reads to the
+    primary for ``sticky_window`` seconds, which should be longer than
+    ``max_lag``, so people always see their own new bookings. Pins are
+    per process.
+    """
+
+    def __init__(self, replicas, max_lag=5, check_interval=5, sticky_window=10, metrics=None):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_window = sticky_window
+        self.metrics = metrics
+
+        self._lock = threading.Lock()
+        self._sticky = {}                 # user_id -> monotonic time the pin ends
+        self._turn = itertools.count()
+        self._stop = threading.Event()
+        self._thread = None
+
+        if metrics and replicas:
+            metrics.register_gauge('busbooking_replica_lag_seconds', lambda router: [
+                ({'replica': replica.name}, replica.lag) for replica in router.replicas if replica.lag is not None
+            ], self)
+            metrics.register_gauge('busbooking_replica_healthy', lambda router: [
+                ({'replica': replica.name}, int(replica.healthy)) for replica in router.replicas
+            ], self)
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+    def note_write(self, user_id):
+        """Send ``user_id``'s reads to the primary until their write has reached the replicas"""
+        if user_id is None or not self.replicas:
+            return
+        with self._lock:
+            self._sticky[user_id] = time.monotonic() + self.sticky_window
+
+    def is_sticky(self, user_id):
+        if user_id is None:
+            return False
+        with self._lock:
+            until = self._sticky.get(user_id)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._sticky[user_id]
+                return False
+            return True
+
+    def choose(self, user_id=None):
+        """A healthy Replica for this read, or None for the primary"""
+        if not self.replicas or self.is_sticky(user_id):
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def mark_failed(self, replica, error):
+        """Eject a replica straight away when a checkout fails; the next check may readmit it"""
+        self._set_health(replica, False, f"unreachable: {error}")
+
+    def _set_health(self, replica, healthy, reason):
+        if replica.healthy != healthy:
+            print(f"Replica {replica.name} {'admitted' if healthy else 'ejected'}: {reason}")
+        replica.healthy = healthy
+        replica.reason = reason
+
+    # ------------------------------------------------------------------
+    # Lag checks
+    # ------------------------------------------------------------------
+    def measure_lag(self, replica):
+        """Seconds behind the primary, or None when replication isn't running"""
+        conn = replica.pool.get_connection()
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            for query, column in LAG_QUERIES:
+                try:
+                    cursor.execute(query)
+                except Error:
+                    continue
+                status = cursor.fetchone()
+                cursor.fetchall()
+                if not status:
+                    return None
+                return status.get(column)
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    def check(self):
+        """Measure every replica once and eject or readmit it"""
+        for replica in self.replicas:
+            try:
+                lag = self.measure_lag(replica)
+            except Error as e:
+                replica.lag = None
+                self._set_health(replica, False, f"unreachable: {e}")
+                continue
+            finally:
+                replica.checked_at = time.time()
+
+            replica.lag = lag
+            if lag is None:
+                self._set_health(replica, False, 'replication not running')
+            elif lag > self.max_lag:
+                self._set_health(replica, False, f"lag {lag}s over {self.max_lag}s")
+            elif replica.healthy or lag <= self.max_lag / 2:
+                self._set_health(replica, True, f"lag {lag}s")
+            else:
+                replica.reason = f"lag {lag}s, rejoins at {self.max_lag / 2}s"
+
+        # Drop expired pins so the map doesn't grow with every user who ever booked
+        now = time.monotonic()
+        with self._lock:
+            for user_id in [user_id for user_id, until in self._sticky.items() if until <= now]:
+                del self._sticky[user_id]
+
+    def start(self):
+        if not self.replicas or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='replica-lag', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Replica check error: {e}")
+            self._stop.wait(self.check_interval)
+
+    def get_stats(self):
+        with self._lock:
+            pinned = len(self._sticky)
+        return {
+            'replicas': [
+                {'name': replica.name, 'healthy': replica.healthy, 'lag': replica.lag,
+                 'reason': replica.reason, 'pool': replica.pool.get_stats()}
+                for replica in self.replicas
+            ],
+            'pinned_users': pinned
+        }
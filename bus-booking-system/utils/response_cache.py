@@ -0,0 +1,190 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from utils.schedule_index import normalize_city
+
+
+def search_key(origin, destination, travel_date):
+    """Cache key for a search; differently typed spellings of the same query share it"""
+    return ('search', normalize_city(origin), normalize_city(destination), str(travel_date))
+
+
+def schedule_key(schedule_id):
+    return ('schedule', str(schedule_id))
+
+
+def _schedule_ids(data):
+    rows = data if isinstance(data, list) else [data] if data else []
+    return {str(row['schedule_id']) for row in rows if row.get('schedule_id') is not None}
+
+
+def _seat_version(key, data):
+    # Changes exactly when a schedule in the result changes its seat count or status
+    rows = data if isinstance(data, list) else [data] if data else []
+    parts = [repr(key)] + sorted(
+        f"{row.get('schedule_id')}:{row.get('available_seats')}:{row.get('status')}" for row in rows
+    )
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:20]
+
+
+class ResponseCache:
+    """Search and schedule-detail results with ETags, for conditional GETs
+
+    Entries are keyed on the normalised query and carry a version hashed
+    from the seat counts of the schedules they contain, so an unchanged
+    result always gets the same ETag and a repeat request with
+    ``If-None-Match`` is answered 304 without a body. DatabaseHandler
+    calls invalidate_schedules() whenever a booking or sync changes a
+    schedule's seats; only entries containing one of those schedules are
+    dropped. ``ttl`` bounds how long changes made by other processes can
+    go unseen.
+
+    A route does ``since = cache.generation()``, then ``cache.get(key)`` or
+    builds the data and calls ``cache.put(key, data, since)``, and answers
+    with ``cache.respond(entry, request.headers.get('If-None-Match'))``.
+    """
+
+    def __init__(self, max_entries=2000, ttl=60, max_age=5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> entry, least recently used first
+        self._by_schedule = {}          # schedule_id -> keys of entries containing it
+        self._generation = 0
+        self._invalidated = {}          # schedule_id -> generation it was last invalidated in
+        self._hits = 0
+        self._misses = 0
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+    def generation(self):
+        """Take before loading data for put(), so a change made meanwhile isn't cached over"""
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry['stored_at'] > self.ttl:
+                if entry is not None:
+                    self._remove(key)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key, data, since=None):
+        """Wrap ``data`` in an entry and cache it, unless a schedule in it changed after ``since``
+
+        Empty results are returned but not stored: no schedule change could
+        invalidate them, and a failed query looks the same.
+        """
+        schedule_ids = _schedule_ids(data)
+        entry = {
+            'key': key,
+            'data': data,
+            'etag': f'"{_seat_version(key, data)}"',
+            'schedule_ids': schedule_ids,
+            'stored_at': time.monotonic(),
+            'body': None
+        }
+        if not schedule_ids:
+            return entry
+        with self._lock:
+            if since is not None and any(self._invalidated.get(i, -1) > since for i in schedule_ids):
+                return entry
+            self._remove(key)
+            self._entries[key] = entry
+            for schedule_id in schedule_ids:
+                self._by_schedule.setdefault(schedule_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for schedule_id in entry['schedule_ids']:
+            keys = self._by_schedule.get(schedule_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_schedule[schedule_id]
+
+    def invalidate_schedules(self, schedule_ids):
+        """Drop the cached results that contain any of ``schedule_ids``"""
+        with self._lock:
+            self._generation += 1
+            for schedule_id in schedule_ids:
+                schedule_id = str(schedule_id)
+                self._invalidated[schedule_id] = self._generation
+                for key in list(self._by_schedule.get(schedule_id, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_schedule.clear()
+            self._invalidated.clear()
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    def etag(self, entry, variant=None):
+        """ETag for one representation of ``entry``
+
+        JSON uses the entry's own tag; rendered pages pass a ``variant``
+        (e.g. the template name and user id) so they never match a tag
+        meant for another page or user.
+        """
+        if variant is None:
+            return entry['etag']
+        digest = hashlib.sha1(f"{entry['etag']}|{variant}".encode('utf-8')).hexdigest()[:20]
+        return f'"{digest}"'
+
+    def headers(self, entry, variant=None):
+        """ETag and Cache-Control; JSON is the same for everyone, pages carry per-user navigation"""
+        headers = {
+            'ETag': self.etag(entry, variant),
+            # Browsers (and proxies, for JSON) may reuse a result briefly, then must revalidate
+            'Cache-Control': f"{'public' if variant is None else 'private'}, max-age={self.max_age}, must-revalidate"
+        }
+        if variant is not None:
+            headers['Vary'] = 'Cookie'
+        return headers
+
+    def not_modified(self, entry, if_none_match, variant=None):
+        """Whether an ``If-None-Match`` header already names the current representation"""
+        if not if_none_match:
+            return False
+        etag = self.etag(entry, variant)
+        candidates = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in candidates or any(tag == etag or tag == f"W/{etag}" for tag in candidates)
+
+    def respond(self, entry, if_none_match=None):
+        """(status, body bytes, headers) for the JSON variant; 304 with an empty body when unchanged"""
+        headers = self.headers(entry)
+        if self.not_modified(entry, if_none_match):
+            return 304, b'', headers
+        if entry['body'] is None:
+            entry['body'] = json.dumps(entry['data'], default=str).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+        return 200, entry['body'], headers
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0
+            }
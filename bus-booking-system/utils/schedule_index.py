@@ -0,0 +1,324 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+
+def _departure_key(row):
+    departure = row.get('departure_time')
+    return (departure is None, departure)
+
+
+def _as_id(value):
+    """Schedule ids arrive as strings from forms and URLs; the index keys on ints"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def normalize_city(name):
+    """Lower-case and collapse whitespace so city lookups are case/spacing insensitive"""
+    return ' '.join(str(name or '').lower().split())
+
+
+class ScheduleIndex:
+    """In-memory schedule index keyed by (origin, destination, travel_date)
+
+    Rows come from ``loader()`` (full load) and ``reloader(ids)`` (targeted
+    reload of invalidated schedules). Substring city matches are answered
+    from a memoized table of the distinct city names, so a search never
+    scans schedule rows; the last ``max_matches`` distinct queries are kept.
+
+    invalidate() only reaches the index of the process that made the
+    change. Changes made by other worker processes are picked up by
+    ``poller(since)``, which returns the rows whose ``updated_at`` is at or
+    after ``since``; it runs at most every ``poll_interval`` seconds,
+    re-reading ``poll_overlap`` seconds before the newest ``updated_at``
+    seen so rows committed late are not missed. ``on_change(ids)`` is told
+    which schedules a poll changed.
+    """
+
+    def __init__(self, loader=None, reloader=None, ttl=None, window_days=None, max_matches=1024,
+                 poller=None, poll_interval=None, poll_overlap=0, on_change=None):
+        self.loader = loader
+        self.reloader = reloader
+        self.ttl = ttl
+        self.window_days = window_days
+        self.max_matches = max_matches
+        self.poller = poller
+        self.poll_interval = poll_interval
+        self.poll_overlap = poll_overlap
+        self.on_change = on_change
+
+        self._lock = threading.RLock()
+        self._refreshing = False
+        self._reloading = False
+        self._polling = False
+        self._polled_at = None
+        self._high_water_mark = None   # newest updated_at in the index
+        self._reloaded = threading.Condition(self._lock)
+        self._built_at = None
+        self._rows = {}        # schedule_id -> row
+        self._keys = {}        # schedule_id -> (origin, destination, travel_date)
+        self._by_date = {}     # travel_date -> {(origin, destination): set(schedule_ids)}
+        self._cities = set()   # distinct normalized city names
+        self._matches = OrderedDict()   # normalized query -> frozenset of matching city names, LRU
+        self._dirty = {}       # schedule_id -> when it was invalidated
+
+    # ------------------------------------------------------------------
+    # Building and maintenance
+    # ------------------------------------------------------------------
+    def build(self, rows, started_at=None):
+        """Replace the index contents with ``rows``
+
+        ``started_at`` is when the rows were read; schedules invalidated
+        after that moment stay marked stale in the new index.
+        """
+        with self._lock:
+            dirty = self._dirty
+            self._rows = {}
+            self._keys = {}
+            self._by_date = {}
+            self._cities = set()
+            self._matches = OrderedDict()
+            self._high_water_mark = None
+            for row in rows:
+                self._add(row)
+            self._dirty = {
+                schedule_id: marked for schedule_id, marked in dirty.items()
+                if started_at is not None and marked >= started_at and schedule_id in self._rows
+            }
+            self._built_at = time.monotonic()
+            self._polled_at = self._built_at
+
+    def upsert(self, rows):
+        """Insert or replace individual schedules"""
+        with self._lock:
+            for row in rows:
+                self._remove(row.get('schedule_id'))
+                self._add(row)
+
+    def remove(self, schedule_ids):
+        """Drop schedules from the index"""
+        with self._lock:
+            for schedule_id in schedule_ids:
+                self._remove(schedule_id)
+
+    def invalidate(self, schedule_id):
+        """Mark a schedule stale; it is reloaded before it is served again"""
+        schedule_id = _as_id(schedule_id)
+        with self._lock:
+            if schedule_id in self._rows:
+                self._dirty[schedule_id] = time.monotonic()
+
+    def _add(self, row):
+        schedule_id = row.get('schedule_id')
+        origin = normalize_city(row.get('origin_city'))
+        destination = normalize_city(row.get('destination_city'))
+        travel_date = str(row.get('travel_date') or '')
+
+        updated_at = row.get('updated_at')
+        if self.poller and updated_at is not None and (self._high_water_mark is None or updated_at > self._high_water_mark):
+            self._high_water_mark = updated_at
+
+        self._rows[schedule_id] = row
+        self._keys[schedule_id] = (origin, destination, travel_date)
+        self._by_date.setdefault(travel_date, {}).setdefault((origin, destination), set()).add(schedule_id)
+
+        for city in (origin, destination):
+            if city not in self._cities:
+                self._cities.add(city)
+                self._matches = OrderedDict()
+
+    def _remove(self, schedule_id):
+        key = self._keys.pop(schedule_id, None)
+        self._rows.pop(schedule_id, None)
+        if not key:
+            return
+        origin, destination, travel_date = key
+        pairs = self._by_date.get(travel_date, {})
+        ids = pairs.get((origin, destination))
+        if ids is not None:
+            ids.discard(schedule_id)
+            if not ids:
+                del pairs[(origin, destination)]
+        if not pairs:
+            self._by_date.pop(travel_date, None)
+
+    def _expired(self):
+        if self._built_at is None:
+            return True
+        return self.ttl is not None and time.monotonic() - self._built_at > self.ttl
+
+    def _ensure_fresh(self):
+        """Reload the whole window when the TTL runs out, then any invalidated schedules"""
+        if self.loader and self._expired():
+            with self._lock:
+                if self._refreshing:
+                    # Another thread is reloading; serve the current contents meanwhile
+                    loading = False
+                else:
+                    self._refreshing = True
+                    loading = True
+            if loading:
+                try:
+                    started_at = time.monotonic()
+                    rows = self.loader()
+                    if rows is not None:
+                        self.build(rows, started_at)
+                finally:
+                    with self._lock:
+                        self._refreshing = False
+
+        self._poll()
+
+        if not self.reloader:
+            return
+        with self._lock:
+            # One reload at a time; the others wait for it rather than serve
+            # seat counts known to be stale
+            while self._reloading:
+                self._reloaded.wait()
+            dirty = list(self._dirty)
+            if not dirty:
+                return
+            self._reloading = True
+        try:
+            started_at = time.monotonic()
+            rows = self.reloader(dirty)
+            if rows is None:
+                return
+            with self._lock:
+                self.upsert(rows)
+                fetched = {row.get('schedule_id') for row in rows}
+                for schedule_id in dirty:
+                    if schedule_id not in fetched:
+                        self._remove(schedule_id)
+                    # Keep the mark if the schedule was invalidated again mid-reload
+                    if self._dirty.get(schedule_id, started_at) < started_at:
+                        del self._dirty[schedule_id]
+        finally:
+            with self._lock:
+                self._reloading = False
+                self._reloaded.notify_all()
+
+    def _poll_due(self):
+        if not self.poller or self._high_water_mark is None:
+            return False
+        return time.monotonic() - self._polled_at >= (self.poll_interval or 0)
+
+    def _poll(self):
+        """Apply rows other processes changed since the last poll"""
+        with self._lock:
+            if self._polling or not self._poll_due():
+                # Another thread is polling (serve the current contents meanwhile), or not due
+                return
+            self._polling = True
+            since = self._high_water_mark - timedelta(seconds=self.poll_overlap)
+        changed = []
+        try:
+            rows = self.poller(since)
+            if rows is None:
+                return
+            with self._lock:
+                for row in rows:
+                    schedule_id = row.get('schedule_id')
+                    current = self._rows.get(schedule_id)
+                    if current is not None and current.get('updated_at') == row.get('updated_at') \
+                            and current.get('available_seats') == row.get('available_seats'):
+                        # Re-read from the overlap window
+                        continue
+                    if current is not None and current.get('updated_at') and row.get('updated_at') \
+                            and current['updated_at'] > row['updated_at']:
+                        # A reload that finished during the poll already has a newer row
+                        continue
+                    self._remove(schedule_id)
+                    if self.covers(row.get('travel_date')):
+                        self._add(row)
+                    changed.append(schedule_id)
+        finally:
+            with self._lock:
+                self._polling = False
+                self._polled_at = time.monotonic()
+        if changed and self.on_change:
+            self.on_change(changed)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def is_ready(self):
+        return self._built_at is not None
+
+    def needs_refresh(self):
+        """Whether the next search would reload from the loader/reloader/poller first"""
+        return ((self.loader is not None and self._expired()) or (self.reloader is not None and bool(self._dirty))
+                or self._poll_due())
+
+    def covers(self, travel_date):
+        """Whether ``travel_date`` falls inside the indexed window"""
+        if self.window_days is None:
+            return True
+        today = date.today()
+        return today.isoformat() <= str(travel_date) <= (today + timedelta(days=self.window_days)).isoformat()
+
+    def match_cities(self, query):
+        """City names containing ``query`` as a substring (memoized)"""
+        needle = normalize_city(query)
+        with self._lock:
+            found = self._matches.get(needle)
+            if found is None:
+                found = frozenset(city for city in self._cities if needle in city)
+                self._matches[needle] = found
+                if len(self._matches) > self.max_matches:
+                    self._matches.popitem(last=False)
+            else:
+                self._matches.move_to_end(needle)
+            return found
+
+    def search(self, origin, destination, travel_date, only_available=True, refresh=True):
+        """Schedules matching the city substrings on ``travel_date``, sorted by departure
+
+        Returns None when the index cannot answer (not loaded or date outside
+        the window) so the caller can fall back to the database. With
+        ``refresh=False`` the current contents are used as they are, so the
+        call never blocks on the loader.
+        """
+        travel_date = str(travel_date)
+        if not self.covers(travel_date):
+            return None
+        if refresh:
+            self._ensure_fresh()
+        if not self.is_ready():
+            return None
+
+        origins = self.match_cities(origin)
+        destinations = self.match_cities(destination)
+
+        with self._lock:
+            pairs = self._by_date.get(travel_date, {})
+            if len(origins) * len(destinations) <= len(pairs):
+                candidates = [pairs.get((o, d), ()) for o in origins for d in destinations]
+            else:
+                candidates = [ids for (o, d), ids in pairs.items() if o in origins and d in destinations]
+
+            results = []
+            for ids in candidates:
+                for schedule_id in ids:
+                    row = self._rows[schedule_id]
+                    if only_available and (row.get('available_seats') or 0) <= 0:
+                        continue
+                    results.append(dict(row))
+
+        results.sort(key=_departure_key)
+        return results
+
+    def get(self, schedule_id):
+        """A single schedule by id, or None if it is not indexed"""
+        self._ensure_fresh()
+        with self._lock:
+            row = self._rows.get(_as_id(schedule_id))
+            return dict(row) if row is not None else None
+
+    def __len__(self):
+        return len(self._rows)
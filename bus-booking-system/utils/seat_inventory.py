@@ -0,0 +1,437 @@
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from mysql.connector import Error
+
+FREE, HELD, BOOKED = 0, 1, 2
+STATUS_CODES = {'Available': FREE, 'Held': HELD, 'Booked': BOOKED}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+SEAT_LABEL = re.compile(r'(\d+)')
+
+
+def format_seats(seats):
+    """[10, 11] -> 'Seat-10, Seat-11' (the format stored in bookings.seat_numbers)"""
+    return ", ".join(f"Seat-{seat}" for seat in sorted(seats))
+
+
+def parse_seats(seat_numbers):
+    """'Seat-10, Seat-11' -> [10, 11]"""
+    seats = []
+    for label in str(seat_numbers or '').split(','):
+        match = SEAT_LABEL.search(label)
+        if match:
+            seats.append(int(match.group(1)))
+    return seats
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+class SeatMap:
+    """Seat states of one schedule; byte ``n - 1`` holds the state of seat ``n``"""
+
+    def __init__(self, total_seats):
+        self.states = bytearray(total_seats)
+        self.held_until = {}    # seat -> expiry of its hold
+        self.loaded_at = time.monotonic()
+
+    def set(self, seats, state, held_until=None):
+        for seat in seats:
+            if 1 <= seat <= len(self.states):
+                self.states[seat - 1] = state
+                if state == HELD:
+                    self.held_until[seat] = held_until
+                else:
+                    self.held_until.pop(seat, None)
+
+    def state(self, seat, now=None):
+        state = self.states[seat - 1]
+        if state == HELD:
+            expires = self.held_until.get(seat)
+            if expires is not None and expires < (now or datetime.now()):
+                return FREE
+        return state
+
+    def free_count(self):
+        now = datetime.now()
+        return sum(1 for seat in range(1, len(self.states) + 1) if self.state(seat, now) == FREE)
+
+
+class SeatInventory:
+    """Per-seat inventory with short holds, backed by the ``schedule_seats`` table
+
+    Every seat is its own row, so bookings hand out distinct seats and a
+    hold reserves exactly the seats shown to the passenger. Claims lock
+    only seat rows, always in seat-number order, so two bookings on one
+    bus wait for each other only when they want the same seats and never
+    deadlock; this needs nothing beyond plain ``FOR UPDATE`` and works on
+    the MariaDB 10.4 that XAMPP ships. The ``bus_schedules`` row isn't
+    locked: its ``available_seats`` counter is moved after the booking
+    commits (DatabaseHandler.apply_seat_counts). Seat maps are kept in
+    memory for display and refreshed after ``map_ttl`` seconds; the table
+    stays the source of truth. A background sweeper frees holds that have
+    run out.
+    """
+
+    def __init__(self, get_connection, hold_ttl=300, sweep_interval=30, map_ttl=30):
+        self.get_connection = get_connection
+        self.hold_ttl = hold_ttl
+        self.sweep_interval = sweep_interval
+        self.map_ttl = map_ttl
+
+        self._lock = threading.Lock()
+        self._maps = {}             # schedule_id -> SeatMap
+        self._initialized = set()   # schedules known to have seat rows
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Seat rows
+    # ------------------------------------------------------------------
+    def _ensure_seats(self, cursor, schedule_id):
+        """Create the seat rows of a schedule the first time it is booked
+
+        Seats named in existing bookings are marked booked; any further
+        difference between total and available seats (e.g. seeded counts)
+        is taken from the lowest-numbered free seats so both views agree.
+        """
+        if schedule_id in self._initialized:
+            return True
+
+        cursor.execute("SELECT COUNT(*) AS seats FROM schedule_seats WHERE schedule_id = %s", (schedule_id,))
+        if cursor.fetchone()['seats'] > 0:
+            self._initialized.add(schedule_id)
+        else:
+            # Not cached until seen committed; the caller's transaction may still roll back
+            cursor.execute(
+                "SELECT total_seats, available_seats FROM bus_schedules WHERE schedule_id = %s",
+                (schedule_id,)
+            )
+            schedule = cursor.fetchone()
+            if not schedule:
+                return False
+            total_seats = schedule['total_seats']
+
+            cursor.execute(
+                "SELECT booking_reference, seat_numbers FROM bookings "
+                "WHERE schedule_id = %s AND booking_status <> 'Cancelled'",
+                (schedule_id,)
+            )
+            booked = {}
+            for booking in cursor.fetchall():
+                for seat in parse_seats(booking['seat_numbers']):
+                    if 1 <= seat <= total_seats:
+                        booked.setdefault(seat, booking['booking_reference'])
+
+            unaccounted = total_seats - schedule['available_seats'] - len(booked)
+            for seat in range(1, total_seats + 1):
+                if unaccounted <= 0:
+                    break
+                if seat not in booked:
+                    booked[seat] = None
+                    unaccounted -= 1
+
+            cursor.executemany(
+                "INSERT IGNORE INTO schedule_seats (schedule_id, seat_number, status, booking_reference) "
+                "VALUES (%s, %s, %s, %s)",
+                [
+                    (schedule_id, seat, 'Booked' if seat in booked else 'Available', booked.get(seat))
+                    for seat in range(1, total_seats + 1)
+                ]
+            )
+        return True
+
+    def _claimable(self, cursor, schedule_id, limit=None, seats=None, hold_token=None):
+        """Lock free seats (or seats held under ``hold_token``) and return their numbers
+
+        Rows are locked in seat-number order, the same order every claim
+        uses, so concurrent claims on a schedule queue instead of deadlocking.
+        """
+        now = datetime.now()
+        if hold_token:
+            query = (
+                "SELECT seat_number FROM schedule_seats "
+                "WHERE schedule_id = %s AND status = 'Held' AND hold_token = %s "
+                "ORDER BY seat_number FOR UPDATE"
+            )
+            params = [schedule_id, hold_token]
+        else:
+            query = (
+                "SELECT seat_number FROM schedule_seats "
+                "WHERE schedule_id = %s AND (status = 'Available' OR (status = 'Held' AND held_until < %s))"
+            )
+            params = [schedule_id, now]
+            if seats:
+                query += f" AND seat_number IN ({_placeholders(seats)})"
+                params.extend(seats)
+            query += " ORDER BY seat_number"
+            if limit is not None:
+                query += " LIMIT %s"
+                params.append(limit)
+            query += " FOR UPDATE"
+        cursor.execute(query, tuple(params))
+        return [row['seat_number'] for row in cursor.fetchall()]
+
+    def book_seats(self, cursor, schedule_id, seat_count, booking_reference, hold_token=None):
+        """Mark ``seat_count`` seats booked inside the caller's transaction
+
+        Uses the seats held under ``hold_token`` when given, otherwise the
+        lowest free seats. Returns the seat numbers, or None if there are
+        not enough. Call mark_booked() once the transaction commits.
+        """
+        allocated = self.book_seats_for_batch(cursor, schedule_id, [(booking_reference, seat_count)], hold_token)
+        return allocated[0] if allocated else None
+
+    def book_seats_for_batch(self, cursor, schedule_id, requests, hold_token=None):
+        """Allocate seats for several (booking_reference, seat_count) requests in one pass
+
+        Returns one seat list per request, or None if the free seats do not
+        cover all of them. A hold that no longer covers the request (part of
+        it ran out and was taken) is given back, so the caller can fall back
+        to free seats without leaving the rest stuck until it expires.
+        """
+        if not self._ensure_seats(cursor, schedule_id):
+            return None
+        needed = sum(seat_count for _, seat_count in requests)
+        if hold_token:
+            seats = self._claimable(cursor, schedule_id, hold_token=hold_token)
+        else:
+            seats = self._claimable(cursor, schedule_id, limit=needed)
+        if len(seats) < needed:
+            if hold_token:
+                self._free_seats(cursor, schedule_id, seats)
+            return None
+
+        allocated = []
+        updates = []
+        for booking_reference, seat_count in requests:
+            taken, seats = seats[:seat_count], seats[seat_count:]
+            allocated.append(taken)
+            updates.extend((booking_reference, schedule_id, seat) for seat in taken)
+        cursor.executemany(
+            "UPDATE schedule_seats SET status = 'Booked', booking_reference = %s, "
+            "hold_token = NULL, held_until = NULL "
+            "WHERE schedule_id = %s AND seat_number = %s",
+            updates
+        )
+        if hold_token:
+            # Held more than was booked; give the rest back
+            self._free_seats(cursor, schedule_id, seats)
+        return allocated
+
+    def _free_seats(self, cursor, schedule_id, seats):
+        if seats:
+            cursor.execute(
+                f"UPDATE schedule_seats SET status = 'Available', hold_token = NULL, held_until = NULL "
+                f"WHERE schedule_id = %s AND seat_number IN ({_placeholders(seats)})",
+                (schedule_id, *seats)
+            )
+
+    def unbook_seats(self, cursor, schedule_id, seats):
+        """Return seats booked earlier in the same transaction (e.g. the insert failed)"""
+        if seats:
+            cursor.execute(
+                f"UPDATE schedule_seats SET status = 'Available', booking_reference = NULL "
+                f"WHERE schedule_id = %s AND seat_number IN ({_placeholders(seats)})",
+                (schedule_id, *seats)
+            )
+
+    def mark_booked(self, schedule_id, seats):
+        """Record committed bookings in the in-memory seat map"""
+        with self._lock:
+            seat_map = self._maps.get(schedule_id)
+            if seat_map is not None:
+                seat_map.set(seats, BOOKED)
+
+    # ------------------------------------------------------------------
+    # Holds
+    # ------------------------------------------------------------------
+    def hold_seats(self, schedule_id, seat_count, seat_numbers=None):
+        """Hold seats for ``hold_ttl`` seconds while the passenger fills out the booking form
+
+        ``seat_numbers`` asks for specific seats; otherwise the lowest free
+        seats are held. The returned ``hold_token`` is passed back when
+        booking so exactly these seats are used.
+        """
+        if not seat_numbers and (not isinstance(seat_count, int) or seat_count < 1):
+            return {'success': False, 'message': 'Choose at least one seat'}
+
+        conn = self.get_connection()
+        if not conn:
+            return {'success': False, 'message': 'Database connection failed'}
+
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            if not self._ensure_seats(cursor, schedule_id):
+                conn.rollback()
+                return {'success': False, 'message': 'Schedule not found'}
+
+            if seat_numbers:
+                seat_numbers = sorted({int(seat) for seat in seat_numbers})
+                seats = self._claimable(cursor, schedule_id, seats=seat_numbers)
+                if seats != seat_numbers:
+                    conn.rollback()
+                    return {'success': False, 'message': 'Some of the selected seats are no longer available'}
+            else:
+                seats = self._claimable(cursor, schedule_id, limit=seat_count)
+                if len(seats) < seat_count:
+                    conn.rollback()
+                    return {'success': False, 'message': 'Not enough seats available'}
+
+            hold_token = uuid.uuid4().hex
+            held_until = datetime.now() + timedelta(seconds=self.hold_ttl)
+            cursor.execute(
+                f"UPDATE schedule_seats SET status = 'Held', hold_token = %s, held_until = %s "
+                f"WHERE schedule_id = %s AND seat_number IN ({_placeholders(seats)})",
+                (hold_token, held_until, schedule_id, *seats)
+            )
+            conn.commit()
+
+            with self._lock:
+                seat_map = self._maps.get(schedule_id)
+                if seat_map is not None:
+                    seat_map.set(seats, HELD, held_until)
+            return {
+                'success': True,
+                'hold_token': hold_token,
+                'seat_numbers': format_seats(seats),
+                'seats': seats,
+                'expires_at': held_until.isoformat()
+            }
+
+        except Error as e:
+            conn.rollback()
+            print(f"Seat hold error: {e}")
+            return {'success': False, 'message': f'Seat hold failed: {str(e)}'}
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    def release_hold(self, hold_token):
+        """Give held seats back before their hold runs out (e.g. the form was abandoned)"""
+        return self._release("status = 'Held' AND hold_token = %s", (hold_token,)) > 0
+
+    def sweep_expired_holds(self):
+        """Free every hold that has run out; returns the number of seats released"""
+        return self._release("status = 'Held' AND held_until < %s", (datetime.now(),))
+
+    def _release(self, condition, params):
+        conn = self.get_connection()
+        if not conn:
+            return 0
+
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT schedule_id, seat_number FROM schedule_seats WHERE {condition} FOR UPDATE",
+                params
+            )
+            released = cursor.fetchall()
+            if not released:
+                conn.rollback()
+                return 0
+            cursor.execute(
+                f"UPDATE schedule_seats SET status = 'Available', hold_token = NULL, held_until = NULL "
+                f"WHERE {condition}",
+                params
+            )
+            conn.commit()
+
+            with self._lock:
+                for row in released:
+                    seat_map = self._maps.get(row['schedule_id'])
+                    if seat_map is not None:
+                        seat_map.set([row['seat_number']], FREE)
+            return len(released)
+
+        except Error as e:
+            conn.rollback()
+            print(f"Seat release error: {e}")
+            return 0
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Seat maps
+    # ------------------------------------------------------------------
+    def _load_map(self, schedule_id):
+        conn = self.get_connection()
+        if not conn:
+            return None
+
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            if not self._ensure_seats(cursor, schedule_id):
+                return None
+            conn.commit()
+            cursor.execute(
+                "SELECT seat_number, status, held_until FROM schedule_seats "
+                "WHERE schedule_id = %s ORDER BY seat_number",
+                (schedule_id,)
+            )
+            rows = cursor.fetchall()
+            seat_map = SeatMap(rows[-1]['seat_number'] if rows else 0)
+            for row in rows:
+                seat_map.set([row['seat_number']], STATUS_CODES[row['status']], row['held_until'])
+            return seat_map
+
+        except Error as e:
+            print(f"Seat map error: {e}")
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    def get_seat_map(self, schedule_id):
+        """Seat-by-seat availability for display: total, free count and each seat's status"""
+        with self._lock:
+            seat_map = self._maps.get(schedule_id)
+        if seat_map is None or time.monotonic() - seat_map.loaded_at > self.map_ttl:
+            seat_map = self._load_map(schedule_id)
+            if seat_map is None:
+                return None
+            with self._lock:
+                self._maps[schedule_id] = seat_map
+
+        now = datetime.now()
+        return {
+            'schedule_id': schedule_id,
+            'total_seats': len(seat_map.states),
+            'available_seats': seat_map.free_count(),
+            'seats': [
+                {'seat_number': seat, 'status': STATUS_NAMES[seat_map.state(seat, now)]}
+                for seat in range(1, len(seat_map.states) + 1)
+            ]
+        }
+
+    # ------------------------------------------------------------------
+    # Background sweeper
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sweep_loop, name='seat-hold-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep_expired_holds()
+            except Exception as e:
+                print(f"Seat hold sweep error: {e}")
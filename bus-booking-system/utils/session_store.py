@@ -0,0 +1,337 @@
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class SQLiteSessionBackend:
+    """Sessions in one local SQLite file, shared by every app process on the host"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "sid TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)")
+
+    def get(self, sid):
+        """(data, expires_at) or None when missing or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, expires_at FROM sessions WHERE sid = ? AND expires_at > ?",
+                (sid, time.time())
+            ).fetchone()
+        return (bytes(row[0]), row[1]) if row else None
+
+    def put(self, sid, data, expires_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (sid, data, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(sid) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at",
+                (sid, data, expires_at)
+            )
+
+    def delete(self, sid):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def sweep(self):
+        """Delete expired sessions; returns how many were removed"""
+        with self._lock:
+            return self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSessionBackend:
+    """Sessions in any Redis-protocol server; the server expires keys itself"""
+
+    def __init__(self, url, prefix='session:'):
+        if redis is None:
+            raise RuntimeError("SESSION_BACKEND = 'redis' needs the redis package (pip install redis)")
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, sid):
+        key = self.prefix + sid
+        pipe = self._client.pipeline()
+        pipe.get(key)
+        pipe.pttl(key)
+        data, ttl_ms = pipe.execute()
+        if data is None:
+            return None
+        return data, time.time() + max(ttl_ms, 0) / 1000.0
+
+    def put(self, sid, data, expires_at):
+        ttl_ms = max(1, int((expires_at - time.time()) * 1000))
+        self._client.set(self.prefix + sid, data, px=ttl_ms)
+
+    def delete(self, sid):
+        self._client.delete(self.prefix + sid)
+
+    def sweep(self):
+        return 0
+
+    def close(self):
+        self._client.close()
+
+
+class SessionStore:
+    """In-process LRU tier in front of a shared session backend
+
+    Recently used sessions are served from memory and only re-read from the
+    backend after ``local_ttl`` seconds, so another process's writes still
+    show up. save() only writes sessions whose contents changed, plus an
+    expiry refresh once less than half of the TTL is left; an idle but
+    active session therefore costs no write per request. A background
+    sweeper drops expired sessions from both tiers.
+    """
+
+    def __init__(self, backend, ttl=86400, cache_size=1024, local_ttl=5, sweep_interval=300):
+        self.backend = backend
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.local_ttl = local_ttl
+        self.sweep_interval = sweep_interval
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # sid -> (data, expires_at, fetched_at)
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.skipped_writes = 0
+
+    def _remember(self, sid, data, expires_at):
+        with self._lock:
+            self._cache[sid] = (data, expires_at, time.monotonic())
+            self._cache.move_to_end(sid)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def load(self, sid):
+        """(data, expires_at) for a live session, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(sid)
+            if entry is not None:
+                data, expires_at, fetched_at = entry
+                if expires_at <= now:
+                    del self._cache[sid]
+                elif time.monotonic() - fetched_at < self.local_ttl:
+                    self._cache.move_to_end(sid)
+                    self.hits += 1
+                    return data, expires_at
+
+        self.misses += 1
+        try:
+            stored = self.backend.get(sid)
+        except Exception as e:
+            print(f"Session load error: {e}")
+            # Keep serving the copy we have rather than logging the user out
+            return (entry[0], entry[1]) if entry is not None and entry[1] > now else None
+
+        if stored is None:
+            with self._lock:
+                self._cache.pop(sid, None)
+            return None
+        self._remember(sid, stored[0], stored[1])
+        return stored
+
+    def save(self, sid, data, loaded_data=None, loaded_expires=None, ttl=None):
+        """Persist ``data`` unless it equals what was loaded and the expiry is still fresh
+
+        Returns the expiry time the session now has.
+        """
+        ttl = ttl or self.ttl
+        now = time.time()
+        if data == loaded_data and loaded_expires is not None and loaded_expires - now > ttl / 2:
+            self.skipped_writes += 1
+            return loaded_expires
+
+        expires_at = now + ttl
+        try:
+            self.backend.put(sid, data, expires_at)
+            self.writes += 1
+        except Exception as e:
+            print(f"Session save error: {e}")
+        self._remember(sid, data, expires_at)
+        return expires_at
+
+    def delete(self, sid):
+        with self._lock:
+            self._cache.pop(sid, None)
+        try:
+            self.backend.delete(sid)
+        except Exception as e:
+            print(f"Session delete error: {e}")
+
+    def sweep(self):
+        """Drop expired sessions from memory and the backend; returns the backend count"""
+        now = time.time()
+        with self._lock:
+            for sid in [sid for sid, entry in self._cache.items() if entry[1] <= now]:
+                del self._cache[sid]
+        return self.backend.sweep()
+
+    def get_stats(self):
+        return {
+            'cached_sessions': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'skipped_writes': self.skipped_writes
+        }
+
+    # ------------------------------------------------------------------
+    # Background sweeper
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sweep_loop, name='session-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Session sweep error: {e}")
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict whose contents live in a SessionStore; the cookie holds only the id"""
+
+    def __init__(self, initial=None, sid=None, new=False, loaded_data=None, loaded_expires=None):
+        def on_update(self):
+            self.modified = True
+
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.loaded_data = loaded_data
+        self.loaded_expires = loaded_expires
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface backed by a SessionStore"""
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store):
+        self.store = store
+
+    def _new_session(self):
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid:
+            return self._new_session()
+
+        stored = self.store.load(sid)
+        if stored is None:
+            return self._new_session()
+        data, expires_at = stored
+        try:
+            initial = self.serializer.loads(data.decode('utf-8'))
+        except (ValueError, UnicodeDecodeError):
+            return self._new_session()
+        return ServerSideSession(initial, sid=sid, loaded_data=data, loaded_expires=expires_at)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            # Emptied (e.g. logout): forget it on both sides; never store empty new sessions
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        ttl = None
+        if session.permanent:
+            ttl = int(app.permanent_session_lifetime.total_seconds())
+        data = self.serializer.dumps(dict(session)).encode('utf-8')
+        self.store.save(session.sid, data, session.loaded_data, session.loaded_expires, ttl)
+
+        if session.new or session.modified or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app)
+            )
+
+    def regenerate(self, session):
+        """Move the session to a fresh id (call on login to prevent session fixation)"""
+        if session.sid and not session.new:
+            self.store.delete(session.sid)
+        session.sid = secrets.token_urlsafe(32)
+        session.new = True
+        session.loaded_data = None
+        session.loaded_expires = None
+        session.modified = True
+
+
+def create_session_store(config):
+    """SessionStore for the backend named by ``config.SESSION_BACKEND``"""
+    backend_name = getattr(config, 'SESSION_BACKEND', 'sqlite')
+    if backend_name == 'redis':
+        backend = RedisSessionBackend(config.SESSION_REDIS_URL)
+    elif backend_name == 'sqlite':
+        backend = SQLiteSessionBackend(config.SESSION_SQLITE_PATH)
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend_name}")
+
+    return SessionStore(
+        backend,
+        ttl=config.SESSION_TTL,
+        cache_size=config.SESSION_CACHE_SIZE,
+        local_ttl=config.SESSION_LOCAL_TTL,
+        sweep_interval=config.SESSION_SWEEP_INTERVAL
+    )
+
+
+def init_app(app, config):
+    """Install the server-side session interface on ``app`` and start the sweeper"""
+    store = create_session_store(config)
+    app.session_interface = ServerSideSessionInterface(store)
+    app.permanent_session_lifetime = timedelta(seconds=config.SESSION_TTL)
+    store.start()
+    return store
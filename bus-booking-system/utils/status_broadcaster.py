@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'   # stop nginx from buffering the stream
+}
+
+
+class StatusBroadcaster:
+    """One shared connection/sync status, pushed to every open page
+
+    The health monitor reports online/offline transitions, the sync code
+    reports progress, and a single background thread samples the pending
+    offline count; each change bumps ``version`` and wakes all waiters.
+    Pages subscribe with server-sent events (stream()) or long-poll
+    (wait_for_change()), so no request ever probes the database itself.
+
+    A stream route answers 503 when subscribe() refuses (the page then
+    falls back to polling) and otherwise returns
+    ``Response(broadcaster.stream(request.headers.get('Last-Event-ID'), subscribed=True),
+    mimetype='text/event-stream', headers=SSE_HEADERS)``. The polling
+    route returns ``snapshot()[1]`` as JSON.
+    """
+
+    def __init__(self, pending_count=None, sample_interval=5, heartbeat=20,
+                 max_stream_seconds=300, max_subscribers=500, retry_ms=5000):
+        self.pending_count = pending_count
+        self.sample_interval = sample_interval
+        self.heartbeat = heartbeat
+        self.max_stream_seconds = max_stream_seconds
+        self.max_subscribers = max_subscribers
+        self.retry_ms = retry_ms
+
+        self._cond = threading.Condition()
+        self._version = 0
+        self._state = {
+            'online': False,
+            'last_changed': None,
+            'pending_sync': 0,
+            'sync': None
+        }
+        self._subscribers = 0
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+    def add_listener(self, callback):
+        """Call ``callback(version, state)`` from the publishing thread after every change"""
+        self._listeners.append(callback)
+
+    def publish(self, **changes):
+        """Merge ``changes`` into the shared state; subscribers wake only if something changed"""
+        with self._cond:
+            if all(self._state.get(key) == value for key, value in changes.items()):
+                return self._version
+            self._state.update(changes)
+            self._version += 1
+            self._cond.notify_all()
+            version, state = self._version, dict(self._state)
+
+        for callback in list(self._listeners):
+            try:
+                callback(version, state)
+            except Exception as e:
+                print(f"Status listener error: {e}")
+        return version
+
+    def on_health_change(self, status):
+        """HealthMonitor listener"""
+        self.publish(online=status['online'], last_changed=status['last_changed'])
+
+    def watch(self, monitor):
+        """Take the current state from ``monitor`` and follow its transitions"""
+        monitor.add_listener(self.on_health_change)
+        self.on_health_change(monitor.get_status())
+
+    def on_sync_progress(self, progress):
+        """SyncManager progress callback; ``progress`` is None once nothing is running"""
+        self.publish(sync=progress)
+        if not progress or progress.get('phase') == 'done':
+            self.sample()
+
+    def sample(self):
+        """Re-read the pending offline count"""
+        if self.pending_count is None:
+            return
+        try:
+            self.publish(pending_sync=self.pending_count())
+        except Exception as e:
+            print(f"Status sample error: {e}")
+
+    # ------------------------------------------------------------------
+    # Subscribing
+    # ------------------------------------------------------------------
+    def snapshot(self):
+        """(version, state) as it is now; also the polling fallback's response"""
+        with self._cond:
+            return self._version, dict(self._state)
+
+    def wait_for_change(self, since=None, timeout=25):
+        """Long-poll: return (version, state) once the version passes ``since`` or ``timeout`` expires"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while since is not None and self._version <= since and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._version, dict(self._state)
+
+    def subscribe(self):
+        """Reserve a stream slot; False when the stream limit is reached"""
+        with self._cond:
+            if self._subscribers >= self.max_subscribers:
+                return False
+            self._subscribers += 1
+            return True
+
+    def unsubscribe(self):
+        with self._cond:
+            self._subscribers = max(0, self._subscribers - 1)
+
+    def _event(self, version, state):
+        return f"id: {version}\nevent: status\ndata: {json.dumps(state, default=str)}\n\n"
+
+    def stream(self, last_event_id=None, subscribed=False):
+        """Server-sent events: the current state, then every change, with keep-alive comments
+
+        The stream ends after ``max_stream_seconds`` so request threads are
+        recycled; the browser reconnects on its own and resumes from
+        ``Last-Event-ID``. Pass ``subscribed=True`` when the route has
+        already called subscribe().
+        """
+        if not subscribed and not self.subscribe():
+            return
+        try:
+            try:
+                since = int(last_event_id) if last_event_id else None
+            except ValueError:
+                since = None
+
+            yield f"retry: {self.retry_ms}\n\n"
+            version, state = self.snapshot()
+            if since is None or version != since:
+                yield self._event(version, state)
+
+            ends_at = time.monotonic() + self.max_stream_seconds
+            while not self._stop.is_set():
+                remaining = ends_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                new_version, state = self.wait_for_change(version, min(self.heartbeat, remaining))
+                if new_version != version:
+                    version = new_version
+                    yield self._event(version, state)
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe()
+
+    def get_stats(self):
+        with self._cond:
+            return {'version': self._version, 'subscribers': self._subscribers}
+
+    # ------------------------------------------------------------------
+    # Background sampling of the pending count
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._sample_loop, name='status-broadcaster', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.sample_interval):
+            self.sample()
@@ -1,235 +1,865 @@
-import json
-import os
-import mysql.connector
-from datetime import datetime
-import hashlib
-
-class SyncManager:
-    def __init__(self):
-        self.offline_dir = "database/offline_data"
-    
-    def hash_password(self, password):
-        """Hash password consistently with database"""
-        return hashlib.sha256(password.encode()).hexdigest()
-    
-    def sync_all_data(self, db_handler, offline_mgr):
-        """Sync all offline data to MySQL database"""
-        results = {
-            'success': True,
-            'users_synced': 0,
-            'bookings_synced': 0,
-            'errors': []
-        }
-        
-        # Sync offline users first
-        results.update(self.sync_offline_users(db_handler))
-        
-        # Sync offline bookings
-        results.update(self.sync_offline_bookings(db_handler))
-        
-        # Update success flag if there were errors
-        if results['errors']:
-            results['success'] = False
-        
-        return results
-    
-    def sync_offline_users(self, db_handler):
-        """Sync offline users to database"""
-        results = {
-            'users_synced': 0,
-            'user_errors': []
-        }
-        
-        users_dir = f"{self.offline_dir}/users"
-        if not os.path.exists(users_dir):
-            return results
-        
-        for filename in os.listdir(users_dir):
-            if not filename.endswith('.json'):
-                continue
-                
-            filepath = f"{users_dir}/{filename}"
-            user_synced = False
-            
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    user_data = json.load(f)
-                
-                # Connect to database
-                conn = db_handler.get_connection()
-                if not conn:
-                    results['user_errors'].append(f"No database connection for {filename}")
-                    continue
-                
-                cursor = conn.cursor()
-                
-                # Check if user already exists
-                check_query = "SELECT user_id FROM users WHERE username = %s OR email = %s"
-                cursor.execute(check_query, (user_data['username'], user_data['email']))
-                existing_user = cursor.fetchone()
-                
-                if existing_user:
-                    # User already exists, just delete the offline file
-                    os.remove(filepath)
-                    results['users_synced'] += 1
-                    continue
-                
-                # Insert new user
-                hashed_pw = self.hash_password(user_data['password'])
-                insert_query = """
-                INSERT INTO users 
-                (username, email, password_hash, full_name, phone, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """
-                
-                cursor.execute(insert_query, (
-                    user_data['username'],
-                    user_data['email'],
-                    hashed_pw,
-                    user_data['full_name'],
-                    user_data.get('phone', ''),
-                    user_data.get('created_at', datetime.now().isoformat())
-                ))
-                
-                conn.commit()
-                cursor.close()
-                conn.close()
-                
-                # Delete offline file after successful sync
-                os.remove(filepath)
-                results['users_synced'] += 1
-                print(f"Synced user: {user_data['username']}")
-                
-            except mysql.connector.Error as e:
-                results['user_errors'].append(f"Database error for {filename}: {str(e)}")
-                print(f"Database error syncing user {filename}: {e}")
-            except Exception as e:
-                results['user_errors'].append(f"Error processing {filename}: {str(e)}")
-                print(f"Error syncing user {filename}: {e}")
-        
-        return results
-    
-    def sync_offline_bookings(self, db_handler):
-        """Sync offline bookings to database"""
-        results = {
-            'bookings_synced': 0,
-            'booking_errors': []
-        }
-        
-        bookings_dir = f"{self.offline_dir}/bookings"
-        if not os.path.exists(bookings_dir):
-            return results
-        
-        for filename in os.listdir(bookings_dir):
-            if not filename.endswith('.json'):
-                continue
-                
-            filepath = f"{bookings_dir}/{filename}"
-            
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    booking_data = json.load(f)
-                
-                # Connect to database
-                conn = db_handler.get_connection()
-                if not conn:
-                    results['booking_errors'].append(f"No database connection for {filename}")
-                    continue
-                
-                cursor = conn.cursor(dictionary=True)
-                
-                # Get user_id from username
-                user_query = "SELECT user_id FROM users WHERE username = %s"
-                cursor.execute(user_query, (booking_data.get('username', ''),))
-                user_result = cursor.fetchone()
-                
-                if not user_result:
-                    results['booking_errors'].append(f"User not found for booking {filename}")
-                    cursor.close()
-                    conn.close()
-                    continue
-                
-                user_id = user_result['user_id']
-                
-                # Check if schedule still has available seats
-                schedule_query = "SELECT available_seats, fare FROM bus_schedules WHERE schedule_id = %s"
-                cursor.execute(schedule_query, (booking_data['schedule_id'],))
-                schedule_result = cursor.fetchone()
-                
-                if not schedule_result:
-                    results['booking_errors'].append(f"Schedule not found for booking {filename}")
-                    cursor.close()
-                    conn.close()
-                    continue
-                
-                seat_count = booking_data.get('seat_count', 1)
-                if schedule_result['available_seats'] < seat_count:
-                    results['booking_errors'].append(f"Not enough seats for booking {filename}")
-                    cursor.close()
-                    conn.close()
-                    continue
-                
-                # Insert booking
-                booking_query = """
-                INSERT INTO bookings 
-                (user_id, schedule_id, booking_reference, passenger_name, passenger_age, 
-                 passenger_gender, seat_numbers, total_fare, booking_status, booking_date)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'Confirmed', %s)
-                """
-                
-                seat_numbers = ", ".join([f"Seat-{i+1}" for i in range(seat_count)])
-                total_fare = booking_data.get('total_fare', schedule_result['fare'] * seat_count)
-                
-                cursor.execute(booking_query, (
-                    user_id,
-                    booking_data['schedule_id'],
-                    booking_data['booking_reference'],
-                    booking_data['passenger_name'],
-                    booking_data.get('passenger_age', 25),
-                    booking_data.get('passenger_gender', 'Other'),
-                    seat_numbers,
-                    total_fare,
-                    booking_data.get('booking_date', datetime.now().isoformat())
-                ))
-                
-                # Update available seats
-                update_query = """
-                UPDATE bus_schedules 
-                SET available_seats = available_seats - %s 
-                WHERE schedule_id = %s
-                """
-                cursor.execute(update_query, (seat_count, booking_data['schedule_id']))
-                
-                conn.commit()
-                cursor.close()
-                conn.close()
-                
-                # Delete offline file after successful sync
-                os.remove(filepath)
-                results['bookings_synced'] += 1
-                print(f"Synced booking: {booking_data['booking_reference']}")
-                
-            except mysql.connector.Error as e:
-                results['booking_errors'].append(f"Database error for {filename}: {str(e)}")
-                print(f"Database error syncing booking {filename}: {e}")
-            except Exception as e:
-                results['booking_errors'].append(f"Error processing {filename}: {str(e)}")
-                print(f"Error syncing booking {filename}: {e}")
-        
-        return results
-    
-    def cache_schedules(self, schedules):
-        """Cache schedules for offline use"""
-        try:
-            cache_dir = f"{self.offline_dir}/schedules"
-            os.makedirs(cache_dir, exist_ok=True)
-            
-            cache_file = f"{cache_dir}/cache.json"
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(schedules, f, indent=2, ensure_ascii=False)
-            
-            print(f"Cached {len(schedules)} schedules for offline use")
-            return True
-        except Exception as e:
-            print(f"Cache error: {e}")
-            return False
\ No newline at end of file
+import json
+import os
+import mysql.connector
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+
+from config import Config
+from utils.columnar_cache import (
+    ColumnarScheduleCache, append_delta, current_columnar, delta_path, merge_delta, write_columnar
+)
+from utils.credentials import HasherBusy, get_hasher
+from utils.metrics import get_metrics
+from utils.offline_journal import shared_journal
+from utils.queue_lease import QueueLease
+from utils.seat_inventory import format_seats
+
+class SyncManager:
+    def __init__(self, offline_dir=None):
+        self.offline_dir = offline_dir or Config.OFFLINE_DATA_DIR
+        self.lease = QueueLease(f"{self.offline_dir}/leases", ttl=Config.SYNC_LEASE_TTL)
+        self.journal = shared_journal(
+            f"{self.offline_dir}/journal",
+            segment_bytes=Config.OFFLINE_JOURNAL_SEGMENT_BYTES,
+            fsync=Config.OFFLINE_JOURNAL_FSYNC
+        )
+        get_metrics().instrument(self, 'sync', (
+            'sync_all_data', 'sync_offline_users', 'sync_offline_bookings', 'bulk_sync_offline_users',
+            'bulk_sync_offline_bookings', 'parallel_sync_offline_bookings', 'refresh_schedule_cache',
+            'cache_schedules'
+        ))
+    
+    def hash_password(self, password):
+        """Hash password consistently with database"""
+        return get_hasher().hash(password)
+    
+    def _password_hash(self, user_data):
+        """Hash stored with an offline user; older entries still carry the plaintext"""
+        if user_data.get('password_hash'):
+            return user_data['password_hash']
+        return self.hash_password(user_data['password'])
+    
+    def sync_all_data(self, db_handler, offline_mgr, bulk=True, workers=None, progress=None):
+        """Sync all offline data to MySQL database
+        
+        ``progress``, if given, is called with a small dict as each phase
+        starts and once more when the sync is done.
+        """
+        workers = workers or Config.SYNC_WORKERS
+        results = {
+            'success': True,
+            'users_synced': 0,
+            'bookings_synced': 0,
+            'errors': []
+        }
+        
+        def report(phase):
+            if progress:
+                progress({
+                    'phase': phase,
+                    'users_synced': results['users_synced'],
+                    'bookings_synced': results['bookings_synced']
+                })
+        
+        # Sync offline users first
+        report('users')
+        if bulk:
+            results.update(self.bulk_sync_offline_users(db_handler))
+        else:
+            results.update(self.sync_offline_users(db_handler))
+        
+        # Sync offline bookings
+        report('bookings')
+        if bulk and workers > 1:
+            results.update(self.parallel_sync_offline_bookings(db_handler, workers))
+        elif bulk:
+            results.update(self.bulk_sync_offline_bookings(db_handler))
+        else:
+            results.update(self.sync_offline_bookings(db_handler))
+        
+        results['errors'] = results.get('user_errors', []) + results.get('booking_errors', [])
+        
+        # Drop journal segments whose entries have all been synced
+        if results['users_synced'] or results['bookings_synced']:
+            self.journal.compact()
+        
+        # Update success flag if there were errors
+        if results['errors']:
+            results['success'] = False
+        
+        report('done')
+        return results
+    
+    def sync_offline_users(self, db_handler):
+        """Sync offline users to database"""
+        results = {
+            'users_synced': 0,
+            'user_errors': []
+        }
+        
+        for entry_id, user_data in self.journal.pending('users'):
+            conn = None
+            cursor = None
+            
+            if not self.lease.claim('users', entry_id):
+                continue
+            if self.journal.get('users', entry_id, refresh=True) is None:
+                self.lease.release('users', entry_id)
+                continue
+            
+            try:
+                # Hashed before connecting so the slow KDF doesn't hold a connection
+                hashed_pw = self._password_hash(user_data)
+                
+                # Connect to database
+                conn = db_handler.get_connection()
+                if not conn:
+                    results['user_errors'].append(f"No database connection for {entry_id}")
+                    continue
+                
+                cursor = conn.cursor()
+                
+                # Check if user already exists
+                check_query = "SELECT user_id FROM users WHERE username = %s OR email = %s"
+                cursor.execute(check_query, (user_data['username'], user_data['email']))
+                existing_user = cursor.fetchone()
+                
+                if existing_user:
+                    # User already exists, just mark the offline entry synced
+                    self.journal.ack('users', entry_id)
+                    results['users_synced'] += 1
+                    continue
+                
+                # Insert new user
+                insert_query = """
+                INSERT INTO users 
+                (username, email, password_hash, full_name, phone, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                """
+                
+                cursor.execute(insert_query, (
+                    user_data['username'],
+                    user_data['email'],
+                    hashed_pw,
+                    user_data['full_name'],
+                    user_data.get('phone', ''),
+                    user_data.get('created_at', datetime.now().isoformat())
+                ))
+                db_handler.admin_stats.record_users(cursor)
+                
+                conn.commit()
+                
+                # Mark the journal entry synced
+                self.journal.ack('users', entry_id)
+                results['users_synced'] += 1
+                print(f"Synced user: {user_data['username']}")
+                
+            except mysql.connector.Error as e:
+                results['user_errors'].append(f"Database error for {entry_id}: {str(e)}")
+                print(f"Database error syncing user {entry_id}: {e}")
+            except Exception as e:
+                results['user_errors'].append(f"Error processing {entry_id}: {str(e)}")
+                print(f"Error syncing user {entry_id}: {e}")
+            finally:
+                if cursor:
+                    cursor.close()
+                if conn:
+                    conn.close()
+                self.lease.release('users', entry_id)
+        
+        return results
+    
+    def sync_offline_bookings(self, db_handler):
+        """Sync offline bookings to database"""
+        results = {
+            'bookings_synced': 0,
+            'booking_errors': []
+        }
+        
+        for entry_id, booking_data in self.journal.pending('bookings'):
+            conn = None
+            cursor = None
+            
+            if not self.lease.claim('bookings', entry_id):
+                continue
+            if self.journal.get('bookings', entry_id, refresh=True) is None:
+                # Synced by another worker since we took the snapshot
+                self.lease.release('bookings', entry_id)
+                continue
+            
+            try:
+                # Connect to database
+                conn = db_handler.get_connection()
+                if not conn:
+                    results['booking_errors'].append(f"No database connection for {entry_id}")
+                    continue
+                
+                cursor = conn.cursor(dictionary=True)
+                
+                # Replayed before a crash (committed, not yet acked): just ack it
+                cursor.execute(
+                    "SELECT booking_id FROM bookings WHERE booking_reference = %s",
+                    (booking_data.get('booking_reference'),)
+                )
+                if cursor.fetchone():
+                    self.journal.ack('bookings', entry_id)
+                    results['bookings_synced'] += 1
+                    continue
+                
+                # Get user_id from username
+                user_query = "SELECT user_id FROM users WHERE username = %s"
+                cursor.execute(user_query, (booking_data.get('username', ''),))
+                user_result = cursor.fetchone()
+                
+                if not user_result:
+                    results['booking_errors'].append(f"User not found for booking {entry_id}")
+                    continue
+                
+                user_id = user_result['user_id']
+                
+                # Check if schedule exists
+                schedule_query = "SELECT available_seats, fare FROM bus_schedules WHERE schedule_id = %s"
+                cursor.execute(schedule_query, (booking_data['schedule_id'],))
+                schedule_result = cursor.fetchone()
+                
+                if not schedule_result:
+                    results['booking_errors'].append(f"Schedule not found for booking {entry_id}")
+                    continue
+                
+                seat_count = booking_data.get('seat_count', 1)
+                
+                # Claim specific free seats; the seat rows decide whether it still fits
+                seats = db_handler.seat_inventory.book_seats(
+                    cursor, booking_data['schedule_id'], seat_count, booking_data['booking_reference']
+                )
+                if seats is None:
+                    conn.rollback()
+                    results['booking_errors'].append(f"Not enough seats for booking {entry_id}")
+                    continue
+                
+                if not self.lease.renew('bookings', entry_id):
+                    # Waited on seat locks past the lease TTL and lost it
+                    conn.rollback()
+                    results['booking_errors'].append(
+                        f"Lease on {entry_id} expired and was taken over; left to the other worker"
+                    )
+                    continue
+                
+                # Insert booking
+                booking_query = """
+                INSERT INTO bookings 
+                (user_id, schedule_id, booking_reference, passenger_name, passenger_age, 
+                 passenger_gender, seat_numbers, total_fare, booking_status, booking_date)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'Confirmed', %s)
+                """
+                
+                seat_numbers = format_seats(seats)
+                total_fare = booking_data.get('total_fare', schedule_result['fare'] * seat_count)
+                
+                cursor.execute(booking_query, (
+                    user_id,
+                    booking_data['schedule_id'],
+                    booking_data['booking_reference'],
+                    booking_data['passenger_name'],
+                    booking_data.get('passenger_age', 25),
+                    booking_data.get('passenger_gender', 'Other'),
+                    seat_numbers,
+                    total_fare,
+                    booking_data.get('booking_date', datetime.now().isoformat())
+                ))
+                
+                db_handler.admin_stats.record_bookings(cursor, [
+                    (booking_data.get('booking_date'), total_fare)
+                ])
+                
+                conn.commit()
+                db_handler.apply_seat_counts({booking_data['schedule_id']: seat_count})
+                db_handler.note_write(user_id)
+                db_handler.seat_inventory.mark_booked(booking_data['schedule_id'], seats)
+                db_handler.analytics.record_booking(
+                    booking_data['schedule_id'], seat_count, total_fare, booking_data.get('booking_date')
+                )
+                db_handler.invalidate_schedule(booking_data['schedule_id'])
+                
+                # Mark the journal entry synced
+                self.journal.ack('bookings', entry_id)
+                results['bookings_synced'] += 1
+                print(f"Synced booking: {booking_data['booking_reference']}")
+                
+            except mysql.connector.Error as e:
+                if conn:
+                    conn.rollback()
+                results['booking_errors'].append(f"Database error for {entry_id}: {str(e)}")
+                print(f"Database error syncing booking {entry_id}: {e}")
+            except Exception as e:
+                results['booking_errors'].append(f"Error processing {entry_id}: {str(e)}")
+                print(f"Error syncing booking {entry_id}: {e}")
+            finally:
+                if cursor:
+                    cursor.close()
+                if conn:
+                    conn.close()
+                self.lease.release('bookings', entry_id)
+        
+        return results
+    
+    def _schedule_id(self, booking_data):
+        try:
+            return int(booking_data.get('schedule_id'))
+        except (TypeError, ValueError):
+            return None
+    
+    def _claim_batch(self, queue, entries, batch_size):
+        """Lease up to ``batch_size`` pending journal entries, consuming the ``entries`` deque as it goes
+        
+        Entries leased by another worker (or already synced by one) are skipped.
+        """
+        batch = []
+        while entries and len(batch) < batch_size:
+            entry_id, data = entries.popleft()
+            if not self.lease.claim(queue, entry_id):
+                continue
+            if self.journal.get(queue, entry_id) is None:
+                self.lease.release(queue, entry_id)
+                continue
+            batch.append((entry_id, data))
+        return batch
+    
+    def _renew_batch(self, queue, records, errors):
+        """Renew the leases of a batch; returns the records this worker still holds
+        
+        Called once the batch has waited for its row locks, the step that can
+        outlast SYNC_LEASE_TTL. Records another worker took over meanwhile are
+        left to that worker.
+        """
+        held = []
+        for entry_id, data in records:
+            if self.lease.renew(queue, entry_id):
+                held.append((entry_id, data))
+            else:
+                errors.append(f"Lease on {entry_id} expired and was taken over; left to the other worker")
+        return held
+    
+    def _keep_held(self, db_handler, cursor, allocated, errors):
+        """Drop allocated bookings whose lease was lost while claiming seats, giving their seats back"""
+        held = {entry_id for entry_id, _ in self._renew_batch('bookings', [item[:2] for item in allocated], errors)}
+        for entry_id, _, schedule_id, _, seats in allocated:
+            if entry_id not in held:
+                db_handler.seat_inventory.unbook_seats(cursor, schedule_id, seats)
+        return [item for item in allocated if item[0] in held]
+    
+    def _release_batch(self, queue, records):
+        for entry_id, _ in records:
+            self.lease.release(queue, entry_id)
+    
+    def _allocate_seats(self, db_handler, cursor, pending, errors):
+        """Assign real seats to replayed bookings, one allocation per schedule
+        
+        Takes (entry_id, row, schedule_id, seat_count) items and returns them
+        with the seat numbers filled into the row and the seat list appended.
+        Bookings that no longer fit are reported and dropped.
+        """
+        by_schedule = {}
+        for item in pending:
+            by_schedule.setdefault(item[2], []).append(item)
+        
+        allocated = []
+        for schedule_id, items in sorted(by_schedule.items()):
+            requests = [(row[2], seat_count) for _, row, _, seat_count in items]
+            seats = db_handler.seat_inventory.book_seats_for_batch(cursor, schedule_id, requests)
+            if seats is None:
+                # Not enough free seats for all of them; place them one at a time
+                seats = [
+                    db_handler.seat_inventory.book_seats(cursor, schedule_id, seat_count, booking_reference)
+                    for booking_reference, seat_count in requests
+                ]
+            for (entry_id, row, _, seat_count), taken in zip(items, seats):
+                if taken is None:
+                    errors.append(f"Not enough seats for booking {entry_id}")
+                    continue
+                row = row[:6] + (format_seats(taken),) + row[7:]
+                allocated.append((entry_id, row, schedule_id, seat_count, taken))
+        return allocated
+    
+    def _insert_isolated(self, cursor, query, rows, labels, errors):
+        """Insert rows one by one under savepoints so one bad record doesn't sink the batch
+        
+        Returns the indexes of rows that were inserted.
+        """
+        inserted = []
+        for i, row in enumerate(rows):
+            try:
+                cursor.execute("SAVEPOINT sync_record")
+                cursor.execute(query, row)
+                cursor.execute("RELEASE SAVEPOINT sync_record")
+                inserted.append(i)
+            except mysql.connector.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT sync_record")
+                errors.append(f"Database error for {labels[i]}: {str(e)}")
+        return inserted
+    
+    def bulk_sync_offline_users(self, db_handler, batch_size=None):
+        """Sync queued offline users batch by batch, one transaction per batch
+        
+        Passwords still stored in plaintext are hashed before the batch checks
+        out its connection, so the slow KDF doesn't hold one.
+        """
+        results = {
+            'users_synced': 0,
+            'user_errors': []
+        }
+        errors = results['user_errors']
+        batch_size = batch_size or Config.SYNC_BATCH_SIZE
+        
+        entries = deque(self.journal.pending('users'))
+        
+        while entries:
+            # Pick up acks from other workers before leasing the next batch
+            self.journal.refresh(force=True)
+            records = self._claim_batch('users', entries, batch_size)
+            if not records:
+                break
+            conn = None
+            cursor = None
+            try:
+                hashed = {}
+                for entry_id, user_data in records:
+                    try:
+                        hashed[entry_id] = self._password_hash(user_data)
+                    except KeyError as e:
+                        errors.append(f"Error processing {entry_id}: missing {e}")
+                    except HasherBusy as e:
+                        errors.append(f"Error processing {entry_id}: {str(e)}")
+                # Hashing can take a while; keep only what this worker still holds
+                ready = self._renew_batch('users', [item for item in records if item[0] in hashed], errors)
+                if not ready:
+                    continue
+                
+                conn = db_handler.get_connection()
+                if not conn:
+                    errors.append("No database connection for user sync")
+                    break
+                cursor = conn.cursor(dictionary=True)
+                
+                # Resolve which usernames/emails already exist with one query
+                usernames = [data.get('username', '') for _, data in ready]
+                emails = [data.get('email', '') for _, data in ready]
+                placeholders_u = ", ".join(["%s"] * len(usernames))
+                placeholders_e = ", ".join(["%s"] * len(emails))
+                cursor.execute(
+                    f"SELECT username, email FROM users "
+                    f"WHERE username IN ({placeholders_u}) OR email IN ({placeholders_e})",
+                    tuple(usernames) + tuple(emails)
+                )
+                taken_usernames = set()
+                taken_emails = set()
+                for row in cursor.fetchall():
+                    taken_usernames.add(row['username'])
+                    taken_emails.add(row['email'])
+                
+                done = []
+                pending = []
+                for entry_id, user_data in ready:
+                    try:
+                        username = user_data['username']
+                        email = user_data['email']
+                        if username in taken_usernames or email in taken_emails:
+                            # Already in the database (or earlier in this batch)
+                            done.append(entry_id)
+                            continue
+                        
+                        row = (
+                            username,
+                            email,
+                            hashed[entry_id],
+                            user_data['full_name'],
+                            user_data.get('phone', ''),
+                            user_data.get('created_at', datetime.now().isoformat())
+                        )
+                    except KeyError as e:
+                        errors.append(f"Error processing {entry_id}: missing {e}")
+                        continue
+                    taken_usernames.add(username)
+                    taken_emails.add(email)
+                    pending.append((entry_id, row))
+                
+                insert_query = """
+                INSERT INTO users 
+                (username, email, password_hash, full_name, phone, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                """
+                rows = [row for _, row in pending]
+                inserted = range(len(rows))
+                if rows:
+                    try:
+                        cursor.executemany(insert_query, rows)
+                    except mysql.connector.Error:
+                        conn.rollback()
+                        labels = [entry_id for entry_id, _ in pending]
+                        inserted = self._insert_isolated(cursor, insert_query, rows, labels, errors)
+                db_handler.admin_stats.record_users(cursor, len(inserted))
+                
+                conn.commit()
+                
+                done.extend(pending[i][0] for i in inserted)
+                for entry_id in done:
+                    self.journal.ack('users', entry_id)
+                results['users_synced'] += len(done)
+                print(f"Synced {len(done)} users")
+                
+            except mysql.connector.Error as e:
+                if conn:
+                    conn.rollback()
+                errors.append(f"Database error during user sync: {str(e)}")
+                print(f"Database error during bulk user sync: {e}")
+                break
+            finally:
+                if cursor:
+                    cursor.close()
+                if conn:
+                    conn.close()
+                self._release_batch('users', records)
+        
+        return results
+    
+    def bulk_sync_offline_bookings(self, db_handler, batch_size=None):
+        """Sync queued offline bookings over one connection, committing per batch"""
+        results = {
+            'bookings_synced': 0,
+            'booking_errors': []
+        }
+        errors = results['booking_errors']
+        batch_size = batch_size or Config.SYNC_BATCH_SIZE
+        
+        entries = deque(self.journal.pending('bookings'))
+        if not entries:
+            return results
+        
+        conn = db_handler.get_connection()
+        if not conn:
+            errors.append("No database connection for booking sync")
+            return results
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            while True:
+                # Pick up acks from other workers before leasing the next batch
+                self.journal.refresh(force=True)
+                records = self._claim_batch('bookings', entries, batch_size)
+                if not records:
+                    break
+                try:
+                    
+                    usernames = sorted({data.get('username', '') for _, data in records})
+                    schedule_ids = sorted({self._schedule_id(data) for _, data in records} - {None})
+                    references = [data.get('booking_reference') for _, data in records]
+                    
+                    cursor.execute(
+                        f"SELECT user_id, username FROM users WHERE username IN ({', '.join(['%s'] * len(usernames))})",
+                        tuple(usernames)
+                    )
+                    user_ids = {row['username']: row['user_id'] for row in cursor.fetchall()}
+                    
+                    # Fares, and the counters as a first check; seats are claimed below
+                    schedules = {}
+                    if schedule_ids:
+                        cursor.execute(
+                            f"SELECT schedule_id, available_seats, fare FROM bus_schedules "
+                            f"WHERE schedule_id IN ({', '.join(['%s'] * len(schedule_ids))})",
+                            tuple(schedule_ids)
+                        )
+                        schedules = {row['schedule_id']: row for row in cursor.fetchall()}
+                    remaining = {schedule_id: row['available_seats'] for schedule_id, row in schedules.items()}
+                    
+                    # Bookings replayed before a crash (committed, file not yet removed)
+                    cursor.execute(
+                        f"SELECT booking_reference FROM bookings "
+                        f"WHERE booking_reference IN ({', '.join(['%s'] * len(references))})",
+                        tuple(references)
+                    )
+                    already_synced = {row['booking_reference'] for row in cursor.fetchall()}
+                    
+                    done = []
+                    pending = []
+                    for entry_id, booking_data in records:
+                        try:
+                            if booking_data['booking_reference'] in already_synced:
+                                done.append(entry_id)
+                                continue
+                            
+                            user_id = user_ids.get(booking_data.get('username', ''))
+                            if not user_id:
+                                errors.append(f"User not found for booking {entry_id}")
+                                continue
+                            
+                            schedule_id = self._schedule_id(booking_data)
+                            schedule = schedules.get(schedule_id)
+                            if not schedule:
+                                errors.append(f"Schedule not found for booking {entry_id}")
+                                continue
+                            
+                            seat_count = booking_data.get('seat_count', 1)
+                            if remaining[schedule_id] < seat_count:
+                                errors.append(f"Not enough seats for booking {entry_id}")
+                                continue
+                            
+                            row = (
+                                user_id,
+                                schedule_id,
+                                booking_data['booking_reference'],
+                                booking_data['passenger_name'],
+                                booking_data.get('passenger_age', 25),
+                                booking_data.get('passenger_gender', 'Other'),
+                                None,  # seat_numbers, filled in once seats are allocated
+                                booking_data.get('total_fare', schedule['fare'] * seat_count),
+                                booking_data.get('booking_date', datetime.now().isoformat())
+                            )
+                        except KeyError as e:
+                            errors.append(f"Error processing {entry_id}: missing {e}")
+                            continue
+                        remaining[schedule_id] -= seat_count
+                        pending.append((entry_id, row, schedule_id, seat_count))
+                    
+                    booking_query = """
+                    INSERT INTO bookings 
+                    (user_id, schedule_id, booking_reference, passenger_name, passenger_age, 
+                     passenger_gender, seat_numbers, total_fare, booking_status, booking_date)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'Confirmed', %s)
+                    """
+                    # Seat claims are where the batch can wait on other transactions
+                    allocated = self._allocate_seats(db_handler, cursor, pending, errors)
+                    allocated = self._keep_held(db_handler, cursor, allocated, errors)
+                    rows = [item[1] for item in allocated]
+                    inserted = list(range(len(rows)))
+                    if rows:
+                        try:
+                            cursor.executemany(booking_query, rows)
+                        except mysql.connector.Error:
+                            # executemany is all-or-nothing: redo the batch row by row.
+                            # The seat allocation was rolled back as well, so claim again.
+                            conn.rollback()
+                            still_held = {item[0] for item in allocated}
+                            allocated = self._allocate_seats(
+                                db_handler, cursor, [item for item in pending if item[0] in still_held], errors
+                            )
+                            allocated = self._keep_held(db_handler, cursor, allocated, errors)
+                            labels = [item[0] for item in allocated]
+                            inserted = self._insert_isolated(
+                                cursor, booking_query, [item[1] for item in allocated], labels, errors
+                            )
+                            for i in set(range(len(allocated))) - set(inserted):
+                                db_handler.seat_inventory.unbook_seats(cursor, allocated[i][2], allocated[i][4])
+                    
+                    # One counter update per schedule for the whole batch, after commit
+                    taken = {}
+                    for i in inserted:
+                        schedule_id, seat_count = allocated[i][2], allocated[i][3]
+                        taken[schedule_id] = taken.get(schedule_id, 0) + seat_count
+                    
+                    db_handler.admin_stats.record_bookings(cursor, [
+                        (allocated[i][1][8], allocated[i][1][7]) for i in inserted
+                    ])
+                    
+                    conn.commit()
+                    if taken:
+                        db_handler.apply_seat_counts(taken)
+                    for i in inserted:
+                        db_handler.note_write(allocated[i][1][0])
+                        db_handler.seat_inventory.mark_booked(allocated[i][2], allocated[i][4])
+                        db_handler.analytics.record_booking(
+                            allocated[i][2], allocated[i][3], allocated[i][1][7], allocated[i][1][8]
+                        )
+                    for schedule_id in taken:
+                        db_handler.invalidate_schedule(schedule_id)
+                    
+                    done.extend(allocated[i][0] for i in inserted)
+                    for entry_id in done:
+                        self.journal.ack('bookings', entry_id)
+                    results['bookings_synced'] += len(done)
+                    print(f"Synced {len(done)} bookings")
+                finally:
+                    self._release_batch('bookings', records)
+                
+        except mysql.connector.Error as e:
+            conn.rollback()
+            errors.append(f"Database error during booking sync: {str(e)}")
+            print(f"Database error during bulk booking sync: {e}")
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+        
+        return results
+    
+    def parallel_sync_offline_bookings(self, db_handler, workers):
+        """Drain the booking queue with several bulk workers at once
+        
+        Queue leases keep the workers on disjoint files and the seat row
+        locks keep them from booking the same seat.
+        """
+        results = {
+            'bookings_synced': 0,
+            'booking_errors': []
+        }
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self.bulk_sync_offline_bookings, db_handler) for _ in range(workers)]
+            for future in futures:
+                partial = future.result()
+                results['bookings_synced'] += partial['bookings_synced']
+                results['booking_errors'].extend(partial['booking_errors'])
+        return results
+    
+    def _schedule_sort_key(self, schedule):
+        """Order cached schedules by travel date, then departure ('8:00:00' sorts before '14:00')"""
+        departure = str(schedule.get('departure_time') or '')
+        parts = tuple(int(p) for p in departure.split(':') if p.isdigit())
+        return (str(schedule.get('travel_date') or ''), parts)
+    
+    def _read_cache_meta(self):
+        meta_file = f"{self.offline_dir}/schedules/cache_meta.json"
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _write_cache_meta(self, meta):
+        meta_file = f"{self.offline_dir}/schedules/cache_meta.json"
+        with open(meta_file, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+    
+    def refresh_schedule_cache(self, db_handler, offline_mgr, full=False):
+        """Bring the offline schedule cache up to date
+        
+        Only schedules whose updated_at moved past the stored high-water mark
+        are fetched, and the ones that really changed are appended to the
+        cache's delta file, which readers apply on top of the cache. A
+        refresh costs in proportion to the changes, not the timetable.
+        
+        The cache is rewritten from a full load (compacted) when there is no
+        cache or mark yet, when ``full`` is set, once the delta holds
+        CACHE_DELTA_MAX_ROWS rows, and on the first refresh of each day,
+        which also drops past travel dates. Hard-deleted schedules go at
+        that point too.
+        """
+        results = {'mode': 'delta', 'changed': 0, 'delta_rows': 0}
+        meta = self._read_cache_meta()
+        base = self._cache_path()
+        today = date.today().isoformat()
+        
+        compact = (
+            full or base is None or not meta.get('high_water_mark')
+            or meta.get('base') != os.path.basename(base)
+            or meta.get('compacted_on') != today
+            or meta.get('delta_rows', 0) >= Config.CACHE_DELTA_MAX_ROWS
+        )
+        since = None
+        if compact:
+            results['mode'] = 'full'
+        else:
+            mark = datetime.fromisoformat(meta['high_water_mark'])
+            since = mark - timedelta(seconds=Config.CACHE_DELTA_OVERLAP)
+        
+        changes, high_water_mark = db_handler.get_schedules_changed_since(since)
+        if high_water_mark is None and not changes:
+            # Query failed (or nothing to cache at all); keep the current cache
+            results['success'] = False
+            return results
+        
+        if compact:
+            base = self.cache_schedules(sorted(changes, key=self._schedule_sort_key))
+            if not base:
+                results['success'] = False
+                return results
+            meta.update(base=os.path.basename(base), compacted_on=today, delta_rows=0)
+            results['changed'] = len(changes)
+        else:
+            # The overlap window re-reads rows already cached; only append real changes
+            recent = meta.get('recent', {})
+            changed = [
+                schedule for schedule in changes
+                if recent.get(str(schedule.get('schedule_id'))) != [
+                    schedule.get('updated_at'), schedule.get('available_seats')
+                ]
+            ]
+            if changed:
+                try:
+                    append_delta(base, changed)
+                except OSError as e:
+                    print(f"Cache delta error: {e}")
+                    results['success'] = False
+                    return results
+                meta['delta_rows'] = meta.get('delta_rows', 0) + len(changed)
+            results['changed'] = len(changed)
+        results['delta_rows'] = meta['delta_rows']
+        
+        if changes and high_water_mark is not None:
+            if hasattr(high_water_mark, 'isoformat'):
+                high_water_mark = high_water_mark.isoformat()
+            meta['high_water_mark'] = str(high_water_mark)
+            # What the next refresh's overlap window will read again, to tell re-reads from changes
+            overlap_start = (
+                datetime.fromisoformat(meta['high_water_mark']) - timedelta(seconds=Config.CACHE_DELTA_OVERLAP)
+            ).isoformat()
+            meta['recent'] = {
+                str(schedule.get('schedule_id')): [schedule.get('updated_at'), schedule.get('available_seats')]
+                for schedule in changes if str(schedule.get('updated_at') or '') >= overlap_start
+            }
+        meta['refreshed_at'] = datetime.now().isoformat()
+        self._write_cache_meta(meta)
+        
+        results['success'] = True
+        return results
+    
+    def _cache_path(self):
+        """The cache file offline readers use now, or None if there is none yet"""
+        cache_dir = f"{self.offline_dir}/schedules"
+        if Config.OFFLINE_CACHE_FORMAT == 'columnar':
+            return current_columnar(f"{cache_dir}/cache.bin")
+        cache_file = f"{cache_dir}/cache.json"
+        return cache_file if os.path.exists(cache_file) else None
+    
+    def cache_schedules(self, schedules):
+        """Cache schedules for offline use; returns the file written, or None on failure"""
+        try:
+            cache_dir = f"{self.offline_dir}/schedules"
+            os.makedirs(cache_dir, exist_ok=True)
+            
+            if Config.OFFLINE_CACHE_FORMAT == 'columnar':
+                # A new version file, so it starts with no delta
+                cache_file = write_columnar(f"{cache_dir}/cache.bin", schedules)
+            else:
+                cache_file = f"{cache_dir}/cache.json"
+                # Drop the delta first: applied to the new file it would bring back older rows
+                if os.path.exists(delta_path(cache_file)):
+                    os.remove(delta_path(cache_file))
+                # Write aside and swap in, so a failed dump leaves the old cache readable
+                with open(cache_file + '.tmp', 'w', encoding='utf-8') as f:
+                    json.dump(schedules, f, indent=2, ensure_ascii=False, default=float)
+                os.replace(cache_file + '.tmp', cache_file)
+            
+            print(f"Cached {len(schedules)} schedules for offline use")
+            return cache_file
+        except Exception as e:
+            print(f"Cache error: {e}")
+            return None
+    
+    def export_cache_json(self, output_file=None):
+        """Dump the columnar schedule cache as readable JSON (for debugging/export)"""
+        try:
+            cache_dir = f"{self.offline_dir}/schedules"
+            output_file = output_file or f"{cache_dir}/cache.json"
+            cache_bin = current_columnar(f"{cache_dir}/cache.bin")
+            with ColumnarScheduleCache(cache_bin) as cache:
+                schedules = merge_delta(cache_bin, cache)
+            
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(schedules, f, indent=2, ensure_ascii=False)
+            
+            return output_file
+        except Exception as e:
+            print(f"Cache export error: {e}")
+            return None
\ No newline at end of file
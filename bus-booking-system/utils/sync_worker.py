@@ -0,0 +1,184 @@
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+
+
+class SyncWorker:
+    """Runs offline-data syncs as background jobs instead of inside a request
+
+    submit() returns at once with a job dict the page can poll through
+    get_job() (or follow via the status broadcaster). A trigger that
+    arrives while a job is queued or running gets that job back rather than
+    starting another, so repeated clicks and reconnect events never stack
+    up duplicate syncs. watch() starts a job by itself whenever the health
+    monitor sees MySQL come back with offline data waiting.
+    """
+
+    def __init__(self, sync_manager, db_handler, offline_mgr, broadcaster=None, history=20, max_errors=200):
+        self.sync_manager = sync_manager
+        self.db_handler = db_handler
+        self.offline_mgr = offline_mgr
+        self.broadcaster = broadcaster
+        self.history = history
+        self.max_errors = max_errors
+
+        self._cond = threading.Condition()
+        self._jobs = OrderedDict()   # job_id -> job, oldest first
+        self._active = None          # job_id of the queued or running job
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+    def submit(self, trigger='manual'):
+        """Queue a sync job, or return the one already queued/running"""
+        with self._cond:
+            if self._active is not None:
+                return dict(self._jobs[self._active])
+
+            job = {
+                'job_id': uuid.uuid4().hex[:12],
+                'trigger': trigger,
+                'status': QUEUED,
+                'phase': None,
+                'created_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'total': None,
+                'users_synced': 0,
+                'bookings_synced': 0,
+                'errors': [],
+                'error_count': 0
+            }
+            self._jobs[job['job_id']] = job
+            self._active = job['job_id']
+            while len(self._jobs) > self.history:
+                oldest = next(iter(self._jobs))
+                if oldest == self._active:
+                    break
+                del self._jobs[oldest]
+            self._cond.notify_all()
+        self.start()
+        return dict(job)
+
+    def get_job(self, job_id=None):
+        """Copy of a job (the active or most recent one when ``job_id`` is None)
+
+        While a job runs, ``pending`` is the number of offline records still
+        waiting, so ``total - pending`` is how far it has got.
+        """
+        with self._cond:
+            if job_id is None:
+                job_id = self._active or next(reversed(self._jobs), None)
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job, errors=list(job['errors']))
+        if job['status'] == RUNNING:
+            job['pending'] = self.offline_mgr.get_pending_sync_count()
+        return job
+
+    def list_jobs(self):
+        with self._cond:
+            return [dict(job, errors=list(job['errors'])) for job in reversed(self._jobs.values())]
+
+    def is_busy(self):
+        return self._active is not None
+
+    # ------------------------------------------------------------------
+    # Worker thread
+    # ------------------------------------------------------------------
+    def start(self):
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='sync-worker', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            with self._cond:
+                while not self._stop.is_set() and (
+                    self._active is None or self._jobs[self._active]['status'] != QUEUED
+                ):
+                    self._cond.wait()
+                if self._stop.is_set():
+                    break
+                job = self._jobs[self._active]
+            self._run(job)
+
+    def _update(self, job, finished=False, **changes):
+        with self._cond:
+            job.update(changes)
+            if finished:
+                self._active = None
+        if self.broadcaster:
+            self.broadcaster.on_sync_progress({
+                'job_id': job['job_id'],
+                'status': job['status'],
+                'phase': job['phase'],
+                'users_synced': job['users_synced'],
+                'bookings_synced': job['bookings_synced'],
+                'error_count': job['error_count']
+            })
+
+    def _run(self, job):
+        def progress(update):
+            self._update(
+                job,
+                phase=update['phase'],
+                users_synced=update['users_synced'],
+                bookings_synced=update['bookings_synced']
+            )
+
+        try:
+            # Inside the try: a failure here must still finish the job, or it stays active for good
+            self._update(
+                job,
+                status=RUNNING,
+                phase='starting',
+                started_at=datetime.now().isoformat(),
+                total=self.offline_mgr.get_pending_sync_count()
+            )
+            results = self.sync_manager.sync_all_data(self.db_handler, self.offline_mgr, progress=progress)
+            errors = results.get('errors', [])
+            status = SUCCEEDED if results.get('success') else FAILED
+            final = {
+                'users_synced': results.get('users_synced', 0),
+                'bookings_synced': results.get('bookings_synced', 0),
+                'errors': errors[:self.max_errors],
+                'error_count': len(errors)
+            }
+        except Exception as e:
+            print(f"Sync job error: {e}")
+            status = FAILED
+            final = {'errors': [f"Sync failed: {e}"], 'error_count': job['error_count'] + 1}
+
+        self._update(job, True, status=status, phase='done', finished_at=datetime.now().isoformat(), **final)
+
+    # ------------------------------------------------------------------
+    # Automatic sync on reconnect
+    # ------------------------------------------------------------------
+    def watch(self, monitor):
+        """Submit a job whenever ``monitor`` reports the database back online with data waiting"""
+        monitor.add_listener(self._on_health_change)
+        self._on_health_change(monitor.get_status())
+
+    def _on_health_change(self, status):
+        if not status['online']:
+            return
+        try:
+            if self.offline_mgr.get_pending_sync_count() > 0:
+                self.submit('reconnect')
+        except Exception as e:
+            print(f"Auto sync error: {e}")